@@ -1,18 +1,19 @@
 import sys
-import subprocess
-import tempfile
 import os
 import ast
 import re
 import json
-import platform
 import time
 import shutil
-from datetime import datetime
 from PySide6.QtCore import QThread, Signal, QObject, QMutex, QWaitCondition
-from core.skill_manager import SkillManager
-from core.env_utils import get_python_executable
+from core.skill_registry import SkillRegistry
+from core.python_pool import PythonPool, OutputBatcher
 from core.llm.factory import LLMFactory
+from core.tool_executor import ToolExecutor
+from core.context_budget import ContextBudget
+from core.telemetry import TurnMetrics, MetricsSink
+from core.prompt_builder import build_system_messages
+from core.tool_selector import select_skills, catalogue_lines, DEFAULT_PINNED_SKILLS
 
 try:
     from openai import OpenAI
@@ -52,34 +53,32 @@ class CodeWorker(QThread):
     finished_signal = Signal()
     input_request_signal = Signal(str)
 
-    def __init__(self, code, cwd, god_mode=False):
+    def __init__(self, code, cwd, god_mode=False, timeout=600, max_output_chars=200000):
         super().__init__()
         self.code = code
         self.cwd = cwd
         self.god_mode = god_mode
-        self.process = None
+        self.timeout = timeout # Wall-clock seconds, 0 for no limit
+        self.max_output_chars = max_output_chars
+        self.interpreter = None
         self.is_stopped = False
 
     def provide_input(self, text):
         """Write user input to stdin"""
-        if self.process and self.process.stdin:
-            try:
-                self.process.stdin.write(text + "\n")
-                self.process.stdin.flush()
-            except Exception as e:
-                print(f"Error writing to stdin: {e}")
+        if self.interpreter:
+            self.interpreter.send_input(text)
 
     def stop(self):
         self.is_stopped = True
-        if self.process:
-            try:
-                self.process.terminate() # Try graceful termination
-                self.output_signal.emit("System: Terminating process...")
-            except:
-                pass
+        if self.interpreter:
+            # The run loop kills the interpreter; the pool starts a replacement
+            self.output_signal.emit("System: Terminating process...")
 
     def run(self):
-        temp_path = None
+        pool = None
+        # Output is emitted in chunks; past the cap it goes to a log file in the workspace
+        spill_path = os.path.join(self.cwd, f"code_output_{time.strftime('%Y%m%d_%H%M%S')}.log")
+        batcher = OutputBatcher(self.output_signal.emit, self.max_output_chars, spill_path)
         try:
             # 1. Validation
             try:
@@ -89,93 +88,51 @@ class CodeWorker(QThread):
                 # We will let the finally block emit finished_signal
                 return
 
-            # Prepend input() override to capture user interaction
-            input_override = """
-import sys
-import io
-
-# Set stdout/stderr to utf-8 explicitly for Windows console
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
-
-def input(prompt=""):
-    print(f"__REQUEST_INPUT__:{prompt}", flush=True)
-    return sys.stdin.readline().strip()
-"""
-            full_code = input_override + "\n" + self.code
-
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-                f.write(full_code)
-                temp_path = f.name
-
-            # Determine python executable
-            python_exe = get_python_executable()
-
             if self.is_stopped: return
 
-            # Force environment variables for UTF-8 encoding
-            env = os.environ.copy()
-            env["PYTHONIOENCODING"] = "utf-8"
-            
-            # In frozen mode, we might need to adjust PATH to include the bundled python dir
-            # so that subprocesses can find DLLs etc. (optional but good practice)
-            if getattr(sys, 'frozen', False):
-                 python_dir = os.path.dirname(python_exe)
-                 env["PATH"] = python_dir + os.pathsep + env.get("PATH", "")
-
-            self.output_signal.emit(f"Running with {python_exe} in: {self.cwd}...")
-            self.process = subprocess.Popen(
-                [python_exe, temp_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE, # Enable stdin for input()
-                text=True,
-                cwd=self.cwd,
-                encoding='utf-8', # 强制 UTF-8 避免中文乱码
-                errors='replace',
-                bufsize=0, # Unbuffered for real-time
-                env=env # Apply environment variables
+            # 2. Warm interpreter from the shared pool (input() is routed back as __REQUEST_INPUT__)
+            pool = PythonPool.instance()
+            self.output_signal.emit(f"Running with {pool.python_exe} in: {self.cwd}...")
+            self.interpreter = pool.acquire()
+            status = self.interpreter.run(
+                self.code, self.cwd,
+                timeout=self.timeout or None,
+                on_output=batcher.add,
+                on_input=self._request_input(batcher),
+                is_stopped=lambda: self.is_stopped,
+                on_idle=batcher.tick
             )
-            
-            # Real-time output reading
-            while True:
-                if self.is_stopped:
-                    self.process.kill()
-                    self.output_signal.emit("⚠️ Process stopped by user.")
-                    break
-                
-                output = self.process.stdout.readline()
-                if output == '' and self.process.poll() is not None:
-                    break
-                if output:
-                    output = output.strip()
-                    if output.startswith("__REQUEST_INPUT__:"):
-                        prompt = output.split(":", 1)[1]
-                        self.input_request_signal.emit(prompt)
-                    else:
-                        self.output_signal.emit(output)
-            
-            if not self.is_stopped:
-                stderr = self.process.stderr.read()
+            batcher.flush()
+
+            if status == "stopped":
+                self.output_signal.emit("⚠️ Process stopped by user.")
+            else:
+                if status == "crashed":
+                    batcher.stderr.append("Python process exited unexpectedly.")
+                stderr = batcher.stderr_text().strip()
                 if stderr:
                     self.output_signal.emit(f"Error Output:\n{stderr}")
-            
+                if status == "timeout":
+                    self.output_signal.emit(f"⚠️ Execution timed out ({self.timeout}s), process stopped.")
+
         except Exception as e:
             self.output_signal.emit(f"Execution Error: {e}")
             # Also print to console for debugging
             import traceback
             traceback.print_exc()
-            
         finally:
-            # Clean up temp file
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
+            batcher.close()
+            if self.interpreter:
+                pool.release(self.interpreter)
+                self.interpreter = None
             self.finished_signal.emit()
 
+    def _request_input(self, batcher):
+        def request(prompt):
+            batcher.flush() # Show the output leading up to the prompt first
+            self.input_request_signal.emit(prompt)
+        return request
+
 def clear_reasoning_content(messages):
     """
     Helper to clear reasoning content from messages list to prevent repetition.
@@ -203,21 +160,24 @@ class LLMWorker(QThread):
     output_signal = Signal(str) # For generic output/errors
     agent_state_signal = Signal(dict) # Signal to report sub-agent status
     abort_signal = Signal() # Signal emitted when the worker is stopped
+    metrics_signal = Signal(dict) # Per-turn / per-tool latency and token metrics
 
-    def __init__(self, messages, config_manager, workspace_dir=None, parent_agent_id=None):
+    def __init__(self, messages, config_manager, workspace_dir=None, parent_agent_id=None, session_id=None):
         super().__init__()
         self.messages = messages
         self.config_manager = config_manager
         self.api_key = config_manager.get("api_key")
         self.workspace_dir = workspace_dir
         self.parent_agent_id = parent_agent_id
+        self.session_id = session_id
         
         # Flags for control
         self.is_paused = False
         self.is_stopped = False
         
-        # Initialize Skill Manager
-        self.skill_manager = SkillManager(workspace_dir, config_manager)
+        # Skills come from the shared registry; the snapshot is immutable and bound to this workspace
+        self.skill_registry = SkillRegistry.instance(config_manager)
+        self.skill_manager = self.skill_registry.snapshot(workspace_dir)
         self.tools = self.skill_manager.get_tool_definitions()
 
     def pause(self):
@@ -234,49 +194,56 @@ class LLMWorker(QThread):
         self.step_signal.emit("System: Stopping...")
         self.abort_signal.emit()
 
+    def _emit_metrics(self, metrics, record):
+        # Safe to call from tool pool threads: the sink locks and Qt queues the signal
+        record["agent_id"] = self.parent_agent_id or "Main"
+        totals = metrics.record(record, self.session_id)
+        self.metrics_signal.emit({"record": record, "totals": totals})
+
+    def _select_skills(self, messages):
+        """Relevance-based skill subset for this run, or None to offer every tool."""
+        if not self.config_manager.get("tool_subsetting", True):
+            return None
+        # Without enable_skills the model could not reach the omitted skills
+        if self.skill_manager.get_skill_of_tool("enable_skills") is None:
+            return None
+        pinned = list(self.config_manager.get("pinned_skills", DEFAULT_PINNED_SKILLS))
+        pinned.append(self.skill_manager.get_skill_of_tool("enable_skills"))
+        try:
+            return select_skills(self.skill_manager, messages, self.config_manager.get("tool_top_k", 3), pinned)
+        except Exception as e:
+            print(f"Skill selection failed, offering all tools: {e}")
+            return None
+
     def run(self):
         # Work on a copy of messages to handle multi-turn locally
         # CRITICAL: Clear previous reasoning content to avoid duplication/confusion in new turn
         current_messages = clear_reasoning_content(self.messages)
         
+        # Offer only the skills relevant to this request (plus the pinned core set)
+        # Chosen once per run, so the prompt prefix stays stable across turns
+        selection = self._select_skills(current_messages)
+        if selection:
+            skill_prompts = selection.skill_prompts(self.skill_manager)
+            other_skills = catalogue_lines(self.skill_manager, selection.omitted())
+            self.tools = selection.tool_definitions(self.skill_manager)
+            tool_tokens_saved = selection.tokens_saved(self.skill_manager)
+            self.step_signal.emit(
+                f"Tools: {len(selection.selected)}/{len(selection.available)} skills loaded for this request "
+                f"(~{tool_tokens_saved} tokens saved per turn)"
+            )
+        else:
+            skill_prompts = self.skill_manager.skill_prompts
+            other_skills = None
+            tool_tokens_saved = 0
+        selection_version = selection.version if selection else 0
+
         # Construct System Context
-        context_lines = [
-            f"当前工作区: {self.workspace_dir}",
-            f"操作系统: {platform.system()} {platform.release()}",
-            f"Python 版本: {sys.version.split()[0]}",
-            f"当前日期: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            "注意: 你正在指定的工作区内操作。除非明确允许使用绝对路径，否则所有文件操作都应相对于此路径。",
-            "能力: 你可以使用 'create_new_skill' 创建新的技能/工具。",
-            "策略 [技能创建]:",
-            "1. 鼓励创建新技能来封装可复用的任务（例如：特定的文件处理、复杂计算、数据转换、系统操作等）。",
-            "2. 当你发现某个任务可能在未来被再次使用，或者通过代码实现比通过纯文本生成更可靠时，请果断创建技能。",
-            "3. 不要受到过度限制，灵活运用技能来增强你的能力。",
-            "",
-            "策略 [自我进化]:",
-            "1. 你拥有 'update_experience' 工具，用于记录重要的经验教训、配置偏好或特定的工具使用技巧。",
-            "2. 当你成功解决一个难题、发现某个工具的最佳实践或遇到并修复了错误时，请务必使用 'update_experience' 记录下来。",
-            "3. 这些经验将在未来类似场景中自动注入，帮助你变得更聪明。",
-            "",
-            "策略 [交互]: 如果你需要向用户提问或获取确认（例如：删除文件、澄清需求或下一步操作），你必须使用 'ask_user_confirmation' 工具。",
-            "不要在文本回复中直接提问。文本回复仅用于展示推理过程和最终答案。请使用工具来触发弹出对话框。",
-            "",
-            "策略 [思考规范]:",
-            "1. 你的思考过程 (Reasoning) 仅用于分析问题、规划步骤和反思结果。",
-            "2. 严禁将最终给用户的回复（如任务总结、文件列表、结果汇报）放在思考过程中。",
-            "3. 思考过程对用户是折叠的，用户主要阅读的是你的最终 Content 回复。"
-        ]
-        if self.parent_agent_id:
-            context_lines.append(f"Note: You are a sub-agent (ID: {self.parent_agent_id}). Perform your assigned task efficiently.")
-
-        # Append Skill-Specific Prompts (e.g. usage guidelines, learned experiences)
-        if self.skill_manager.skill_prompts:
-            context_lines.append("\n# Skill Capabilities & Guidelines")
-            context_lines.extend(self.skill_manager.skill_prompts)
-
-        system_prompt = "\n".join(context_lines)
-        
-        # Insert System Message
-        current_messages.insert(0, {"role": "system", "content": system_prompt})
+        # Static policy + skill guidelines first, volatile context (date, workspace) last,
+        # so the provider can reuse its prompt cache for the shared prefix
+        current_messages[:0] = build_system_messages(
+            skill_prompts, self.workspace_dir, self.parent_agent_id, other_skills=other_skills
+        )
         
         full_reasoning = ""
         final_content = ""
@@ -289,6 +256,12 @@ class LLMWorker(QThread):
         
         last_turn_reasoning = None
         reasoning_repetition_count = 0
+
+        tool_executor = ToolExecutor(self.skill_manager, self.config_manager.get("max_parallel_tools", 4))
+        context_budget = ContextBudget.from_config(self.config_manager)
+        total_tokens_saved = 0
+        metrics = MetricsSink.instance()
+        metrics.enabled = self.config_manager.get("metrics_enabled", True)
         
         while True:
             # Check Control Flags
@@ -303,11 +276,20 @@ class LLMWorker(QThread):
             self.step_signal.emit(f"Turn {turn_count}: Requesting LLM...")
 
             # --- Hot Reload Skills ---
-            # Check if any new skills were added or modified
-            if self.skill_manager.check_for_updates():
+            # The registry reloads only skills that were added or modified
+            snapshot = self.skill_registry.snapshot(self.workspace_dir)
+            if snapshot.version != self.skill_manager.version:
                 self.step_signal.emit("System: Detecting skill updates... Reloading.")
-                self.skill_manager.load_skills()
-                self.tools = self.skill_manager.get_tool_definitions()
+                self.skill_manager = snapshot
+                tool_executor.skill_manager = snapshot
+                if selection:
+                    # Skills created during this run are offered right away
+                    selection.refresh(snapshot)
+                    selection_version = selection.version
+                    self.tools = selection.tool_definitions(snapshot)
+                    tool_tokens_saved = selection.tokens_saved(snapshot)
+                else:
+                    self.tools = self.skill_manager.get_tool_definitions()
             # -------------------------
 
             # Reset reasoning for the current turn (for UI display)
@@ -317,8 +299,17 @@ class LLMWorker(QThread):
                 try:
                     start_time = time.time()
                     
-                    # Create Provider via Factory
-                    provider = LLMFactory.create_provider(self.config_manager)
+                    # Shared Provider via Factory (reuses the HTTP connection pool across turns and agents)
+                    provider = LLMFactory.get_provider(self.config_manager)
+
+                    # Keep the prompt under the context budget by compacting old tool results
+                    # Stubs stay in place, so earlier savings apply to every later request too
+                    tokens_saved = context_budget.compact(current_messages)
+                    total_tokens_saved += tokens_saved
+                    if total_tokens_saved:
+                        self.step_signal.emit(f"Context: ~{total_tokens_saved} tokens trimmed from this request ({tokens_saved} newly compacted)")
+
+                    turn_metrics = TurnMetrics(turn_count, getattr(provider, "model_name", None))
                     stream = provider.chat_stream(current_messages, tools=self.tools)
                     
                     # Streaming Buffers
@@ -334,6 +325,7 @@ class LLMWorker(QThread):
                         if self.is_stopped: break
                         
                         type_ = chunk.get("type")
+                        turn_metrics.mark(type_)
                         
                         # 1. Handle Reasoning
                         if type_ == "reasoning":
@@ -366,13 +358,28 @@ class LLMWorker(QThread):
                             if "arguments" in chunk["function"]:
                                 tool_calls_buffer[index]["function"]["arguments"] += chunk["function"]["arguments"]
                         
-                        # 4. Handle Error
+                        # 4. Handle Usage (sent once, at the end of the stream)
+                        elif type_ == "usage":
+                            turn_metrics.usage = chunk["usage"]
+
+                        # 5. Handle Error
                         elif type_ == "error":
                             self.output_signal.emit(f"Provider Error: {chunk['content']}")
 
                     end_time = time.time()
                     duration = end_time - start_time
                     total_duration += duration
+
+                    output_chars = len(chunk_content) + len(current_turn_reasoning) + sum(
+                        len(t["function"]["arguments"]) for t in tool_calls_buffer.values())
+                    turn_record = turn_metrics.finish(output_chars, len(tool_calls_buffer))
+                    turn_record["tool_tokens_saved"] = tool_tokens_saved
+                    self._emit_metrics(metrics, turn_record)
+                    if turn_record["cache_hit_ratio"] is not None:
+                        self.step_signal.emit(
+                            f"Prompt cache: {turn_record['cache_hit_tokens']}/{turn_record['prompt_tokens']} "
+                            f"tokens reused ({turn_record['cache_hit_ratio']:.0%})"
+                        )
                     
                     # --- Reasoning Loop Detection ---
                     if current_turn_reasoning and len(current_turn_reasoning) > 10: # Ignore very short reasonings
@@ -462,58 +469,94 @@ class LLMWorker(QThread):
                         # ----------------------
 
                         self.step_signal.emit(f"Tool Calls Detected: {len(tool_calls)}")
-                        for tool in tool_calls:
-                            # Check Control Flags inside tool loop
-                            while self.is_paused:
-                                if self.is_stopped: break
-                                self.msleep(100)
-                            if self.is_stopped: break
-                            
-                            name = tool.function.name
-                            args = json.loads(tool.function.arguments)
-                            self.step_signal.emit(f"Executing Tool: {name}({args})")
-                            
-                            # Emit Tool Call Signal
-                            self.tool_call_signal.emit({
-                                "id": tool.id,
-                                "name": name,
-                                "args": args
-                            })
-                            
-                            # Report Active Skill
-                            skill_name = self.skill_manager.get_skill_of_tool(name)
-                            if skill_name:
-                                self.skill_used_signal.emit(skill_name)
-                            
+                        parsed_args = {tool.id: json.loads(tool.function.arguments) for tool in tool_calls}
+                        results = {}
+
+                        def invoke(tool):
                             # Execute via Skill Manager
                             # Pass step_signal as context to allow tools to log
+                            tool_start = time.perf_counter()
                             result = self.skill_manager.call_tool(
-                                name, 
-                                args, 
+                                tool.function.name,
+                                dict(parsed_args[tool.id]), # call_tool injects keys, keep the emitted args clean
                                 context={
-                                    "step_signal": self.step_signal, 
+                                    "step_signal": self.step_signal,
                                     "config_manager": self.config_manager,
-                                    "skill_manager": self.skill_manager,
+                                    "skill_manager": self.skill_registry.manager,
                                     "agent_state_signal": self.agent_state_signal,
                                     "tool_call_id": tool.id,
-                                    "abort_signal": self.abort_signal
+                                    "abort_signal": self.abort_signal,
+                                    "session_id": self.session_id,
+                                    "skill_selection": selection
                                 }
                             )
-                            
-                            # Emit Tool Result Signal
-                            self.tool_result_signal.emit({
-                                "id": tool.id,
-                                "result": str(result)
+                            result_text = str(result)
+                            self._emit_metrics(metrics, {
+                                "type": "tool",
+                                "turn": turn_count,
+                                "tool": tool.function.name,
+                                "skill": self.skill_manager.get_skill_of_tool(tool.function.name),
+                                "tool_call_id": tool.id,
+                                "duration": round(time.perf_counter() - tool_start, 3),
+                                "ok": not result_text.startswith("Error"),
+                                "result_chars": len(result_text)
                             })
+                            return result
 
+                        for batch in tool_executor.plan_batches(tool_calls):
+                            # Check Control Flags between batches
+                            while self.is_paused:
+                                if self.is_stopped: break
+                                self.msleep(100)
+                            if self.is_stopped: break
+
+                            if len(batch) > 1:
+                                self.step_signal.emit(f"Executing {len(batch)} tools in parallel")
+
+                            for tool in batch:
+                                name = tool.function.name
+                                args = parsed_args[tool.id]
+                                self.step_signal.emit(f"Executing Tool: {name}({args})")
+
+                                # Emit Tool Call Signal
+                                self.tool_call_signal.emit({
+                                    "id": tool.id,
+                                    "name": name,
+                                    "args": args
+                                })
+
+                                # Report Active Skill
+                                skill_name = self.skill_manager.get_skill_of_tool(name)
+                                if skill_name:
+                                    self.skill_used_signal.emit(skill_name)
+
+                            for tool, result in tool_executor.run_batch(batch, invoke):
+                                results[tool.id] = result
+                                # Emit Tool Result Signal
+                                self.tool_result_signal.emit({
+                                    "id": tool.id,
+                                    "result": str(result)
+                                })
+                                self.step_signal.emit(f"Tool Result: {result}")
+
+                        # enable_skills may have extended the selection: offer the new tools next turn
+                        if selection and selection.version != selection_version:
+                            selection_version = selection.version
+                            self.tools = selection.tool_definitions(self.skill_manager)
+                            tool_tokens_saved = selection.tokens_saved(self.skill_manager)
+                            self.step_signal.emit(f"Tools: now {len(selection.selected)}/{len(selection.available)} skills loaded")
+
+                        # Append results in the order the model issued the calls
+                        for tool in tool_calls:
+                            if tool.id not in results:
+                                continue
                             tool_msg = {
                                 "role": "tool",
                                 "tool_call_id": tool.id,
-                                "content": str(result) # Ensure content is string to avoid API errors
+                                "content": str(results[tool.id]) # Ensure content is string to avoid API errors
                             }
                             current_messages.append(tool_msg)
                             generated_messages.append(tool_msg)
-                            self.step_signal.emit(f"Tool Result: {result}")
                         # Loop continues to let LLM see tool results
                         continue
                     else:
@@ -522,6 +565,7 @@ class LLMWorker(QThread):
                         break
                         
                 except Exception as e:
+                    tool_executor.shutdown()
                     self.finished_signal.emit({"error": str(e)})
                     return
             else:
@@ -540,11 +584,16 @@ class LLMWorker(QThread):
                 
                 break
 
+        tool_executor.shutdown()
+
         self.finished_signal.emit({
             "reasoning": full_reasoning.strip(),
             "content": final_content,
             "role": "assistant",
             "duration": total_duration,
+            "context_tokens_saved": total_tokens_saved,
+            "tool_tokens_saved": tool_tokens_saved * turn_count,
+            "metrics": metrics.session_totals(self.session_id),
             "generated_messages": generated_messages
         })
 
@@ -33,7 +33,25 @@ class ConfigManager:
             "llm_provider": "openai",
             "disabled_skills": [],
             "god_mode": False,
-            "default_workspace": ""
+            "default_workspace": "",
+            "max_parallel_tools": 4,
+            "context_token_budget": 64000,
+            "context_keep_recent_turns": 4,
+            "metrics_enabled": True,
+            "skill_poll_interval": 2,
+            "tool_subsetting": True,
+            "tool_top_k": 3,
+            "pinned_skills": ["file-system", "interaction", "meta-tools", "skill_creator", "python-runner"],
+            "python_pool_enabled": True,
+            "python_pool_size": 2,
+            "python_pool_preload": ["pandas", "openpyxl"],
+            "python_pool_max_runs": 50,
+            "python_pool_max_memory_mb": 512,
+            "python_kernel_timeout": 300,
+            "python_kernel_max_memory_mb": 4096,
+            "code_run_timeout": 600,
+            "code_output_max_chars": 200000,
+            "extraction_cache_max_mb": 500
         }
         self.load_config()
 
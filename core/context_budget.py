@@ -0,0 +1,137 @@
+import re
+
+# CJK ideographs, kana and hangul are roughly one token per character;
+# everything else averages about four characters per token.
+_WIDE_CHAR_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+# Fixed estimate for an inline image part
+IMAGE_TOKENS = 1000
+# Per-message framing overhead (role, separators)
+MESSAGE_OVERHEAD = 4
+
+COMPACTED_MARKER = "[Compacted tool result"
+
+def estimate_tokens(text):
+    """Cheap, dependency-free token estimate for a string."""
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = str(text)
+    wide = len(_WIDE_CHAR_RE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+def estimate_message_tokens(msg):
+    """Estimate the prompt tokens a single chat message costs."""
+    tokens = MESSAGE_OVERHEAD
+    content = msg.get("content")
+    if isinstance(content, list):
+        for part in content:
+            if part.get("type") == "text":
+                tokens += estimate_tokens(part.get("text"))
+            else:
+                tokens += IMAGE_TOKENS
+    else:
+        tokens += estimate_tokens(content)
+    tokens += estimate_tokens(msg.get("reasoning_content"))
+    for tc in msg.get("tool_calls") or []:
+        func = tc.get("function", {})
+        tokens += estimate_tokens(func.get("name")) + estimate_tokens(func.get("arguments"))
+    return tokens
+
+class ContextBudget:
+    """
+    Keeps the message list sent to the provider under a token budget.
+
+    The most recent turns are always sent verbatim. When the conversation grows
+    past `max_tokens`, large tool results from older turns are replaced, oldest
+    first, with a truncated stub (head + tail of the original output).
+    Compaction replaces list entries rather than mutating the message dicts,
+    so saved chat history keeps the full results, and a stub stays identical on
+    later turns so provider prefix caching keeps working.
+    """
+
+    def __init__(self, max_tokens=64000, keep_recent_turns=4, min_tool_tokens=300, stub_chars=600):
+        self.max_tokens = int(max_tokens)
+        self.keep_recent_turns = max(1, int(keep_recent_turns))
+        self.min_tool_tokens = int(min_tool_tokens)
+        self.stub_chars = int(stub_chars)
+        self._cache = {} # id(msg) -> (msg, tokens)
+
+    @classmethod
+    def from_config(cls, config_manager):
+        return cls(
+            max_tokens=config_manager.get("context_token_budget", 64000),
+            keep_recent_turns=config_manager.get("context_keep_recent_turns", 4)
+        )
+
+    def message_tokens(self, msg):
+        cached = self._cache.get(id(msg))
+        if cached is not None and cached[0] is msg:
+            return cached[1]
+        tokens = estimate_message_tokens(msg)
+        # Keep a reference to msg so its id cannot be reused while cached
+        self._cache[id(msg)] = (msg, tokens)
+        return tokens
+
+    def total_tokens(self, messages):
+        return sum(self.message_tokens(m) for m in messages)
+
+    def _protected_start(self, messages):
+        """Index of the first message that must be kept verbatim."""
+        seen = 0
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].get("role") == "assistant":
+                seen += 1
+                if seen >= self.keep_recent_turns:
+                    return i
+        return 0
+
+    def compact(self, messages):
+        """
+        Compact `messages` in place if it exceeds the budget.
+        Returns the estimated number of tokens saved.
+        """
+        total = self.total_tokens(messages)
+        if total <= self.max_tokens:
+            return 0
+
+        tool_names = {}
+        for msg in messages:
+            for tc in msg.get("tool_calls") or []:
+                tool_names[tc.get("id")] = tc.get("function", {}).get("name", "tool")
+
+        saved = 0
+        for i in range(self._protected_start(messages)):
+            if total - saved <= self.max_tokens:
+                break
+            msg = messages[i]
+            if msg.get("role") != "tool":
+                continue
+            content = msg.get("content")
+            if not isinstance(content, str) or content.startswith(COMPACTED_MARKER):
+                continue
+            before = self.message_tokens(msg)
+            if before < self.min_tool_tokens:
+                continue
+            stub = dict(msg)
+            stub["content"] = self._make_stub(content, tool_names.get(msg.get("tool_call_id"), "tool"))
+            after = self.message_tokens(stub)
+            if after >= before:
+                continue
+            messages[i] = stub
+            saved += before - after
+
+        live = {id(m) for m in messages}
+        self._cache = {k: v for k, v in self._cache.items() if k in live}
+        return saved
+
+    def _make_stub(self, content, tool_name):
+        half = self.stub_chars // 2
+        head = content[:half]
+        tail = content[-half:] if len(content) > self.stub_chars else ""
+        header = (f"{COMPACTED_MARKER} of '{tool_name}': {len(content)} chars, "
+                  f"~{estimate_tokens(content)} tokens. Only the beginning and end are kept; "
+                  f"call the tool again if you need the full output.]")
+        if tail:
+            return f"{header}\n{head}\n...\n{tail}"
+        return f"{header}\n{head}"
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from .env_utils import get_app_data_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    meta TEXT,
+    part_count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+CREATE TABLE IF NOT EXISTS parts (
+    key TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    label TEXT,
+    text TEXT NOT NULL,
+    PRIMARY KEY (key, idx)
+);
+"""
+
+class ExtractionCache:
+    """
+    Text extracted from documents (PDF pages, slides, sheets), stored in SQLite
+    under the app data dir and shared by every worker in the process. Entries
+    are keyed by (absolute path, size, mtime, extractor version), so a changed
+    file or a new extractor never sees stale text; the least recently used
+    entries are evicted once the cache exceeds `max_mb`.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, db_path, max_mb=500):
+        self.db_path = db_path
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    @classmethod
+    def instance(cls, config_manager=None):
+        with cls._instance_lock:
+            if cls._instance is None:
+                max_mb = config_manager.get("extraction_cache_max_mb", 500) if config_manager else 500
+                cls._instance = cls(os.path.join(get_app_data_dir(), "extraction_cache.db"), max_mb=max_mb)
+            return cls._instance
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @staticmethod
+    def key(path, extractor):
+        st = os.stat(path)
+        raw = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}\0{extractor}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, path, extractor, start=0, end=None):
+        """
+        Cached parts [start, end) of a document as (parts, meta), where parts is a
+        list of (label, text); None if the document is not cached.
+        """
+        key = self.key(path, extractor)
+        with self._lock:
+            entry = self.conn.execute("SELECT meta, part_count FROM entries WHERE key = ?", (key,)).fetchone()
+            if entry is None:
+                return None
+            end = entry["part_count"] if end is None else min(end, entry["part_count"])
+            rows = self.conn.execute(
+                "SELECT label, text FROM parts WHERE key = ? AND idx >= ? AND idx < ? ORDER BY idx",
+                (key, start, end)).fetchall()
+            with self.conn:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return [(row["label"], row["text"]) for row in rows], json.loads(entry["meta"] or "{}")
+
+    def put(self, path, extractor, parts, meta=None):
+        """Store the extracted (label, text) parts of a document."""
+        key = self.key(path, extractor)
+        size = sum(len(text.encode("utf-8")) for _, text in parts)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM parts WHERE key = ?", (key,))
+            self.conn.executemany("INSERT INTO parts (key, idx, label, text) VALUES (?, ?, ?, ?)",
+                                  [(key, i, label, text) for i, (label, text) in enumerate(parts)])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, path, extractor, meta, part_count, bytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, os.path.abspath(path), extractor, json.dumps(meta or {}), len(parts), size, time.time()))
+            self._evict()
+
+    def extract(self, path, extractor, func):
+        """Parts and meta of a document, running func(path) -> (parts, meta) only on a cache miss."""
+        cached = self.get(path, extractor)
+        if cached is not None:
+            return cached
+        parts, meta = func(path)
+        self.put(path, extractor, parts, meta)
+        return parts, meta or {}
+
+    def get_parts(self, path, extractor, indices):
+        """
+        For documents cached page by page: ({index: (label, text)} of the cached
+        ones among `indices`, meta), or None if nothing of the document is cached.
+        """
+        key = self.key(path, extractor)
+        with self._lock:
+            entry = self.conn.execute("SELECT meta FROM entries WHERE key = ?", (key,)).fetchone()
+            if entry is None:
+                return None
+            indices = list(indices)
+            found = {}
+            for i in range(0, len(indices), 500): # SQLite parameter limit
+                batch = indices[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT idx, label, text FROM parts WHERE key = ? AND idx IN ({', '.join('?' * len(batch))})",
+                    [key] + batch).fetchall()
+                found.update((row["idx"], (row["label"], row["text"])) for row in rows)
+            with self.conn:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return found, json.loads(entry["meta"] or "{}")
+
+    def put_parts(self, path, extractor, parts, meta=None):
+        """Add {index: (label, text)} parts to a document cached page by page; `meta` is merged into its meta."""
+        key = self.key(path, extractor)
+        with self._lock, self.conn:
+            entry = self.conn.execute("SELECT meta FROM entries WHERE key = ?", (key,)).fetchone()
+            merged = json.loads(entry["meta"] or "{}") if entry else {}
+            merged.update(meta or {})
+            self.conn.executemany("INSERT OR REPLACE INTO parts (key, idx, label, text) VALUES (?, ?, ?, ?)",
+                                  [(key, idx, label, text) for idx, (label, text) in parts.items()])
+            stats = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(text AS BLOB))), 0) FROM parts WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, path, extractor, meta, part_count, bytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, os.path.abspath(path), extractor, json.dumps(merged), stats[0], stats[1], time.time()))
+            self._evict()
+
+    def total_bytes(self):
+        return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for row in self.conn.execute("SELECT key, bytes FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM parts WHERE key = ?", (row["key"],))
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (row["key"],))
+            total -= row["bytes"]
@@ -0,0 +1,363 @@
+import os
+import re
+import glob
+import json
+import time
+import datetime
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    workspace TEXT,
+    created REAL NOT NULL,
+    mtime REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_mtime ON sessions(mtime DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT,
+    data TEXT NOT NULL,
+    created REAL NOT NULL,
+    tool_name TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_session_seq ON messages(session_id, seq);
+CREATE INDEX IF NOT EXISTS idx_messages_tool ON messages(tool_name) WHERE tool_name IS NOT NULL;
+"""
+
+# Full-text index over the `content` column (external content: the text is stored once, in messages).
+# The trigram tokenizer matches substrings, so CJK text needs no word segmentation.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(content, content='messages', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages WHEN new.role IN ('user', 'assistant', 'tool') BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages WHEN old.role IN ('user', 'assistant', 'tool') BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+INSERT INTO messages_fts (rowid, content)
+    SELECT id, content FROM messages WHERE role IN ('user', 'assistant', 'tool');
+"""
+
+MAX_INDEXED_CHARS = 20000 # Searchable prefix of a message; the full message stays in `data`
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+_FILTER_RE = re.compile(r'^(skill|workspace|since|until):(.+)$')
+
+def message_text(msg):
+    """Plain text of a message's content (multimodal content lists keep their text parts)."""
+    content = msg.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else ""
+
+def session_title(messages):
+    """Title of a conversation: its first user message."""
+    for msg in messages:
+        if msg.get("role") == "user":
+            text = message_text(msg).strip()
+            if text:
+                return text[:200]
+    return ""
+
+def tool_names(messages):
+    """tool_call_id -> tool name for the tool calls in `messages`."""
+    names = {}
+    for msg in messages:
+        for call in msg.get("tool_calls") or []:
+            name = (call.get("function") or {}).get("name")
+            if call.get("id") and name:
+                names[call["id"]] = name
+    return names
+
+def _parse_date(text, end_of_day=False):
+    try:
+        day = datetime.datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        return None
+    if end_of_day:
+        day += datetime.timedelta(days=1)
+    return day.timestamp()
+
+def parse_search_query(text):
+    """
+    Split search box text into (terms, filters). Filters are written as
+    skill:<name>, workspace:<path>, since:YYYY-MM-DD and until:YYYY-MM-DD;
+    malformed dates are treated as search terms.
+    """
+    terms, filters = [], {}
+    for word in text.split():
+        match = _FILTER_RE.match(word)
+        if match:
+            key, value = match.groups()
+            if key in ("since", "until"):
+                stamp = _parse_date(value, end_of_day=key == "until")
+                if stamp is not None:
+                    filters[key] = stamp
+                    continue
+            else:
+                filters[key] = value
+                continue
+        terms.append(word)
+    return terms, filters
+
+def make_snippet(text, terms, width=64):
+    """Snippet of `text` around the first term found, with the terms wrapped in highlight markers."""
+    lower = text.lower()
+    hits = [lower.find(term.lower()) for term in terms]
+    hits = [pos for pos in hits if pos >= 0]
+    start = max(0, min(hits) - width // 4) if hits else 0
+    snippet = highlight(text[start:start + width], terms)
+    return ("…" if start else "") + snippet + ("…" if start + width < len(text) else "")
+
+def highlight(text, terms):
+    for term in terms:
+        text = re.sub(re.escape(term), lambda m: HIGHLIGHT_START + m.group(0) + HIGHLIGHT_END, text, flags=re.IGNORECASE)
+    return text
+
+class HistoryStore:
+    """
+    Chat history in one SQLite database (WAL mode).
+    Messages are appended incrementally as the conversation grows; sessions keep
+    an indexed title and mtime so the sidebar never has to open the messages.
+    User, assistant and tool messages are kept in an FTS5 index by triggers, so
+    search() sees every saved message without a separate indexing pass.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        self.fts = self._create_fts()
+
+    def _create_fts(self):
+        """Create the full-text index if it is missing. Returns whether full-text search is available."""
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone():
+            return True
+        try:
+            # Also indexes messages saved while the index was unavailable
+            self.conn.executescript("BEGIN;" + FTS_SCHEMA + "COMMIT;")
+        except sqlite3.OperationalError as e:
+            # SQLite builds without FTS5 (or older than 3.34, without trigram) fall back to LIKE scans
+            print(f"[HistoryStore] Full-text index unavailable: {e}")
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            return False
+        return True
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def sync_session(self, session_id, messages, start=0, workspace=None, mtime=None):
+        """
+        Store a session whose messages from sequence number `start` on are `messages`.
+        Only messages past the stored count are written; if the last stored message
+        changed, the loaded range is rewritten. Returns the number of rows written.
+        """
+        now = time.time() if mtime is None else mtime
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT message_count, title FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            stored = row["message_count"] if row else 0
+            total = start + len(messages)
+
+            first_new = stored
+            if stored > total:
+                first_new = start # History was truncated
+            elif stored > start:
+                last = self.conn.execute("SELECT data FROM messages WHERE session_id = ? AND seq = ?",
+                                         (session_id, stored - 1)).fetchone()
+                if last is None or last["data"] != self._dump(messages[stored - 1 - start]):
+                    first_new = start # Edited in place; rewrite what we have
+            first_new = max(first_new, start)
+
+            if first_new < stored:
+                self.conn.execute("DELETE FROM messages WHERE session_id = ? AND seq >= ?", (session_id, first_new))
+            names = tool_names(messages)
+            rows = [
+                (session_id, seq, msg.get("role") or "", message_text(msg)[:MAX_INDEXED_CHARS], self._dump(msg), now,
+                 names.get(msg.get("tool_call_id")) if msg.get("role") == "tool" else None)
+                for seq, msg in enumerate(messages[first_new - start:], start=first_new)
+            ]
+            self.conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, content, data, created, tool_name) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows)
+
+            title = row["title"] if row and row["title"] else (session_title(messages) if start == 0 else "")
+            if row:
+                self.conn.execute(
+                    "UPDATE sessions SET title = ?, mtime = ?, message_count = ?, workspace = COALESCE(?, workspace) WHERE id = ?",
+                    (title, now, total, workspace, session_id))
+            else:
+                self.conn.execute(
+                    "INSERT INTO sessions (id, title, workspace, created, mtime, message_count) VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, title, workspace, now, now, total))
+            return len(rows)
+
+    @staticmethod
+    def _dump(msg):
+        return json.dumps(msg, ensure_ascii=False)
+
+    def list_sessions(self, limit=50, offset=0):
+        """Most recently updated sessions first: dicts with id, title, mtime, message_count."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, title, workspace, mtime, message_count FROM sessions ORDER BY mtime DESC LIMIT ? OFFSET ?",
+                (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def session_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get_session(self, session_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, title, workspace, mtime, message_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return dict(row) if row else None
+
+    def message_count(self, session_id):
+        session = self.get_session(session_id)
+        return session["message_count"] if session else 0
+
+    def tail(self, session_id, limit, before=None):
+        """Up to `limit` messages with sequence number below `before` (default: the end), oldest first."""
+        with self._lock:
+            if before is None:
+                before = self.message_count(session_id)
+            rows = self.conn.execute(
+                "SELECT data FROM messages WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (session_id, before, limit)).fetchall()
+        return [json.loads(row["data"]) for row in reversed(rows)]
+
+    def load_messages(self, session_id, start=0, end=None):
+        """Messages with sequence numbers in [start, end), oldest first."""
+        with self._lock:
+            if end is None:
+                end = self.message_count(session_id)
+            rows = self.conn.execute(
+                "SELECT data FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start, end)).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def anchor_seq(self, session_id, seq):
+        """Sequence number of the message the transcript shows `seq` in (tool results render in their call's card)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MAX(seq) FROM messages WHERE session_id = ? AND seq <= ? AND role != 'tool'", (session_id, seq)).fetchone()
+        return row[0] if row[0] is not None else seq
+
+    def search(self, terms, limit=50, since=None, until=None, workspace=None, tools=None):
+        """
+        Messages containing all `terms`, best match first (bm25). `since`/`until` are
+        timestamps bounding the message time, `workspace` restricts to sessions of one
+        workspace and `tools` to sessions that called one of these tools.
+        Returns dicts with session_id, seq, role, title, created and snippet; matches
+        in the snippet are wrapped in HIGHLIGHT_START/HIGHLIGHT_END.
+        """
+        terms = [term for term in terms if term]
+        if not terms:
+            return []
+        # Trigrams cannot match terms shorter than three characters; those are checked with LIKE
+        indexed = [term for term in terms if len(term) >= 3] if self.fts else []
+        scanned = [term for term in terms if term not in indexed]
+
+        where, params = [], []
+        if indexed:
+            columns = f"snippet(messages_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 32) AS snippet"
+            tables = "messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            order = "bm25(messages_fts)"
+            where.append("messages_fts MATCH ?")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in indexed))
+        else:
+            columns = "m.content AS snippet"
+            tables = "messages m"
+            order = "m.created DESC, m.seq DESC"
+            where.append("m.role IN ('user', 'assistant', 'tool')")
+        for term in scanned:
+            where.append("m.content LIKE ? ESCAPE '\\'")
+            params.append("%" + re.sub(r"([\\%_])", r"\\\1", term) + "%")
+        if since is not None:
+            where.append("m.created >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("m.created < ?")
+            params.append(until)
+        if workspace:
+            where.append("s.workspace = ?")
+            params.append(workspace)
+        if tools is not None:
+            tools = list(tools)
+            where.append(f"m.session_id IN (SELECT session_id FROM messages WHERE tool_name IN ({', '.join('?' * len(tools))}))")
+            params.extend(tools)
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT m.session_id, m.seq, m.role, m.created, s.title, {columns} "
+                f"FROM {tables} JOIN sessions s ON s.id = m.session_id "
+                f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?",
+                params + [limit]).fetchall()
+        results = [dict(row) for row in rows]
+        for result in results:
+            if indexed:
+                result["snippet"] = highlight(result["snippet"], scanned)
+            else:
+                result["snippet"] = make_snippet(result["snippet"] or "", scanned)
+        return results
+
+    def delete_session(self, session_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def import_json_dir(self, history_dir):
+        """
+        One-time import of the old chat_history_<id>.json files. The files are left
+        in place; sessions already in the database are not overwritten.
+        Returns the number of sessions imported.
+        """
+        if self.get_meta("json_imported"):
+            return 0
+        imported = 0
+        for path in glob.glob(os.path.join(history_dir, "chat_history_*.json")):
+            session_id = os.path.basename(path)[len("chat_history_"):-len(".json")]
+            if self.get_session(session_id):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    messages = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[HistoryStore] Skipping {path}: {e}")
+                continue
+            if not isinstance(messages, list) or not messages:
+                continue
+            self.sync_session(session_id, messages, mtime=os.path.getmtime(path))
+            imported += 1
+        self.set_meta("json_imported", "1")
+        return imported
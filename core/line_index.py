@@ -0,0 +1,76 @@
+import os
+import mmap
+import bisect
+import threading
+from collections import OrderedDict
+
+BLOCK_SIZE = 1 << 20
+
+class LineIndex:
+    """
+    Sparse line index of a file: the number of line breaks before each 1 MB
+    block. Built in one pass of bytes.count over an mmap; finding where a line
+    starts then only scans inside one block, however long the file is.
+    Lines are split on b"\\n"; line numbers are 1-based.
+    """
+
+    def __init__(self, mm, block_size=BLOCK_SIZE):
+        self.size = size = len(mm)
+        self.block_size = block_size
+        self.block_starts = [] # Line breaks before each block
+        breaks = 0
+        for start in range(0, size, block_size):
+            self.block_starts.append(breaks)
+            breaks += mm[start:start + block_size].count(b"\n")
+        self.line_breaks = breaks
+        unterminated = size > 0 and mm[size - 1:size] != b"\n"
+        self.total_lines = breaks + (1 if unterminated else 0)
+
+    def line_offset(self, mm, line):
+        """Byte offset where `line` starts (the file size for the line after the last)."""
+        breaks = line - 1 # Line breaks before the line
+        if breaks <= 0:
+            return 0
+        if breaks > self.line_breaks:
+            return self.size
+        block = bisect.bisect_left(self.block_starts, breaks) - 1
+        pos = block * self.block_size
+        for _ in range(breaks - self.block_starts[block]):
+            pos = mm.find(b"\n", pos) + 1
+        return pos
+
+    def line_at(self, mm, offset):
+        """Line containing byte `offset`."""
+        block = min(offset // self.block_size, len(self.block_starts) - 1)
+        if block < 0:
+            return 1
+        start = block * self.block_size
+        return self.block_starts[block] + mm[start:offset].count(b"\n") + 1
+
+_cache = OrderedDict() # (path, mtime_ns, size) -> LineIndex
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 32
+
+def get_line_index(f, mm):
+    """Line index of the open file `f` (mapped as `mm`), cached until the file changes."""
+    # Keyed on the mapped length: a file growing after it was mapped must not
+    # leave an index of the shorter mapping under the new size
+    key = (os.path.abspath(f.name), os.fstat(f.fileno()).st_mtime_ns, len(mm))
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+    index = LineIndex(mm)
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+def open_mmap(f):
+    """Read-only mmap of an open file; None for empty files, which cannot be mapped."""
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
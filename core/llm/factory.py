@@ -1,12 +1,25 @@
+import threading
 from .providers import OpenAIProvider, AnthropicProvider, MoonshotProvider
 
 class LLMFactory:
+    # Process-wide provider registry: (provider_type, base_url, api_key, model_name) -> provider
+    # The SDK clients are thread-safe and keep an HTTP connection pool alive,
+    # so every worker and sub-agent sharing one provider pays TLS setup once.
+    _providers = {}
+    _lock = threading.Lock()
+
     @staticmethod
-    def create_provider(config_manager):
+    def _resolve_config(config_manager):
         provider_type = config_manager.get("llm_provider", "openai").lower()
         api_key = config_manager.get("api_key")
         base_url = config_manager.get("base_url")
         model_name = config_manager.get("model_name", "deepseek-reasoner")
+        return provider_type, base_url, api_key, model_name
+
+    @staticmethod
+    def create_provider(config_manager):
+        """Build a new, unshared provider from the current config."""
+        provider_type, base_url, api_key, model_name = LLMFactory._resolve_config(config_manager)
 
         # Allow per-model config override if implemented in ConfigManager later
         # For now, we use the global keys but support the 'llm_provider' switch
@@ -17,3 +30,40 @@ class LLMFactory:
             return MoonshotProvider(api_key, base_url, model_name)
         else:
             return OpenAIProvider(api_key, base_url, model_name)
+
+    @classmethod
+    def get_provider(cls, config_manager):
+        """
+        Return the shared provider for the current config, creating it on first use.
+        Changing api_key/base_url/model/provider in settings yields a new key and
+        therefore a fresh client; unchanged settings always reuse the same one.
+        """
+        key = cls._resolve_config(config_manager)
+        with cls._lock:
+            provider = cls._providers.get(key)
+            if provider is None:
+                provider = cls.create_provider(config_manager)
+                cls._providers[key] = provider
+            return provider
+
+    @classmethod
+    def evict_stale_providers(cls, config_manager):
+        """
+        Drop the shared providers that no longer match the current config (after
+        a settings change). They are not closed here: a turn still streaming
+        through one keeps working, and the SDK closes its client once it is
+        garbage-collected.
+        """
+        key = cls._resolve_config(config_manager)
+        with cls._lock:
+            for stale in [k for k in cls._providers if k != key]:
+                del cls._providers[stale]
+
+    @classmethod
+    def clear_providers(cls):
+        """Drop all shared providers and close their HTTP connection pools."""
+        with cls._lock:
+            providers = list(cls._providers.values())
+            cls._providers.clear()
+        for provider in providers:
+            provider.close()
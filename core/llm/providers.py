@@ -9,12 +9,23 @@ class LLMProvider(ABC):
         """
         Yields chunks of response.
         Each chunk should be a dict with:
-        - type: 'content' | 'reasoning' | 'tool_call'
+        - type: 'content' | 'reasoning' | 'tool_call' | 'usage' | 'error'
         - content: str (for content/reasoning)
         - tool_call: dict (for tool_call, partial or complete)
+        - usage: dict (for usage) with prompt_tokens, completion_tokens,
+          reasoning_tokens, cache_hit_tokens, cache_miss_tokens (None if unknown)
         """
         pass
 
+    def close(self):
+        """Release the underlying HTTP client (connection pool)."""
+        client = getattr(self, "client", None)
+        if client is not None and hasattr(client, "close"):
+            try:
+                client.close()
+            except Exception:
+                pass
+
 class OpenAIProvider(LLMProvider):
     def __init__(self, api_key, base_url, model_name):
         from openai import OpenAI
@@ -24,7 +35,7 @@ class OpenAIProvider(LLMProvider):
     def chat_stream(self, messages, tools=None):
         try:
             # Clean messages for OpenAI (remove internal keys if any)
-            clean_messages = self._prepare_messages(messages)
+            clean_messages = self._merge_system_messages(self._prepare_messages(messages))
             
             # Prepare tools
             api_tools = tools if tools else None
@@ -33,7 +44,9 @@ class OpenAIProvider(LLMProvider):
             params = {
                 "model": self.model_name,
                 "messages": clean_messages,
-                "stream": True
+                "stream": True,
+                # Final chunk carries token usage (incl. DeepSeek prompt cache hit/miss)
+                "stream_options": {"include_usage": True}
             }
             if api_tools:
                 params["tools"] = api_tools
@@ -41,6 +54,10 @@ class OpenAIProvider(LLMProvider):
             stream = self.client.chat.completions.create(**params)
 
             for chunk in stream:
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    yield {"type": "usage", "usage": self._normalize_usage(usage)}
+
                 if not chunk.choices:
                     continue
                     
@@ -70,6 +87,42 @@ class OpenAIProvider(LLMProvider):
         except Exception as e:
             yield {"type": "error", "content": str(e)}
 
+    def _merge_system_messages(self, messages):
+        """
+        Join the leading system messages into one (static part first), since not
+        every OpenAI-compatible API accepts several. DeepSeek caches by prefix,
+        so the static text still forms the shared, cacheable start of the prompt.
+        """
+        count = 0
+        while count < len(messages) and messages[count].get("role") == "system":
+            count += 1
+        if count < 2:
+            return messages
+        merged = {"role": "system", "content": "\n\n".join(m["content"] for m in messages[:count])}
+        return [merged] + messages[count:]
+
+    def _normalize_usage(self, usage):
+        data = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+        prompt_tokens = data.get("prompt_tokens")
+
+        # DeepSeek reports cache hits directly; OpenAI-style APIs nest them in details
+        cache_hit = data.get("prompt_cache_hit_tokens")
+        cache_miss = data.get("prompt_cache_miss_tokens")
+        if cache_hit is None:
+            cache_hit = (data.get("prompt_tokens_details") or {}).get("cached_tokens")
+            if cache_hit is None:
+                cache_hit = data.get("cached_tokens") # Moonshot
+            if cache_hit is not None and prompt_tokens is not None:
+                cache_miss = prompt_tokens - cache_hit
+
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": data.get("completion_tokens"),
+            "reasoning_tokens": (data.get("completion_tokens_details") or {}).get("reasoning_tokens"),
+            "cache_hit_tokens": cache_hit,
+            "cache_miss_tokens": cache_miss,
+        }
+
     def _prepare_messages(self, messages):
         # Deep copy and clean
         clean = []
@@ -134,6 +187,7 @@ class AnthropicProvider(LLMProvider):
             
             # Convert tools to Anthropic format
             api_tools = self._convert_tools(tools) if tools else None
+            self._add_cache_breakpoints(system_prompt, api_tools, api_messages)
             
             # Anthropic parameters
             kwargs = {
@@ -147,17 +201,28 @@ class AnthropicProvider(LLMProvider):
             if api_tools:
                 kwargs["tools"] = api_tools
 
+            usage = {}
             with self.client.messages.stream(**kwargs) as stream:
                 for event in stream:
-                    if event.type == "content_block_delta":
+                    if event.type == "message_start":
+                        usage = self._usage_to_dict(getattr(event.message, "usage", None))
+
+                    elif event.type == "message_delta":
+                        # Output token count arrives with the final message delta
+                        usage.update({k: v for k, v in self._usage_to_dict(getattr(event, "usage", None)).items() if v is not None})
+
+                    elif event.type == "content_block_delta":
                         if event.delta.type == "text_delta":
                             yield {"type": "content", "content": event.delta.text}
                         elif event.delta.type == "input_json_delta":
-                            # Streaming tool args
-                            # We need to track index manually or assume single tool call per block?
-                            # Anthropic SDK stream helper might be easier, but let's use raw events for fine control
-                            # actually 'index' is in content_block_start
-                            pass 
+                            # Streaming tool args, matched to the tool_use block by index
+                            yield {
+                                "type": "tool_call",
+                                "index": event.index,
+                                "function": {
+                                    "arguments": event.delta.partial_json
+                                }
+                            }
                             
                     elif event.type == "content_block_start":
                         if event.content_block.type == "tool_use":
@@ -171,25 +236,36 @@ class AnthropicProvider(LLMProvider):
                                 }
                             }
                             
-                    elif event.type == "content_block_delta" and event.delta.type == "input_json_delta":
-                         yield {
-                            "type": "tool_call",
-                            "index": event.index, 
-                            "function": {
-                                "arguments": event.delta.partial_json
-                            }
-                        }
+
+            if usage:
+                input_tokens = usage.get("input_tokens") or 0
+                cache_read = usage.get("cache_read_input_tokens") or 0
+                cache_write = usage.get("cache_creation_input_tokens") or 0
+                yield {"type": "usage", "usage": {
+                    # Anthropic counts cached input separately from input_tokens
+                    "prompt_tokens": input_tokens + cache_read + cache_write,
+                    "completion_tokens": usage.get("output_tokens"),
+                    "reasoning_tokens": None,
+                    "cache_hit_tokens": cache_read,
+                    "cache_miss_tokens": input_tokens + cache_write,
+                }}
 
         except Exception as e:
             yield {"type": "error", "content": str(e)}
 
+    def _usage_to_dict(self, usage):
+        if usage is None:
+            return {}
+        keys = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+        return {k: getattr(usage, k, None) for k in keys}
+
     def _prepare_messages(self, messages):
         """
         Convert OpenAI-style messages to Anthropic format.
-        - Extract system message.
+        - Extract system messages as text blocks (one block per message).
         - Convert 'image_url' content to Anthropic image block.
         """
-        system_prompt = ""
+        system_prompt = []
         api_messages = []
         
         for msg in messages:
@@ -197,7 +273,8 @@ class AnthropicProvider(LLMProvider):
             content = msg["content"]
             
             if role == "system":
-                system_prompt += content + "\n"
+                if content:
+                    system_prompt.append({"type": "text", "text": content})
                 continue
                 
             # Handle multi-modal content
@@ -270,7 +347,28 @@ class AnthropicProvider(LLMProvider):
                 "content": new_content
             })
             
-        return system_prompt.strip(), api_messages
+        return system_prompt, api_messages
+
+    def _add_cache_breakpoints(self, system_blocks, api_tools, api_messages):
+        """
+        Mark prompt cache breakpoints (Anthropic allows up to 4):
+        the tool list, the static system prompt (first block, the volatile context
+        follows it) and the latest message, so each turn reuses the previous prefix.
+        """
+        cache = {"type": "ephemeral"}
+        if api_tools:
+            api_tools[-1]["cache_control"] = cache
+        if system_blocks:
+            system_blocks[0]["cache_control"] = cache
+        if api_messages:
+            last = api_messages[-1]
+            if isinstance(last["content"], str):
+                if not last["content"]:
+                    return
+                last["content"] = [{"type": "text", "text": last["content"]}]
+            if last["content"]:
+                # Copy the block: tool_result dicts may be shared with the caller
+                last["content"][-1] = dict(last["content"][-1], cache_control=cache)
 
     def _convert_tools(self, tools):
         """Convert OpenAI tool definitions to Anthropic format"""
@@ -0,0 +1,71 @@
+import re
+import markdown
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'nl2br', 'sane_lists']
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+# Lines that may continue the block before a blank line (lists, quotes, indented content)
+_CONTINUATION_RE = re.compile(r'^(\s|[-*+] |\d+[.)] |>)')
+
+_renderer = None
+
+def render_markdown(text):
+    """Render markdown to HTML, reusing one converter (building one loads all extensions)."""
+    global _renderer
+    if _renderer is None:
+        _renderer = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return _renderer.reset().convert(text)
+
+def find_frozen_boundary(text, start=0):
+    """
+    Offset in `text` (>= start) up to which the markdown blocks are complete:
+    the end of the last blank line that is outside a code fence and is not
+    followed by a line that could continue the previous block. `start` must
+    itself be such a boundary (or 0).
+    """
+    boundary = start
+    fence = None
+    pos = start
+    blank_before = False
+    while True:
+        end = text.find("\n", pos)
+        if end < 0:
+            break # The last line is still being written
+        line = text[pos:end]
+        match = _FENCE_RE.match(line)
+        if fence is None:
+            if blank_before and line.strip() and not _CONTINUATION_RE.match(line):
+                boundary = pos
+            if match:
+                fence = match.group(1)
+        elif match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence):
+            fence = None
+        blank_before = fence is None and not line.strip()
+        pos = end + 1
+    return boundary
+
+class MarkdownStream:
+    """
+    Incremental markdown-to-HTML for streamed text. Blocks that can no longer
+    change are rendered once and cached; each update only re-renders the open
+    trailing block. Call html() with the whole accumulated text.
+    """
+
+    def __init__(self, render=render_markdown):
+        self.render = render
+        self._frozen_text = ""
+        self._frozen_html = ""
+
+    def reset(self):
+        self._frozen_text = ""
+        self._frozen_html = ""
+
+    def html(self, text):
+        if not text.startswith(self._frozen_text):
+            self.reset() # Not a continuation of the previous text
+        start = len(self._frozen_text)
+        boundary = find_frozen_boundary(text, start)
+        if boundary > start:
+            self._frozen_html += self.render(text[start:boundary])
+            self._frozen_text = text[:boundary]
+        return self._frozen_html + self.render(text[boundary:])
@@ -0,0 +1,113 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PARALLEL_MIN_PAGES = 16 # Smaller extractions are not worth the inter-process round trip
+CHUNK_PAGES = 8
+
+# Page kinds reported next to the text
+TEXT, SCANNED, EMPTY = "text", "scanned", "empty"
+
+def _has_images(page):
+    resources = page.get("/Resources")
+    if resources is None:
+        return False
+    xobjects = resources.get_object().get("/XObject")
+    if xobjects is None:
+        return False
+    xobjects = xobjects.get_object()
+    return any(xobjects[name].get_object().get("/Subtype") == "/Image" for name in xobjects)
+
+def extract_pages(path, pages):
+    """
+    Text of the given 0-based pages of a PDF, as a list of (text, kind).
+    Pages without a text layer are "scanned" if they hold an image, else "empty".
+    Runs in pool worker processes, so it only takes picklable arguments.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    results = []
+    for index in pages:
+        page = reader.pages[index]
+        text = page.extract_text() or ""
+        if text.strip():
+            results.append((text, TEXT))
+        else:
+            try:
+                results.append(("", SCANNED if _has_images(page) else EMPTY))
+            except Exception:
+                results.append(("", EMPTY))
+    return results
+
+def page_count(path):
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+class PdfExtractor:
+    """
+    Extracts PDF pages, splitting large ranges across a process pool (text
+    extraction is CPU-bound and holds the GIL). iter_pages yields pages in
+    order as their chunk completes, so callers can stop early and the
+    remaining chunks are cancelled.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.shutdown)
+            return cls._instance
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # "spawn" everywhere: forking a process with Qt and worker threads is not safe
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def iter_pages(self, path, pages, parallel=None):
+        """Yield (page_index, text, kind) for the 0-based `pages`, in order."""
+        pages = list(pages)
+        if parallel is None:
+            parallel = len(pages) >= PARALLEL_MIN_PAGES and self.max_workers > 1
+        if not parallel:
+            for index, (text, kind) in zip(pages, extract_pages(path, pages)):
+                yield index, text, kind
+            return
+
+        chunks = [pages[i:i + CHUNK_PAGES] for i in range(0, len(pages), CHUNK_PAGES)]
+        futures = []
+        done = 0
+        try:
+            futures = [self._pool().submit(extract_pages, path, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                results = future.result()
+                for index, (text, kind) in zip(chunk, results):
+                    yield index, text, kind
+                done += len(chunk)
+        except BrokenProcessPool as e:
+            # A worker died (or processes cannot be started here): finish in this process
+            print(f"[PdfExtractor] Process pool failed, extracting serially: {e}")
+            self.shutdown()
+            for index, (text, kind) in zip(pages[done:], extract_pages(path, pages[done:])):
+                yield index, text, kind
+        finally:
+            for future in futures:
+                future.cancel() # Chunks not started when the caller stopped early
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,211 @@
+import os
+import math
+import codecs
+import hashlib
+import threading
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp"}
+TEXT_CHUNK_BYTES = 64 * 1024 # Read per preview request ("load more" reads the next chunk)
+BINARY_FILE = "binary file" # failed() message for files that are not UTF-8 text
+THUMBNAIL_STEP = 256 # Thumbnails are decoded to a bounding box rounded up to this, so resizes reuse them
+
+def read_text_head(path, offset=0, limit=TEXT_CHUNK_BYTES):
+    """
+    Decode up to `limit` bytes of UTF-8 text starting at byte `offset`.
+    Returns (text, next_offset); next_offset is None at the end of the file.
+    A multi-byte character cut by the limit is left for the next read.
+    Raises UnicodeDecodeError for binary files.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(limit + 1)
+    at_end = len(data) <= limit
+    data = data[:limit]
+    if b"\x00" in data:
+        raise UnicodeDecodeError("utf-8", data, data.index(b"\x00"), data.index(b"\x00") + 1, "binary file")
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = decoder.decode(data, final=at_end)
+    if at_end:
+        return text, None
+    pending = len(decoder.getstate()[0])
+    return text, offset + len(data) - pending
+
+def thumbnail_box(size):
+    """Bounding box a thumbnail for a view of `size` is decoded to."""
+    side = max(size.width(), size.height(), 1)
+    side = int(math.ceil(side / THUMBNAIL_STEP) * THUMBNAIL_STEP)
+    return QSize(side, side)
+
+class ThumbnailCache:
+    """
+    Decoded thumbnails keyed by (path, mtime, size, box): an in-memory LRU in
+    front of PNG files on disk. The disk cache is trimmed to `max_disk_mb`,
+    oldest files first. Safe to use from worker threads.
+    """
+
+    def __init__(self, cache_dir, max_items=64, max_disk_mb=200):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_mb * 1024 * 1024
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(path, box):
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size, box.width(), box.height())
+
+    def _file(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".png")
+
+    def get(self, key, memory_only=False):
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                return image
+        if memory_only:
+            return None
+        file = self._file(key)
+        if not os.path.exists(file):
+            return None
+        image = QImage(file)
+        if image.isNull():
+            return None
+        os.utime(file) # Recently used files are trimmed last
+        self._remember(key, image)
+        return image
+
+    def put(self, key, image):
+        self._remember(key, image)
+        try:
+            image.save(self._file(key), "PNG")
+            self._trim_disk()
+        except OSError as e:
+            print(f"[ThumbnailCache] Could not write thumbnail: {e}")
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".png"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+def load_thumbnail(path, box):
+    """Decode an image scaled to fit `box`. JPEG decoders scale while decoding."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid() and (source.width() > box.width() or source.height() > box.height()):
+        reader.setScaledSize(source.scaled(box, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(reader.errorString())
+    return image
+
+class _PreviewJob(QRunnable):
+    def __init__(self, service, job_id, work):
+        super().__init__()
+        self.service = service
+        self.job_id = job_id
+        self.work = work
+
+    def run(self):
+        if self.service.is_stale(self.job_id):
+            return
+        try:
+            self.work(self.job_id)
+        except Exception as e:
+            if not self.service.is_stale(self.job_id):
+                self.service.failed.emit(self.job_id, str(e))
+
+class PreviewService(QObject):
+    """
+    Loads file previews on a background thread pool. Only the latest request
+    is current: starting a new one (or cancel()) drops queued jobs and makes
+    the results of running ones be discarded.
+    """
+    text_ready = Signal(int, str, object) # job_id, text, next offset (None when complete)
+    image_ready = Signal(int, QImage)
+    failed = Signal(int, str)
+
+    def __init__(self, cache_dir, max_threads=2, parent=None):
+        super().__init__(parent)
+        self.cache = ThumbnailCache(cache_dir)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._current = 0
+        self._lock = threading.Lock()
+
+    def is_stale(self, job_id):
+        with self._lock:
+            return job_id != self._current
+
+    def cancel(self):
+        with self._lock:
+            self._current += 1
+        self.pool.clear() # Jobs that have not started yet
+
+    def _start(self, work):
+        self.cancel()
+        with self._lock:
+            job_id = self._current
+        self.pool.start(_PreviewJob(self, job_id, work))
+        return job_id
+
+    def request_text(self, path, offset=0):
+        def work(job_id):
+            try:
+                text, next_offset = read_text_head(path, offset)
+            except UnicodeDecodeError:
+                if not self.is_stale(job_id):
+                    self.failed.emit(job_id, BINARY_FILE)
+                return
+            if not self.is_stale(job_id):
+                self.text_ready.emit(job_id, text, next_offset)
+        return self._start(work)
+
+    def cached_image(self, path, size):
+        """Thumbnail from the memory cache, without touching the disk; None if not cached."""
+        try:
+            return self.cache.get(ThumbnailCache.key(path, thumbnail_box(size)), memory_only=True)
+        except OSError:
+            return None
+
+    def request_image(self, path, size):
+        box = thumbnail_box(size)
+
+        def work(job_id):
+            key = ThumbnailCache.key(path, box)
+            image = self.cache.get(key)
+            if image is None:
+                image = load_thumbnail(path, box)
+                self.cache.put(key, image)
+            if not self.is_stale(job_id):
+                self.image_ready.emit(job_id, image)
+        return self._start(work)
+
+    def shutdown(self):
+        self.cancel()
+        self.pool.waitForDone(1000)
@@ -0,0 +1,73 @@
+import sys
+import platform
+from datetime import date
+
+# Static policy text. Keep this byte-for-byte stable: it is the start of every
+# request, and providers only reuse their prompt cache for an identical prefix.
+POLICY_LINES = [
+    "注意: 你正在指定的工作区内操作。除非明确允许使用绝对路径，否则所有文件操作都应相对于此路径。",
+    "能力: 你可以使用 'create_new_skill' 创建新的技能/工具。",
+    "策略 [技能创建]:",
+    "1. 鼓励创建新技能来封装可复用的任务（例如：特定的文件处理、复杂计算、数据转换、系统操作等）。",
+    "2. 当你发现某个任务可能在未来被再次使用，或者通过代码实现比通过纯文本生成更可靠时，请果断创建技能。",
+    "3. 不要受到过度限制，灵活运用技能来增强你的能力。",
+    "",
+    "策略 [自我进化]:",
+    "1. 你拥有 'update_experience' 工具，用于记录重要的经验教训、配置偏好或特定的工具使用技巧。",
+    "2. 当你成功解决一个难题、发现某个工具的最佳实践或遇到并修复了错误时，请务必使用 'update_experience' 记录下来。",
+    "3. 这些经验将在未来类似场景中自动注入，帮助你变得更聪明。",
+    "",
+    "策略 [交互]: 如果你需要向用户提问或获取确认（例如：删除文件、澄清需求或下一步操作），你必须使用 'ask_user_confirmation' 工具。",
+    "不要在文本回复中直接提问。文本回复仅用于展示推理过程和最终答案。请使用工具来触发弹出对话框。",
+    "",
+    "策略 [思考规范]:",
+    "1. 你的思考过程 (Reasoning) 仅用于分析问题、规划步骤和反思结果。",
+    "2. 严禁将最终给用户的回复（如任务总结、文件列表、结果汇报）放在思考过程中。",
+    "3. 思考过程对用户是折叠的，用户主要阅读的是你的最终 Content 回复。"
+]
+
+# Tools POLICY_LINES tells the model to use: their skills are always offered
+POLICY_TOOLS = ["create_new_skill", "update_experience", "ask_user_confirmation"]
+
+def build_static_prompt(skill_prompts):
+    """Policy text followed by the skill guidelines (already in skill-name order)."""
+    lines = list(POLICY_LINES)
+    if skill_prompts:
+        lines.append("\n# Skill Capabilities & Guidelines")
+        lines.extend(skill_prompts)
+    return "\n".join(lines)
+
+def build_context_prompt(workspace_dir, parent_agent_id=None, today=None, other_skills=None):
+    """
+    Per-session context that may differ between requests.
+    The date is kept at day resolution so the message stays identical across turns.
+    `other_skills` lists installed skills whose tools were not loaded for this request.
+    """
+    today = today or date.today()
+    lines = [
+        "# Environment",
+        f"当前工作区: {workspace_dir}",
+        f"操作系统: {platform.system()} {platform.release()}",
+        f"Python 版本: {sys.version.split()[0]}",
+        f"当前日期: {today.strftime('%Y-%m-%d')}",
+    ]
+    if parent_agent_id:
+        lines.append(f"Note: You are a sub-agent (ID: {parent_agent_id}). Perform your assigned task efficiently.")
+    if other_skills:
+        lines.append("")
+        lines.append("# Other Installed Skills")
+        lines.append("These skills are installed but their tools are not loaded for this request. "
+                     "Call 'enable_skills' with their names if you need them.")
+        lines.extend(other_skills)
+    return "\n".join(lines)
+
+def build_system_messages(skill_prompts, workspace_dir, parent_agent_id=None, today=None, other_skills=None):
+    """
+    Return the system messages for a request: the static prompt first, then the
+    volatile context as a second, trailing system message. Providers merge or
+    split these so the static part stays a cacheable prefix.
+    """
+    return [
+        {"role": "system", "content": build_static_prompt(skill_prompts)},
+        {"role": "system", "content": build_context_prompt(workspace_dir, parent_agent_id, today, other_skills)},
+    ]
@@ -0,0 +1,91 @@
+import atexit
+import threading
+from .python_pool import PythonPool
+
+class SessionKernels:
+    """
+    Persistent Python interpreters, one per chat session, for run_python_code(persistent=True).
+    Variables survive between calls until the kernel is reset, exceeds its time or
+    memory limit, or the session tab is closed. Kernels start from a warm pool interpreter.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, pool, timeout=300, max_memory_mb=4096):
+        self.pool = pool
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self._kernels = {} # session_id -> interpreter
+        self._locks = {} # session_id -> lock serializing runs (sub-agents share the session)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, config_manager=None):
+        with cls._instance_lock:
+            if cls._instance is None:
+                get = config_manager.get if config_manager else (lambda key, default=None: default)
+                cls._instance = cls(
+                    PythonPool.instance(config_manager),
+                    timeout=get("python_kernel_timeout", 300),
+                    max_memory_mb=get("python_kernel_max_memory_mb", 4096)
+                )
+                atexit.register(cls._instance.shutdown_all)
+            return cls._instance
+
+    def _session_lock(self, session_id):
+        with self._lock:
+            return self._locks.setdefault(session_id, threading.Lock())
+
+    def has_kernel(self, session_id):
+        with self._lock:
+            kernel = self._kernels.get(session_id)
+        return kernel is not None and kernel.is_alive()
+
+    def run(self, session_id, code, cwd):
+        """
+        Run code in the session's kernel, starting one if needed.
+        Returns (status, stdout, stderr) like PythonPool.run; on "timeout", "memory"
+        or "crashed" the kernel is gone and the next call starts a fresh one.
+        """
+        out, err = [], []
+        with self._session_lock(session_id):
+            with self._lock:
+                kernel = self._kernels.get(session_id)
+            if kernel is None or not kernel.is_alive():
+                kernel = self.pool.acquire()
+                self.pool.detach(kernel)
+                with self._lock:
+                    self._kernels[session_id] = kernel
+
+            status = kernel.run(
+                code, cwd,
+                timeout=self.timeout,
+                on_output=lambda stream, line: (out if stream == "out" else err).append(line),
+                keep=True,
+                max_rss=self.max_memory_mb * 1024 * 1024
+            )
+            if not kernel.is_alive():
+                with self._lock:
+                    if self._kernels.get(session_id) is kernel:
+                        del self._kernels[session_id]
+        return status, "\n".join(out), "\n".join(err)
+
+    def reset(self, session_id):
+        """Discard the session's kernel and its variables. Returns False if there was none."""
+        with self._lock:
+            kernel = self._kernels.pop(session_id, None)
+        if kernel is None:
+            return False
+        kernel.kill()
+        return True
+
+    def shutdown(self, session_id):
+        self.reset(session_id)
+        with self._lock:
+            self._locks.pop(session_id, None)
+
+    def shutdown_all(self):
+        with self._lock:
+            kernels, self._kernels = list(self._kernels.values()), {}
+        for kernel in kernels:
+            kernel.kill()
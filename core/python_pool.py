@@ -0,0 +1,523 @@
+import os
+import sys
+import json
+import uuid
+import time
+import queue
+import atexit
+import threading
+import subprocess
+from .env_utils import get_python_executable
+
+INPUT_PREFIX = "__REQUEST_INPUT__:"
+
+# Bootstrap run by each pooled interpreter (passed with -c, so it also works
+# from a frozen build where core/ is not on disk). Protocol:
+#   stdin:  one JSON request per line {"id", "code", "cwd", "keep"}; lines read by input() while a snippet runs
+#   stdout: snippet output, "__REQUEST_INPUT__:<prompt>" lines, then the done marker
+#   stderr: snippet errors, then the done marker
+_WORKER_SOURCE = r'''
+import sys, os, json, linecache, tempfile, traceback
+_stdin, _stdout, _stderr = sys.stdin, sys.stdout, sys.stderr
+_DONE = "__POOL_DONE_%s__" % sys.argv[2]
+
+def _rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+            class Counters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (n, ctypes.c_size_t) for n in ("PeakWorkingSetSize", "WorkingSetSize",
+                    "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+            c = Counters()
+            c.cb = ctypes.sizeof(c)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(c), c.cb)
+            return c.WorkingSetSize
+        except Exception:
+            return 0
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+def input(prompt=""):
+    print("__REQUEST_INPUT__:%s" % prompt, file=_stdout, flush=True)
+    return _stdin.readline().strip()
+
+def _reset_modules():
+    # Undo the common ways a snippet changes process-wide state, so the next
+    # snippet (possibly from another session) starts from the same defaults.
+    # Attributes a snippet patched on a module are not restored.
+    import warnings
+    warnings.filters[:] = _warning_filters
+    sys.modules.update(_preloaded)
+    if "pandas" in sys.modules:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                sys.modules["pandas"].reset_option("all")
+        except Exception:
+            pass
+    if "numpy" in sys.modules:
+        try:
+            sys.modules["numpy"].seterr(**_numpy_err)
+        except Exception:
+            pass
+    if "matplotlib.pyplot" in sys.modules:
+        try:
+            sys.modules["matplotlib.pyplot"].close("all")
+            sys.modules["matplotlib"].rcdefaults()
+        except Exception:
+            pass
+
+for _name in json.loads(sys.argv[1]):
+    try:
+        __import__(_name)
+    except Exception:
+        pass
+import warnings
+_warning_filters = list(warnings.filters)
+_preloaded = dict(sys.modules)
+_numpy_err = sys.modules["numpy"].geterr() if "numpy" in sys.modules else {}
+print("__POOL_READY__:%d" % _rss(), file=_stdout, flush=True)
+
+_home = os.getcwd()
+_path = list(sys.path)
+_environ = dict(os.environ)
+_kernel = None # Namespace kept between "keep" requests (session kernels)
+while True:
+    _line = _stdin.readline()
+    if not _line:
+        break
+    try:
+        _request = json.loads(_line)
+    except ValueError:
+        continue
+    _status = "ok"
+    _keep = _request.get("keep", False)
+    if _keep:
+        if _kernel is None:
+            _kernel = {"__name__": "__main__", "input": input}
+        _namespace = _kernel
+    else:
+        _namespace = {"__name__": "__main__", "input": input}
+    _code = _request["code"]
+    _file = None
+    try:
+        # Run from a real file, as a script would be: tracebacks show the source lines,
+        # and __file__ and sys.argv are the snippet's own
+        _fd, _file = tempfile.mkstemp(suffix=".py")
+        with os.fdopen(_fd, "w", encoding="utf-8") as _f:
+            _f.write(_code)
+        # Functions kept in a kernel still show their source after the file is removed
+        linecache.cache[_file] = (len(_code), None, _code.splitlines(True), _file)
+        _namespace["__file__"] = _file
+        sys.argv = [_file]
+        os.chdir(_request.get("cwd") or _home)
+        exec(compile(_code, _file, "exec"), _namespace)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            _status = "error"
+            if not isinstance(e.code, int):
+                print(e.code, file=_stderr)
+    except BaseException as e:
+        _status = "error"
+        # Skip the frame of this loop, so the traceback starts in the snippet
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next, file=_stderr)
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = _stdin, _stdout, _stderr
+        os.chdir(_home)
+        if _file:
+            try:
+                os.remove(_file)
+            except OSError:
+                pass
+        if not _keep:
+            linecache.cache.pop(_file, None)
+            sys.path[:] = _path
+            os.environ.clear()
+            os.environ.update(_environ)
+            _namespace.clear()
+            _reset_modules()
+    _marker = "%s:%s:%s:%d" % (_DONE, _request.get("id"), _status, _rss())
+    # The marker may follow output that did not end with a newline
+    for _stream in (_stderr, _stdout):
+        _stream.write(_marker + "\n")
+        _stream.flush()
+'''
+
+def subprocess_env(python_exe):
+    """Environment for Python subprocesses: UTF-8 I/O, and the bundled interpreter's DLLs in frozen mode."""
+    env = os.environ.copy()
+    env["PYTHONIOENCODING"] = "utf-8"
+    if getattr(sys, 'frozen', False):
+        python_dir = os.path.dirname(python_exe)
+        env["PATH"] = python_dir + os.pathsep + env.get("PATH", "")
+    return env
+
+def process_rss(pid):
+    """Resident memory of a process in bytes, or None where it cannot be read without psutil."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class PooledInterpreter:
+    """One pre-spawned Python process that runs snippets sent over its stdin."""
+
+    def __init__(self, python_exe, preload=()):
+        self.nonce = uuid.uuid4().hex
+        self.done_prefix = f"__POOL_DONE_{self.nonce}__:"
+        self.process = subprocess.Popen(
+            [python_exe, "-u", "-c", _WORKER_SOURCE, json.dumps(list(preload)), self.nonce],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+            env=subprocess_env(python_exe)
+        )
+        self.lines = queue.Queue()
+        for name, stream in (("out", self.process.stdout), ("err", self.process.stderr)):
+            threading.Thread(target=self._read, args=(name, stream), daemon=True).start()
+        self.ready = False
+        self.killed = False
+        self.runs = 0
+        self.baseline_rss = 0
+        self.rss = 0
+        self._request_id = 0
+
+    def _read(self, name, stream):
+        try:
+            for line in stream:
+                self.lines.put((name, line))
+        except (OSError, ValueError):
+            pass
+        self.lines.put((name, None))
+
+    def is_alive(self):
+        return not self.killed and self.process.poll() is None
+
+    def wait_ready(self, timeout=120):
+        """Block until preloading finished. Output printed while importing is discarded."""
+        while not self.ready:
+            try:
+                name, line = self.lines.get(timeout=timeout)
+            except queue.Empty:
+                return False
+            if line is None:
+                return False
+            if name == "out" and line.startswith("__POOL_READY__:"):
+                self.baseline_rss = self.rss = int(line.strip().split(":", 1)[1])
+                self.ready = True
+        return True
+
+    def send_input(self, text):
+        """Answer an input() call of the running snippet."""
+        try:
+            self.process.stdin.write(text + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            print(f"Error writing to stdin: {e}")
+
+    def run(self, code, cwd, timeout=None, on_output=None, on_input=None, is_stopped=None,
+            keep=False, max_rss=None, on_idle=None):
+        """
+        Run one snippet with `cwd` as working directory, in a fresh namespace or,
+        with `keep`, in the namespace kept from earlier `keep` runs.
+        Output lines go to on_output(stream, line), stream being "out" or "err".
+        input() calls go to on_input(prompt), which must later answer with send_input;
+        without on_input they read an empty line. on_idle() is called whenever
+        no output arrived for a poll interval (50ms).
+        Returns "ok", "error", "timeout", "memory" (RSS above `max_rss` bytes),
+        "stopped" or "crashed". The process is killed on anything but "ok"/"error"
+        and must not be reused.
+        """
+        self._request_id += 1
+        request = {"id": self._request_id, "code": code, "cwd": cwd, "keep": keep}
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            self.kill()
+            return "crashed"
+
+        self.runs += 1
+        deadline = time.monotonic() + timeout if timeout else None
+        done = set()
+        status = "ok"
+        next_memory_check = 0
+        while len(done) < 2:
+            if is_stopped and is_stopped():
+                self.kill()
+                return "stopped"
+            now = time.monotonic()
+            if deadline and now > deadline:
+                self.kill()
+                return "timeout"
+            if max_rss and now >= next_memory_check:
+                next_memory_check = now + 0.5
+                rss = process_rss(self.process.pid)
+                if rss is not None and rss > max_rss:
+                    self.kill()
+                    return "memory"
+            try:
+                name, line = self.lines.get(timeout=0.05)
+            except queue.Empty:
+                if on_idle:
+                    on_idle()
+                continue
+            if line is None:
+                self.kill()
+                return "crashed"
+            line = line.rstrip("\n")
+            marker = line.find(self.done_prefix)
+            if marker >= 0:
+                if marker > 0 and on_output:
+                    on_output(name, line[:marker])
+                _, status, rss = line[marker + len(self.done_prefix):].rsplit(":", 2)
+                if name == "out":
+                    self.rss = int(rss)
+                done.add(name)
+                continue
+            if name == "out" and line.startswith(INPUT_PREFIX):
+                if on_input:
+                    on_input(line[len(INPUT_PREFIX):])
+                else:
+                    self.send_input("")
+                continue
+            if on_output:
+                on_output(name, line)
+        if max_rss and self.rss > max_rss:
+            # Also catches growth where the RSS cannot be polled during the run
+            self.kill()
+            return "memory"
+        return status
+
+    def kill(self):
+        self.killed = True
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+        for stream in (self.process.stdin, self.process.stdout, self.process.stderr):
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
+
+class PythonPool:
+    """
+    Pool of warm Python interpreters for run_python_code and CodeWorker.
+    Each interpreter imports the configured modules once (pandas, openpyxl, ...)
+    and is recycled after `max_runs` snippets or when its memory grew by more
+    than `max_memory_mb` since it became ready. Interpreters are shared by all
+    sessions; between snippets the namespace, cwd, sys.path, os.environ,
+    sys.modules entries of preloaded modules, warning filters and pandas/numpy/
+    matplotlib settings are reset, but attributes patched on modules are not.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, size=2, preload=(), max_runs=50, max_memory_mb=512, python_exe=None):
+        self.size = size
+        self.preload = list(preload)
+        self.max_runs = max_runs
+        self.max_memory_mb = max_memory_mb
+        self.python_exe = python_exe or get_python_executable()
+        self._idle = []
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def instance(cls, config_manager=None):
+        with cls._instance_lock:
+            if cls._instance is None:
+                get = config_manager.get if config_manager else (lambda key, default=None: default)
+                enabled = get("python_pool_enabled", True)
+                cls._instance = cls(
+                    size=get("python_pool_size", 2) if enabled else 0,
+                    preload=get("python_pool_preload", ["pandas", "openpyxl"]) if enabled else [],
+                    max_runs=get("python_pool_max_runs", 50),
+                    max_memory_mb=get("python_pool_max_memory_mb", 512)
+                )
+                atexit.register(cls._instance.shutdown)
+            return cls._instance
+
+    def warm(self):
+        """Start interpreters in the background until `size` are idle or in use."""
+        with self._lock:
+            if self._closed:
+                return
+            while len(self._idle) + self._busy < self.size:
+                self._idle.append(self._spawn())
+
+    def _spawn(self):
+        return PooledInterpreter(self.python_exe, self.preload)
+
+    def acquire(self, timeout=120):
+        """Take a ready interpreter, spawning one if none is idle. Raises RuntimeError if it fails to start."""
+        while True:
+            dead = []
+            with self._lock:
+                worker = None
+                while self._idle:
+                    candidate = self._idle.pop(0)
+                    if candidate.is_alive():
+                        worker = candidate
+                        break
+                    dead.append(candidate) # Died while parked: it would only report "crashed"
+                self._busy += 1
+            for candidate in dead:
+                candidate.kill()
+            spawned = worker is None
+            if spawned:
+                try:
+                    worker = self._spawn()
+                except Exception:
+                    with self._lock:
+                        self._busy -= 1
+                    raise
+            if worker.wait_ready(timeout):
+                # Keep spares warm for runs from other sessions
+                threading.Thread(target=self.warm, daemon=True).start()
+                return worker
+            worker.kill()
+            with self._lock:
+                self._busy -= 1
+            if spawned:
+                raise RuntimeError(f"Python interpreter failed to start ({self.python_exe}).")
+
+    def release(self, worker):
+        """Return an interpreter after a run; it is recycled if dead, worn out or grown too large."""
+        growth_mb = (worker.rss - worker.baseline_rss) / (1024 * 1024)
+        reusable = (worker.is_alive() and worker.runs < self.max_runs and growth_mb <= self.max_memory_mb)
+        with self._lock:
+            self._busy -= 1
+            if reusable and not self._closed and len(self._idle) + self._busy < self.size:
+                self._idle.append(worker)
+                return
+        worker.kill()
+        self.warm()
+
+    def detach(self, worker):
+        """Take an acquired interpreter out of the pool for good (e.g. as a session kernel)."""
+        with self._lock:
+            self._busy -= 1
+        self.warm()
+
+    def run(self, code, cwd, timeout=30, on_output=None):
+        """Run a snippet on a pooled interpreter. Returns (status, stdout, stderr)."""
+        out, err = [], []
+        def collect(stream, line):
+            (out if stream == "out" else err).append(line)
+            if on_output:
+                on_output(stream, line)
+        worker = self.acquire()
+        try:
+            status = worker.run(code, cwd, timeout=timeout, on_output=collect)
+        finally:
+            self.release(worker)
+        return status, "\n".join(out), "\n".join(err)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+class OutputBatcher:
+    """
+    Groups output lines into chunks for the GUI: a chunk is emitted once it is
+    `chunk_chars` long or `interval` seconds old, instead of one signal per line.
+    stdout is emitted as it arrives; stderr is kept for `stderr_text()`.
+    After `max_chars` in total, further output goes to `spill_path` instead.
+    """
+
+    def __init__(self, emit, max_chars=200000, spill_path=None, interval=0.05, chunk_chars=8192):
+        self.emit = emit
+        self.max_chars = max_chars
+        self.spill_path = spill_path
+        self.interval = interval
+        self.chunk_chars = chunk_chars
+        self.retained = 0
+        self.spilled = 0
+        self.stderr = []
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_since = None
+        self._spill_file = None
+
+    def add(self, stream, line):
+        size = len(line) + 1
+        if self.max_chars and self.retained + size > self.max_chars:
+            self._spill(stream, line)
+            return
+        self.retained += size
+        if stream == "err":
+            self.stderr.append(line)
+            return
+        self._pending.append(line)
+        self._pending_chars += size
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        if self._pending_chars >= self.chunk_chars:
+            self.flush()
+        else:
+            self.tick()
+
+    def tick(self):
+        """Emit pending output that has waited for `interval`."""
+        if self._pending_since is not None and time.monotonic() - self._pending_since >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            chunk = "\n".join(self._pending)
+            self._pending = []
+            self._pending_chars = 0
+            self._pending_since = None
+            self.emit(chunk)
+
+    def stderr_text(self):
+        return "\n".join(self.stderr)
+
+    def _spill(self, stream, line):
+        self.spilled += 1
+        if self.spilled == 1:
+            self.flush()
+            try:
+                if not self.spill_path:
+                    raise OSError("no log file")
+                self._spill_file = open(self.spill_path, "w", encoding="utf-8", errors="replace")
+                self.emit(f"⚠️ Output exceeded {self.max_chars} characters; the rest is written to {self.spill_path}")
+            except OSError as e:
+                self.emit(f"⚠️ Output exceeded {self.max_chars} characters; the rest is discarded ({e}).")
+        if self._spill_file is not None:
+            self._spill_file.write(("[stderr] " if stream == "err" else "") + line + "\n")
+
+    def close(self):
+        self.flush()
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
@@ -3,10 +3,104 @@ import re
 import importlib.util
 import inspect
 import sys
+import time
 import shutil
+import threading
 from .env_utils import get_app_data_dir, ensure_package_installed
+from .skill_manifest import SkillManifest
+from .tool_adapter import ToolAdapter, INJECTED_PARAMS, inspect_injection
+
+def parallel_safe_from_meta(meta, tool_name):
+    """
+    Check the `parallel-safe` frontmatter of a skill for one of its tools.
+    Accepts `true` (every tool in the skill) or a list of tool names.
+    """
+    flag = (meta or {}).get("parallel-safe")
+    if isinstance(flag, list):
+        return tool_name in flag
+    return str(flag).lower() == "true"
+
+def load_skill_module(skill_name, impl_path):
+    """
+    Import a skill's impl.py. A missing top-level dependency is installed
+    with pip once, then the import is retried.
+    """
+    spec = importlib.util.spec_from_file_location(f"skills.{skill_name}", impl_path)
+    module = importlib.util.module_from_spec(spec)
+    
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        # Hot-reload logic for missing dependencies (Top-level imports)
+        print(f"[SkillManager] Skill '{skill_name}' missing dependency: {e}")
+        
+        # Try to extract package name. e.name is reliable for ModuleNotFoundError
+        missing_pkg = getattr(e, 'name', None)
+        if not missing_pkg and "No module named" in str(e):
+            # Fallback parsing
+            match = re.search(r"No module named '([^']+)'", str(e))
+            if match:
+                missing_pkg = match.group(1)
+        
+        if missing_pkg:
+            print(f"[SkillManager] Auto-installing missing dependency: {missing_pkg}...")
+            try:
+                # Attempt to install and hot-reload
+                ensure_package_installed(missing_pkg)
+                
+                # Retry loading the module
+                print(f"[SkillManager] Retrying load of '{skill_name}' after installation...")
+                spec.loader.exec_module(module)
+                print(f"[SkillManager] Successfully loaded '{skill_name}' after auto-install.")
+                
+            except Exception as install_err:
+                print(f"[SkillManager] Failed to auto-install dependency {missing_pkg}: {install_err}")
+                # If install fails, we re-raise the original error or the install error
+                raise e
+        else:
+            raise e
+    return module
+
+class LazySkillModule:
+    """A skill's impl.py, imported on first use and shared by all its tools."""
+
+    def __init__(self, skill_name, impl_path, module=None):
+        self.skill_name = skill_name
+        self.impl_path = impl_path
+        self.module = module
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.module is None:
+            with self._lock:
+                if self.module is None:
+                    print(f"[SkillManager] Importing '{self.skill_name}' on first use...")
+                    self.module = load_skill_module(self.skill_name, self.impl_path)
+        return self.module
+
+class LazyTool:
+    """Callable stand-in for a tool function until its module is imported."""
+
+    def __init__(self, lazy_module, name, func=None):
+        self.lazy_module = lazy_module
+        self.name = name
+        self._func = func
+
+    def resolve(self):
+        if self._func is None:
+            func = getattr(self.lazy_module.get(), self.name, None)
+            if not callable(func):
+                raise AttributeError(f"Tool '{self.name}' no longer exists in {self.lazy_module.impl_path}")
+            self._func = func
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
 
 class SkillManager:
+    # Shared by all instances: loading executes impl.py modules, keep it serialized
+    _load_lock = threading.RLock()
+
     def __init__(self, workspace_dir=None, config_manager=None):
         self.workspace_dir = workspace_dir
         self.config_manager = config_manager
@@ -47,7 +141,7 @@ class SkillManager:
             # This allows dev mode to see skills created while running the EXE
             dist_dir = os.path.join(repo_root, "dist")
             if os.path.exists(dist_dir):
-                for item in os.listdir(dist_dir):
+                for item in sorted(os.listdir(dist_dir)):
                     # Standard skills
                     candidate_path = os.path.join(dist_dir, item, "skills")
                     if os.path.isdir(candidate_path):
@@ -58,11 +152,16 @@ class SkillManager:
                         self.skills_dirs.append(candidate_path_ai)
 
         self.tools = {} # name -> function
+        self.tool_adapters = {} # name -> ToolAdapter (validated call path)
         self.tool_definitions = [] # JSON schemas for LLM
         self.skill_prompts = [] # Markdown content from SKILL.md
+        self.skill_prompt_map = {} # skill_name -> prompt content
         self.tool_to_skill_map = {} # tool_name -> skill_name
         self.loaded_skills_meta = {} # skill_name -> metadata dict
         self.last_load_time = 0
+        self.generation = 0 # Bumped whenever the loaded skill set changes
+        self._skill_entries = {} # skill_path -> per-skill prompt/meta/tools
+        self._skill_signatures = {} # skill_path -> file stat signature at load time
         
         self.load_skills()
 
@@ -97,7 +196,7 @@ class SkillManager:
         if not os.path.exists(dist_dir):
             return
 
-        for item in os.listdir(dist_dir):
+        for item in sorted(os.listdir(dist_dir)):
             # Standard skills
             candidate_path = os.path.join(dist_dir, item, "skills")
             if os.path.isdir(candidate_path) and candidate_path not in self.skills_dirs:
@@ -311,54 +410,24 @@ class SkillManager:
 
     def check_for_updates(self):
         """
-        Check if any skill files (SKILL.md or impl.py) have been modified since last load.
-        Returns True if updates are detected.
+        Check if any skill files (SKILL.md or impl.py) have been added, removed
+        or modified since the last load. Returns True if updates are detected.
         """
         try:
-            for skills_dir in self.skills_dirs:
-                if not os.path.exists(skills_dir):
-                    continue
-                    
-                for skill_name in os.listdir(skills_dir):
-                    if skill_name.startswith('.'):
-                        continue
-                        
-                    skill_path = os.path.join(skills_dir, skill_name)
-                    if not os.path.isdir(skill_path):
-                        continue
-                        
-                    # Check SKILL.md
-                    md_path = os.path.join(skill_path, "SKILL.md")
-                    if os.path.exists(md_path):
-                        if os.path.getmtime(md_path) > self.last_load_time:
-                            return True
-                            
-                    # Check impl.py
-                    impl_path = os.path.join(skill_path, "impl.py")
-                    if os.path.exists(impl_path):
-                        if os.path.getmtime(impl_path) > self.last_load_time:
-                            return True
+            return bool(self._changed_skill_paths(self._scan_skill_paths()))
         except Exception as e:
             print(f"Error checking for updates: {e}")
         return False
 
-    def load_skills(self):
-        """Scan skills directory and load SKILL.md + implementations for enabled skills"""
-        self.tools = {}
-        self.tool_definitions = []
-        self.skill_prompts = []
-        self.tool_to_skill_map = {}
-        self.loaded_skills_meta = {}
-        
-        # Update timestamp before loading
-        import time
-        self.last_load_time = time.time()
-        
+    def _scan_skill_paths(self):
+        """Enabled skill directories as (skill_name, skill_path), in load order."""
+        found = []
         for skills_dir in self.skills_dirs:
             if not os.path.exists(skills_dir):
                 continue
 
-            for skill_name in os.listdir(skills_dir):
+            # Sorted so prompts and tool schemas come out in the same order on every load
+            for skill_name in sorted(os.listdir(skills_dir)):
                 if skill_name == "__pycache__" or skill_name.startswith('.'):
                     continue
 
@@ -367,18 +436,129 @@ class SkillManager:
                     continue
     
                 skill_path = os.path.join(skills_dir, skill_name)
-                if not os.path.isdir(skill_path):
-                    continue
-                
-                # 1. Parse SKILL.md
-                md_path = os.path.join(skill_path, "SKILL.md")
-                if os.path.exists(md_path):
-                    self._parse_skill_md(md_path, skill_name)
-                
-                # 2. Load Implementation (impl.py)
-                impl_path = os.path.join(skill_path, "impl.py")
-                if os.path.exists(impl_path):
-                    self._load_implementation(skill_name, impl_path)
+                if os.path.isdir(skill_path):
+                    found.append((skill_name, skill_path))
+        return found
+
+    def loaded_skill_paths(self):
+        """Directories of the currently loaded skills."""
+        with self._load_lock:
+            return list(getattr(self, "_skill_signatures", {}))
+
+    def _skill_signature(self, skill_path):
+        sig = []
+        for filename in ("SKILL.md", "impl.py"):
+            try:
+                st = os.stat(os.path.join(skill_path, filename))
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _changed_skill_paths(self, scanned):
+        """Paths of skills that are new, modified or no longer present/enabled."""
+        current = {path for _, path in scanned}
+        changed = {path for path in self._skill_signatures if path not in current}
+        for _, path in scanned:
+            if self._skill_signatures.get(path) != self._skill_signature(path):
+                changed.add(path)
+        return changed
+
+    def load_skills(self):
+        """Scan skills directory and load SKILL.md + implementations for enabled skills"""
+        with self._load_lock:
+            self._skill_entries = {}
+            self._skill_signatures = {}
+            self._scanned = scanned = self._scan_skill_paths()
+            for skill_name, skill_path in scanned:
+                self._load_skill(skill_name, skill_path)
+            self._rebuild_index(scanned)
+            SkillManifest.instance().save()
+
+    def reload_changed_skills(self, candidates=None):
+        """
+        Reload only the skills whose files changed since they were loaded, and
+        drop skills that were removed or disabled. Returns the changed skill names.
+
+        `candidates` limits the check to the given skill paths (and skills dirs,
+        which are re-listed for added/removed skills). None checks everything.
+        """
+        with self._load_lock:
+            if not hasattr(self, "_skill_signatures"):
+                self.load_skills()
+                return [name for name, _ in self._scanned]
+
+            if candidates is None:
+                scanned = self._scan_skill_paths()
+                changed = self._changed_skill_paths(scanned)
+            else:
+                if any(path in self.skills_dirs for path in candidates):
+                    scanned = self._scan_skill_paths()
+                else:
+                    scanned = self._scanned
+                current = {path for _, path in scanned}
+                changed = {path for path in self._skill_signatures if path not in current}
+                changed |= {path for path in current if path not in self._skill_signatures}
+                for path in candidates:
+                    if path in current and self._skill_signatures.get(path) != self._skill_signature(path):
+                        changed.add(path)
+            self._scanned = scanned
+            if not changed:
+                return []
+
+            for path in changed:
+                self._skill_entries.pop(path, None)
+                self._skill_signatures.pop(path, None)
+            for skill_name, skill_path in scanned:
+                if skill_path in changed:
+                    self._load_skill(skill_name, skill_path)
+            self._rebuild_index(scanned)
+            SkillManifest.instance().save()
+            return sorted(os.path.basename(path) for path in changed)
+
+    def _load_skill(self, skill_name, skill_path):
+        # Take the signature before reading, so an edit made during the load is seen next time
+        self._skill_signatures[skill_path] = self._skill_signature(skill_path)
+        entry = {"name": skill_name, "meta": {}, "prompt": "", "tools": {}, "adapters": {}, "definitions": []}
+        
+        # 1. Parse SKILL.md
+        md_path = os.path.join(skill_path, "SKILL.md")
+        if os.path.exists(md_path):
+            entry["meta"], entry["prompt"] = self._parse_skill_md(md_path, skill_name)
+        
+        # 2. Load Implementation (impl.py)
+        impl_path = os.path.join(skill_path, "impl.py")
+        if os.path.exists(impl_path):
+            entry["tools"], entry["adapters"], entry["definitions"] = self._load_implementation(skill_name, impl_path)
+        self._skill_entries[skill_path] = entry
+
+    def _rebuild_index(self, scanned):
+        """Rebuild the flat tool / prompt views from the per-skill entries, in scan order."""
+        self.tools = {}
+        self.tool_adapters = {}
+        self.tool_definitions = []
+        self.skill_prompts = []
+        self.skill_prompt_map = {}
+        self.tool_to_skill_map = {}
+        self.loaded_skills_meta = {}
+
+        for skill_name, skill_path in scanned:
+            entry = self._skill_entries.get(skill_path)
+            if not entry:
+                continue
+            if entry["meta"]:
+                self.loaded_skills_meta[skill_name] = entry["meta"]
+            if entry["prompt"]:
+                self.skill_prompts.append(entry["prompt"])
+                self.skill_prompt_map[skill_name] = entry["prompt"]
+            for name, func in entry["tools"].items():
+                self.tools[name] = func
+                self.tool_adapters[name] = entry["adapters"][name]
+                self.tool_to_skill_map[name] = skill_name
+            self.tool_definitions.extend(entry["definitions"])
+
+        self.last_load_time = time.time()
+        self.generation = getattr(self, "generation", 0) + 1
 
     def _parse_skill_md_content(self, md_path):
         """Helper to parse MD file and return meta dict and body string"""
@@ -418,11 +598,9 @@ class SkillManager:
             return {}, ""
 
     def _parse_skill_md(self, md_path, skill_name):
-        """Extract frontmatter and body"""
+        """Extract frontmatter and body. Returns (meta, prompt_content)."""
         try:
             meta, body = self._parse_skill_md_content(md_path)
-            if meta:
-                self.loaded_skills_meta[skill_name] = meta
             
             # Inject Experience into Prompt if available
             prompt_content = body
@@ -434,53 +612,35 @@ class SkillManager:
                         exp_text += f"- {exp}\n"
                     prompt_content += exp_text
             
-            if prompt_content:
-                self.skill_prompts.append(prompt_content)
+            return meta, prompt_content
         except Exception as e:
             print(f"Error parsing {md_path}: {e}")
+            return {}, ""
 
     def _load_implementation(self, skill_name, impl_path):
-        """Dynamic import of python module"""
+        """
+        Tools of an impl.py as (tools, adapters, tool_definitions).
+        Definitions come from the manifest cache when the file is unchanged; the
+        module itself is then only imported when one of its tools is first called.
+        """
+        manifest = SkillManifest.instance()
+        tools = {}
+        adapters = {}
+        tool_definitions = []
         try:
-            spec = importlib.util.spec_from_file_location(f"skills.{skill_name}", impl_path)
-            module = importlib.util.module_from_spec(spec)
-            
-            try:
-                spec.loader.exec_module(module)
-            except ImportError as e:
-                # Hot-reload logic for missing dependencies (Top-level imports)
-                print(f"[SkillManager] Skill '{skill_name}' missing dependency: {e}")
-                
-                # Try to extract package name. e.name is reliable for ModuleNotFoundError
-                missing_pkg = getattr(e, 'name', None)
-                if not missing_pkg and "No module named" in str(e):
-                    # Fallback parsing
-                    import re
-                    match = re.search(r"No module named '([^']+)'", str(e))
-                    if match:
-                        missing_pkg = match.group(1)
-                
-                if missing_pkg:
-                    print(f"[SkillManager] Auto-installing missing dependency: {missing_pkg}...")
-                    try:
-                        # Attempt to install and hot-reload
-                        ensure_package_installed(missing_pkg)
-                        
-                        # Retry loading the module
-                        print(f"[SkillManager] Retrying load of '{skill_name}' after installation...")
-                        # We need to reload the spec/module to be safe? 
-                        # Actually exec_module can be called again on the same module object, 
-                        # but it's cleaner to re-create if possible. 
-                        # Let's try exec_module again.
-                        spec.loader.exec_module(module)
-                        print(f"[SkillManager] Successfully loaded '{skill_name}' after auto-install.")
-                        
-                    except Exception as install_err:
-                        print(f"[SkillManager] Failed to auto-install dependency {missing_pkg}: {install_err}")
-                        # If install fails, we re-raise the original error or the install error
-                        raise e
-                else:
-                    raise e
+            cached = manifest.get(impl_path)
+            if cached is not None:
+                lazy_module = LazySkillModule(skill_name, impl_path)
+                for item in cached:
+                    name = item["name"]
+                    tools[name] = LazyTool(lazy_module, name)
+                    adapters[name] = ToolAdapter(name, tools[name], item["definition"],
+                                                 item["injects"], item["accepts_kwargs"])
+                    tool_definitions.append(item["definition"])
+                return tools, adapters, tool_definitions
+
+            module = load_skill_module(skill_name, impl_path)
+            lazy_module = LazySkillModule(skill_name, impl_path, module)
             
             # Inspect functions to generate Tool Definitions
             for name, func in inspect.getmembers(module, inspect.isfunction):
@@ -488,74 +648,93 @@ class SkillManager:
                 
                 # Register tool
                 # Note: We bind workspace_dir later during execution or partial
-                self.tools[name] = func
-                self.tool_to_skill_map[name] = skill_name
-                
-                # Generate JSON Schema dynamically
-                sig = inspect.signature(func)
-                properties = {}
-                required = []
-                
-                for param_name, param in sig.parameters.items():
-                    # Skip injected parameters
-                    if param_name in ['workspace_dir', '_context']:
-                        continue
-                        
-                    # Infer type (simple mapping)
-                    param_type = "string" # default
-                    description = "Parameter"
-                    
-                    # Check default value for type inference
-                    if param.default != inspect.Parameter.empty:
-                        if isinstance(param.default, bool):
-                            param_type = "boolean"
-                        elif isinstance(param.default, int):
-                            param_type = "integer"
-                        elif isinstance(param.default, list):
-                            param_type = "array"
-                    
-                    # Heuristic type inference (override if name matches known patterns)
-                    if param_name == 'tasks':
-                        param_type = "array"
-                        description = "List of tasks"
-                    elif param_name in ['limit', 'offset']:
-                        param_type = "integer"
-                    elif param_name == 'recursive':
-                        param_type = "boolean"
-                    
-                    prop_def = {
-                        "type": param_type,
-                        "description": description
-                    }
-                    
-                    if param_type == "array":
-                        prop_def["items"] = {"type": "string"}
-                        
-                    properties[param_name] = prop_def
-                    
-                    if param.default == inspect.Parameter.empty:
-                        required.append(param_name)
-
-                tool_def = {
-                    "type": "function",
-                    "function": {
-                        "name": name,
-                        "description": func.__doc__.strip().split('\n')[0] if func.__doc__ else f"Tool {name}",
-                        "parameters": {
-                            "type": "object",
-                            "properties": properties,
-                            "required": required
-                        }
-                    }
-                }
-                self.tool_definitions.append(tool_def)
-                
+                tools[name] = LazyTool(lazy_module, name, func)
+                definition = self._build_tool_definition(name, func)
+                tool_definitions.append(definition)
+                adapters[name] = ToolAdapter(name, tools[name], definition, *inspect_injection(func))
+
+            manifest.put(impl_path, [
+                {
+                    "name": name,
+                    "definition": definition,
+                    "injects": sorted(adapters[name].injects),
+                    "accepts_kwargs": adapters[name].accepts_kwargs
+                } for name, definition in zip(tools, tool_definitions)
+            ])
         except Exception as e:
             print(f"Error loading implementation {impl_path}: {e}")
+        return tools, adapters, tool_definitions
+
+    def _build_tool_definition(self, name, func):
+        """Generate the JSON Schema of a tool function from its signature"""
+        sig = inspect.signature(func)
+        properties = {}
+        required = []
+
+        for param_name, param in sig.parameters.items():
+            # Skip injected parameters and *args / **kwargs
+            if param_name in INJECTED_PARAMS or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+
+            # Infer type (simple mapping)
+            param_type = "string" # default
+            description = "Parameter"
+
+            # Check default value for type inference
+            if param.default != inspect.Parameter.empty:
+                if isinstance(param.default, bool):
+                    param_type = "boolean"
+                elif isinstance(param.default, int):
+                    param_type = "integer"
+                elif isinstance(param.default, list):
+                    param_type = "array"
+
+            # Heuristic type inference (override if name matches known patterns)
+            if param_name == 'tasks':
+                param_type = "array"
+                description = "List of tasks"
+            elif param_name in ['limit', 'offset']:
+                param_type = "integer"
+            elif param_name == 'recursive':
+                param_type = "boolean"
+
+            prop_def = {
+                "type": param_type,
+                "description": description
+            }
+
+            if param_type == "array":
+                prop_def["items"] = {"type": "string"}
+
+            properties[param_name] = prop_def
+
+            if param.default == inspect.Parameter.empty:
+                required.append(param_name)
+
+        tool_def = {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": func.__doc__.strip().split('\n')[0] if func.__doc__ else f"Tool {name}",
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": required
+                }
+            }
+        }
+        return tool_def
 
     def get_skill_of_tool(self, tool_name):
         return self.tool_to_skill_map.get(tool_name)
 
+    def is_parallel_safe(self, tool_name):
+        """Check the `parallel-safe` frontmatter of the tool's skill."""
+        skill_name = self.tool_to_skill_map.get(tool_name)
+        if not skill_name:
+            return False
+        return parallel_safe_from_meta(self.loaded_skills_meta.get(skill_name), tool_name)
+
 
     def get_tool_definitions(self):
         return self.tool_definitions
@@ -567,22 +746,4 @@ class SkillManager:
         if name not in self.tools:
             return f"Error: Tool '{name}' not found."
         
-        func = self.tools[name]
-        
-        # Inject workspace_dir if the function expects it
-        sig = inspect.signature(func)
-        if 'workspace_dir' in sig.parameters:
-            args['workspace_dir'] = self.workspace_dir
-            
-        # Inject context if the function expects it (as _context or **kwargs)
-        if context:
-            if '_context' in sig.parameters:
-                args['_context'] = context
-            # We don't indiscriminately add to **kwargs to avoid unexpected argument errors 
-            # unless we know the function signature is flexible.
-            # But for our system, we can define a standard: tools wanting context should accept `_context`.
-            
-        try:
-            return func(**args)
-        except Exception as e:
-            return f"Error executing {name}: {str(e)}"
+        return self.tool_adapters[name].call(args, self.workspace_dir, context)
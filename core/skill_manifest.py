@@ -0,0 +1,84 @@
+import os
+import json
+import threading
+from .env_utils import get_app_data_dir
+
+# Bump when the schema inference in SkillManager changes, to invalidate old manifests
+MANIFEST_VERSION = 2
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+class SkillManifest:
+    """
+    On-disk cache of the tools each impl.py exposes (names + JSON schemas),
+    keyed by the file path and validated against its mtime and size.
+    Lets SkillManager build tool definitions without importing the module.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_app_data_dir(), "cache", "skill_manifest.json")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self._entries = data.get("skills", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[SkillManifest] Ignoring unreadable manifest: {e}")
+
+    def get(self, impl_path):
+        """Cached tool list for impl_path, or None if missing or stale."""
+        signature = file_signature(impl_path)
+        with self._lock:
+            entry = self._entries.get(impl_path)
+        if entry and signature and entry.get("signature") == signature:
+            return entry["tools"]
+        return None
+
+    def put(self, impl_path, tools):
+        """Store [{"name", "definition", "injects", "accepts_kwargs"}] for the current version of impl_path."""
+        signature = file_signature(impl_path)
+        if not signature:
+            return
+        with self._lock:
+            self._entries[impl_path] = {"signature": signature, "tools": tools}
+            self._dirty = True
+
+    def save(self):
+        """Write the manifest if it changed, dropping entries for deleted files."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._entries = {p: e for p, e in self._entries.items() if os.path.exists(p)}
+            data = {"version": MANIFEST_VERSION, "skills": dict(self._entries)}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[SkillManifest] Failed to save manifest: {e}")
@@ -0,0 +1,137 @@
+import threading
+from types import MappingProxyType
+from .skill_manager import SkillManager, parallel_safe_from_meta
+from .skill_watcher import SkillWatcher
+
+class SkillSnapshot:
+    """
+    Immutable view of the loaded skills at one registry version, bound to a workspace.
+    Exposes the read-side SkillManager API (call_tool, get_tool_definitions, ...)
+    so workers can use it in place of a manager of their own.
+    """
+
+    def __init__(self, version, tools, tool_adapters, tool_definitions, skill_prompts, skill_prompt_map,
+                 tool_to_skill_map, skills_meta, manager, workspace_dir=None):
+        self.version = version
+        self.tools = tools
+        self.tool_adapters = tool_adapters
+        self.tool_definitions = tool_definitions
+        self.skill_prompts = skill_prompts
+        self.skill_prompt_map = skill_prompt_map
+        self.tool_to_skill_map = tool_to_skill_map
+        self.skills_meta = skills_meta
+        self.manager = manager # Shared manager, for tools that edit skills (update_skill)
+        self.workspace_dir = workspace_dir
+
+    @classmethod
+    def from_manager(cls, manager):
+        return cls(
+            version=manager.generation,
+            tools=MappingProxyType(dict(manager.tools)),
+            tool_adapters=MappingProxyType(dict(manager.tool_adapters)),
+            tool_definitions=tuple(manager.tool_definitions),
+            skill_prompts=tuple(manager.skill_prompts),
+            skill_prompt_map=MappingProxyType(dict(manager.skill_prompt_map)),
+            tool_to_skill_map=MappingProxyType(dict(manager.tool_to_skill_map)),
+            skills_meta=MappingProxyType({k: MappingProxyType(dict(v)) for k, v in manager.loaded_skills_meta.items()}),
+            manager=manager
+        )
+
+    def bind(self, workspace_dir):
+        """Same skills, different workspace. Shares all the underlying mappings."""
+        return SkillSnapshot(self.version, self.tools, self.tool_adapters, self.tool_definitions, self.skill_prompts,
+                             self.skill_prompt_map, self.tool_to_skill_map, self.skills_meta, self.manager,
+                             workspace_dir)
+
+    def get_tool_definitions(self):
+        return list(self.tool_definitions)
+
+    def get_system_prompts(self):
+        return "\n\n".join(self.skill_prompts)
+
+    def skill_names(self):
+        """Loaded skills in load order (skills with a prompt or at least one tool)."""
+        names = list(self.skill_prompt_map)
+        for skill_name in self.tool_to_skill_map.values():
+            if skill_name not in names:
+                names.append(skill_name)
+        return names
+
+    def get_skill_of_tool(self, tool_name):
+        return self.tool_to_skill_map.get(tool_name)
+
+    def is_parallel_safe(self, tool_name):
+        skill_name = self.tool_to_skill_map.get(tool_name)
+        if not skill_name:
+            return False
+        return parallel_safe_from_meta(self.skills_meta.get(skill_name), tool_name)
+
+    def call_tool(self, name, args, context=None):
+        if name not in self.tools:
+            return f"Error: Tool '{name}' not found."
+        return self.tool_adapters[name].call(args, self.workspace_dir, context)
+
+class SkillRegistry:
+    """
+    Process-wide owner of the loaded skills.
+    Skills are loaded once; later snapshots only reload the skills the watcher
+    marked as changed, and workers share the resulting immutable snapshot.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, config_manager=None, manager=None, poll_interval=None, watch_events=True):
+        self.manager = manager or SkillManager(None, config_manager)
+        config_manager = config_manager or self.manager.config_manager
+        if poll_interval is None:
+            poll_interval = config_manager.get("skill_poll_interval", 2) if config_manager else 2
+        self.watcher = SkillWatcher(self.manager, poll_interval, use_events=watch_events)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._disabled = self._disabled_skills()
+
+    @classmethod
+    def instance(cls, config_manager=None):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(config_manager)
+            return cls._instance
+
+    @classmethod
+    def reset(cls):
+        with cls._instance_lock:
+            cls._instance = None
+
+    def _disabled_skills(self):
+        config_manager = self.manager.config_manager
+        if not config_manager:
+            return ()
+        return tuple(config_manager.get("disabled_skills", []) or [])
+
+    def refresh(self):
+        """Reload changed skills. Returns the names of the skills that were reloaded."""
+        dirty = self.watcher.take_dirty()
+        disabled = self._disabled_skills()
+        if disabled != self._disabled:
+            # Enabling/disabling a skill is a config change, not a file event
+            self._disabled = disabled
+            dirty = None
+        if dirty is not None and not dirty:
+            return []
+        changed = self.manager.reload_changed_skills(dirty)
+        if changed:
+            self.watcher.request_sync()
+        return changed
+
+    def snapshot(self, workspace_dir=None, refresh=True):
+        """Current skills bound to `workspace_dir`, reloading changed skills first if `refresh`."""
+        if refresh:
+            self.refresh()
+        with self._lock:
+            # The manager may also be reloaded directly (e.g. Skills Center refresh)
+            if self._snapshot is None or self._snapshot.version != self.manager.generation:
+                if self._snapshot is not None:
+                    self.watcher.request_sync()
+                with SkillManager._load_lock:
+                    self._snapshot = SkillSnapshot.from_manager(self.manager)
+            return self._snapshot.bind(workspace_dir)
@@ -0,0 +1,94 @@
+import os
+import time
+import threading
+from PySide6.QtCore import QObject, Signal, QCoreApplication, QThread, QFileSystemWatcher
+
+class SkillWatcher(QObject):
+    """
+    Tracks which skills changed on disk, so only those are re-checked and reloaded.
+
+    Uses QFileSystemWatcher (inotify / native change notifications) when created
+    on the thread of a running Qt application. Without one, or if the OS refuses
+    more watches, it falls back to a full rescan at most every `poll_interval` seconds.
+    """
+    _sync_requested = Signal()
+
+    def __init__(self, manager, poll_interval=2.0, use_events=True):
+        super().__init__()
+        self.manager = manager
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._last_poll = 0
+        self._owners = {} # watched path -> skill (or skills dir) path to mark dirty
+        self._watcher = None
+        self._polling = True
+
+        app = QCoreApplication.instance()
+        if use_events and app is not None and QThread.currentThread() == app.thread():
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._on_changed)
+            self._watcher.fileChanged.connect(self._on_changed)
+            self._polling = False
+            # Workers request a sync after reloads; the watcher itself only lives on the GUI thread
+            self._sync_requested.connect(self._sync)
+            self._sync()
+
+    @property
+    def is_event_driven(self):
+        return not self._polling
+
+    def take_dirty(self):
+        """
+        Paths to re-check since the last call: a set (possibly empty), or None
+        when the caller should rescan everything (polling fallback).
+        """
+        if self._polling:
+            now = time.monotonic()
+            if now - self._last_poll < self.poll_interval:
+                return set()
+            self._last_poll = now
+            return None
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def request_sync(self):
+        """Update the watched paths after skills were added or removed. Safe from any thread."""
+        if self._watcher is not None:
+            self._sync_requested.emit()
+
+    def _sync(self):
+        owners = {}
+        for skills_dir in self.manager.skills_dirs:
+            if os.path.isdir(skills_dir):
+                owners[skills_dir] = skills_dir
+        for skill_path in self.manager.loaded_skill_paths():
+            owners[skill_path] = skill_path
+            for filename in ("SKILL.md", "impl.py"):
+                file_path = os.path.join(skill_path, filename)
+                if os.path.exists(file_path):
+                    owners[file_path] = skill_path
+
+        watched = set(self._watcher.files()) | set(self._watcher.directories())
+        stale = [p for p in watched if p not in owners]
+        if stale:
+            self._watcher.removePaths(stale)
+        new = [p for p in owners if p not in watched]
+        failed = self._watcher.addPaths(new) if new else []
+        if new and self._owners:
+            # Files of a just-added skill may have changed before the watch existed
+            with self._lock:
+                self._dirty.update(owners[p] for p in new)
+        self._owners = owners
+
+        if failed:
+            print(f"[SkillWatcher] Could not watch {len(failed)} paths, falling back to polling.")
+            self._polling = True
+
+    def _on_changed(self, path):
+        with self._lock:
+            self._dirty.add(self._owners.get(path, path))
+        # Atomic saves replace the file, which drops it from the watch list
+        if os.path.exists(path) and path not in self._watcher.files() and path not in self._watcher.directories():
+            self._watcher.addPath(path)
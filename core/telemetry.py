@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import threading
+from .env_utils import get_app_data_dir
+
+TOTAL_KEYS = (
+    "turns", "tool_calls", "prompt_tokens", "completion_tokens",
+    "cache_hit_tokens", "cache_miss_tokens", "llm_time", "tool_time", "tool_tokens_saved"
+)
+
+def _with_cache_ratio(totals):
+    """Copy of session totals with the prompt cache hit ratio over all turns."""
+    snapshot = dict(totals)
+    cached = snapshot["cache_hit_tokens"] + snapshot["cache_miss_tokens"]
+    snapshot["cache_hit_ratio"] = round(snapshot["cache_hit_tokens"] / cached, 3) if cached else None
+    return snapshot
+
+class TurnMetrics:
+    """Timing for one streamed LLM request, measured from just before the request is sent."""
+
+    def __init__(self, turn, model=None):
+        self.turn = turn
+        self.model = model
+        self.start = time.perf_counter()
+        self.first_reasoning = None
+        self.first_content = None
+        self.first_tool_call = None
+        self.usage = None
+
+    def mark(self, chunk_type):
+        now = time.perf_counter()
+        if chunk_type == "reasoning" and self.first_reasoning is None:
+            self.first_reasoning = now
+        elif chunk_type == "content" and self.first_content is None:
+            self.first_content = now
+        elif chunk_type == "tool_call" and self.first_tool_call is None:
+            self.first_tool_call = now
+
+    def first_token(self):
+        marks = [t for t in (self.first_reasoning, self.first_content, self.first_tool_call) if t is not None]
+        return min(marks) if marks else None
+
+    def finish(self, output_chars=0, tool_calls=0):
+        end = time.perf_counter()
+        usage = self.usage or {}
+        first = self.first_token()
+
+        def since_start(t):
+            return round(t - self.start, 3) if t is not None else None
+
+        completion_tokens = usage.get("completion_tokens")
+        estimated = completion_tokens is None
+        if estimated:
+            # No usage block from the provider: fall back to ~4 chars per token
+            completion_tokens = output_chars // 4
+        generation_time = (end - first) if first is not None else 0
+        tokens_per_sec = round(completion_tokens / generation_time, 1) if generation_time > 0 else None
+
+        prompt_tokens = usage.get("prompt_tokens")
+        cache_hit = usage.get("cache_hit_tokens")
+        cache_ratio = None
+        if prompt_tokens and cache_hit is not None:
+            cache_ratio = round(cache_hit / prompt_tokens, 3)
+
+        return {
+            "type": "turn",
+            "turn": self.turn,
+            "model": self.model,
+            "ttft": since_start(first),
+            "ttft_reasoning": since_start(self.first_reasoning),
+            "ttft_content": since_start(self.first_content),
+            "duration": round(end - self.start, 3),
+            "generation_time": round(generation_time, 3),
+            "tokens_per_sec": tokens_per_sec,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "completion_tokens_estimated": estimated,
+            "reasoning_tokens": usage.get("reasoning_tokens"),
+            "cache_hit_tokens": cache_hit,
+            "cache_miss_tokens": usage.get("cache_miss_tokens"),
+            "cache_hit_ratio": cache_ratio,
+            "tool_calls": tool_calls,
+        }
+
+class MetricsSink:
+    """
+    Process-wide, thread-safe sink for turn and tool metrics.
+    Records are appended to a JSONL file per day under <app data>/metrics,
+    and per-session totals are kept in memory for the UI.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, metrics_dir=None, enabled=True):
+        self.metrics_dir = metrics_dir or os.path.join(get_app_data_dir(), "metrics")
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._session_totals = {}
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def record(self, record, session_id=None):
+        """Persist a metrics record and return the updated totals for its session."""
+        record = dict(record)
+        record.setdefault("ts", round(time.time(), 3))
+        record["session_id"] = session_id
+
+        with self._lock:
+            totals = self._session_totals.setdefault(session_id, dict.fromkeys(TOTAL_KEYS, 0))
+            if record.get("type") == "turn":
+                totals["turns"] += 1
+                totals["llm_time"] += record.get("duration") or 0
+                for key in ("prompt_tokens", "completion_tokens", "cache_hit_tokens", "cache_miss_tokens", "tool_tokens_saved"):
+                    totals[key] += record.get(key) or 0
+            elif record.get("type") == "tool":
+                totals["tool_calls"] += 1
+                totals["tool_time"] += record.get("duration") or 0
+            snapshot = _with_cache_ratio(totals)
+
+            if self.enabled:
+                try:
+                    os.makedirs(self.metrics_dir, exist_ok=True)
+                    path = os.path.join(self.metrics_dir, f"metrics-{time.strftime('%Y%m%d')}.jsonl")
+                    with open(path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                except Exception as e:
+                    print(f"[Metrics] Failed to write record: {e}")
+        return snapshot
+
+    def session_totals(self, session_id):
+        with self._lock:
+            return _with_cache_ratio(self._session_totals.get(session_id) or dict.fromkeys(TOTAL_KEYS, 0))
+
+    def discard_session(self, session_id):
+        """Forget the in-memory totals of a closed session (the JSONL records stay)."""
+        with self._lock:
+            self._session_totals.pop(session_id, None)
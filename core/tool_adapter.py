@@ -0,0 +1,140 @@
+import re
+import json
+import inspect
+
+# Parameters filled in by the host, never by the model
+INJECTED_PARAMS = ("workspace_dir", "_context")
+
+_INT_RE = re.compile(r'^[+-]?\d+$')
+_TRUE_STRINGS = {"true", "yes", "1", "on"}
+_FALSE_STRINGS = {"false", "no", "0", "off"}
+
+def inspect_injection(func):
+    """Injected parameters a tool function accepts, and whether it takes **kwargs."""
+    params = inspect.signature(func).parameters
+    injects = [name for name in INJECTED_PARAMS if name in params]
+    accepts_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values())
+    return injects, accepts_kwargs
+
+class ArgumentError(ValueError):
+    pass
+
+def _coerce(value, param_type):
+    """Coerce one model-supplied value to the schema type, or raise ArgumentError."""
+    if param_type == "integer":
+        if isinstance(value, bool):
+            raise ArgumentError(f"expects an integer, got boolean {value}")
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and _INT_RE.match(value.strip()):
+            return int(value.strip())
+        raise ArgumentError(f"expects an integer, got {value!r}")
+
+    if param_type == "boolean":
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in _TRUE_STRINGS:
+                return True
+            if lowered in _FALSE_STRINGS:
+                return False
+        raise ArgumentError(f"expects a boolean, got {value!r}")
+
+    if param_type == "array":
+        if isinstance(value, list):
+            return value
+        if isinstance(value, tuple):
+            return list(value)
+        if isinstance(value, str):
+            # Models often send arrays as JSON-encoded strings
+            try:
+                parsed = json.loads(value)
+            except ValueError:
+                parsed = None
+            if isinstance(parsed, list):
+                return parsed
+        raise ArgumentError(f"expects an array (JSON list), got {value!r}"[:200])
+
+    # "string" is also the fallback for un-annotated parameters (e.g. `data` of
+    # write_excel takes a list), so pass other values through unchanged
+    return value
+
+class ToolAdapter:
+    """
+    Precompiled call path for one tool, built once at load time.
+    Validates and coerces model arguments against the tool's JSON schema and
+    injects workspace_dir / _context only if the function declares them.
+    """
+
+    def __init__(self, name, func, definition, injects=(), accepts_kwargs=False):
+        self.name = name
+        self.func = func
+        parameters = definition.get("function", {}).get("parameters", {})
+        self.param_types = {
+            key: prop.get("type", "string") for key, prop in parameters.get("properties", {}).items()
+        }
+        self.required = tuple(parameters.get("required", []))
+        self.injects = frozenset(injects)
+        self.accepts_kwargs = accepts_kwargs
+
+    def describe_params(self):
+        parts = []
+        for key, param_type in self.param_types.items():
+            suffix = ", required" if key in self.required else ""
+            parts.append(f"{key} ({param_type}{suffix})")
+        return ", ".join(parts) or "none"
+
+    def prepare(self, args):
+        """Return validated keyword arguments for the model-facing parameters."""
+        if args is None:
+            args = {}
+        if not isinstance(args, dict):
+            raise ArgumentError(f"arguments must be a JSON object, got {type(args).__name__}")
+
+        errors = []
+        kwargs = {}
+        for key, value in args.items():
+            if key in INJECTED_PARAMS:
+                continue # Supplied by the host, ignore model values
+            param_type = self.param_types.get(key)
+            if param_type is None:
+                if self.accepts_kwargs:
+                    kwargs[key] = value
+                else:
+                    errors.append(f"unexpected parameter '{key}'")
+                continue
+            if value is None and key not in self.required:
+                continue # Let the function default apply
+            try:
+                kwargs[key] = _coerce(value, param_type)
+            except ArgumentError as e:
+                errors.append(f"parameter '{key}' {e}")
+
+        missing = [key for key in self.required if key not in kwargs]
+        if missing:
+            errors.append("missing required parameter(s): " + ", ".join(f"'{key}'" for key in missing))
+        if errors:
+            raise ArgumentError("; ".join(errors))
+        return kwargs
+
+    def call(self, args, workspace_dir=None, context=None):
+        try:
+            kwargs = self.prepare(args)
+        except ArgumentError as e:
+            return (f"Error: Invalid arguments for tool '{self.name}': {e}. "
+                    f"Expected parameters: {self.describe_params()}.")
+
+        if "workspace_dir" in self.injects:
+            kwargs["workspace_dir"] = workspace_dir
+        if context and "_context" in self.injects:
+            kwargs["_context"] = context
+
+        try:
+            return self.func(**kwargs)
+        except Exception as e:
+            return f"Error executing {self.name}: {str(e)}"
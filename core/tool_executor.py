@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class ToolExecutor:
+    """
+    Executes the tool calls returned by the model in a single assistant turn.
+
+    Consecutive calls to tools declared parallel-safe (see `parallel-safe` in
+    SKILL.md frontmatter) are run together on a bounded thread pool. Every other
+    call runs alone on the calling thread, so tools that block on the UI
+    (ask_user) or spin their own event loop (dispatch_agents) keep working.
+    """
+
+    def __init__(self, skill_manager, max_workers=4):
+        self.skill_manager = skill_manager
+        try:
+            self.max_workers = max(1, int(max_workers))
+        except (TypeError, ValueError):
+            self.max_workers = 1
+        self._pool = None
+
+    def plan_batches(self, tool_calls):
+        """
+        Split tool calls into ordered batches.
+        A batch either holds a run of parallel-safe calls or a single call.
+        """
+        batches = []
+        current = []
+        for tool in tool_calls:
+            if self.max_workers > 1 and self.skill_manager.is_parallel_safe(tool.function.name):
+                current.append(tool)
+                continue
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([tool])
+        if current:
+            batches.append(current)
+        return batches
+
+    def run_batch(self, batch, invoke):
+        """
+        Run `invoke(tool)` for every call in the batch.
+        Yields (tool, result) pairs in completion order.
+        """
+        if len(batch) == 1:
+            yield batch[0], invoke(batch[0])
+            return
+
+        pool = self._get_pool()
+        futures = {pool.submit(invoke, tool): tool for tool in batch}
+        for future in as_completed(futures):
+            tool = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = f"Error executing {tool.function.name}: {str(e)}"
+            yield tool, result
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool-call")
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
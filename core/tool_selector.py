@@ -0,0 +1,218 @@
+import re
+import json
+import math
+import threading
+from collections import Counter
+from .context_budget import estimate_tokens
+from .prompt_builder import POLICY_TOOLS
+
+# Skills whose tools are always offered, whatever the request is about
+DEFAULT_PINNED_SKILLS = ["file-system", "interaction", "meta-tools", "skill_creator", "python-runner"]
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+')
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by", "is", "are",
+    "be", "it", "this", "that", "as", "at", "from", "can", "use", "you", "your", "if", "not",
+}
+
+def tokenize(text):
+    """Lowercase word tokens (snake/kebab-case split, light plural stemming) plus CJK bigrams."""
+    if not text:
+        return []
+    text = text.lower()
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+class SkillIndex:
+    """
+    BM25 index with one document per skill: name, descriptions, tool names and
+    descriptions, and the SKILL.md body (which includes learned experience).
+    """
+    _cache = {} # snapshot version -> SkillIndex
+    _cache_lock = threading.Lock()
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = {name: Counter(tokens) for name, tokens in documents.items()}
+        self.doc_lengths = {name: len(tokens) for name, tokens in documents.items()}
+        self.avg_length = (sum(self.doc_lengths.values()) / len(documents)) if documents else 0
+        doc_freq = Counter()
+        for freqs in self.term_freqs.values():
+            doc_freq.update(freqs.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    @classmethod
+    def for_snapshot(cls, snapshot):
+        """Index of a skill snapshot, built once per registry version."""
+        with cls._cache_lock:
+            index = cls._cache.get(snapshot.version)
+            if index is None:
+                index = cls(cls._documents(snapshot))
+                cls._cache = {snapshot.version: index} # Older versions are no longer used
+            return index
+
+    @staticmethod
+    def _documents(snapshot):
+        tools_by_skill = {}
+        for definition in snapshot.tool_definitions:
+            func = definition.get("function", {})
+            skill_name = snapshot.get_skill_of_tool(func.get("name"))
+            tools_by_skill.setdefault(skill_name, []).append(func)
+
+        documents = {}
+        for skill_name in snapshot.skill_names():
+            meta = snapshot.skills_meta.get(skill_name, {})
+            # Names and descriptions are repeated to weigh them above the long body text
+            parts = [skill_name] * 3
+            parts += [str(meta.get("description", "")), str(meta.get("description_cn", ""))] * 2
+            for func in tools_by_skill.get(skill_name, []):
+                parts += [func.get("name", "")] * 2 + [func.get("description", "")]
+            parts.append(snapshot.skill_prompt_map.get(skill_name, ""))
+            documents[skill_name] = tokenize("\n".join(parts))
+        return documents
+
+    def scores(self, query):
+        terms = tokenize(query)
+        results = {}
+        for name, freqs in self.term_freqs.items():
+            length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[name] / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + length_norm)
+            if score > 0:
+                results[name] = score
+        return results
+
+    def top(self, query, k):
+        ranked = sorted(self.scores(query).items(), key=lambda item: (-item[1], item[0]))
+        return [name for name, _ in ranked[:k]]
+
+class SkillSelection:
+    """
+    The skills whose tools are offered for one agent run. Thread-safe, because
+    the enable_skills tool may extend it from a tool call.
+    """
+
+    def __init__(self, available, selected):
+        self.available = list(available)
+        self._selected = set(selected) & set(self.available)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    @property
+    def selected(self):
+        with self._lock:
+            return set(self._selected)
+
+    def omitted(self):
+        selected = self.selected
+        return [name for name in self.available if name not in selected]
+
+    def enable(self, names):
+        """Add skills to the selection. Returns (added, unknown) name lists."""
+        added, unknown = [], []
+        with self._lock:
+            for name in names:
+                if name not in self.available:
+                    unknown.append(name)
+                elif name not in self._selected:
+                    self._selected.add(name)
+                    added.append(name)
+            if added:
+                self.version += 1
+        return added, unknown
+
+    def refresh(self, snapshot):
+        """Follow a skill reload: newly installed skills are selected, removed ones dropped."""
+        available = snapshot.skill_names()
+        with self._lock:
+            new = [name for name in available if name not in self.available]
+            self.available = available
+            self._selected = (self._selected | set(new)) & set(available)
+            if new:
+                self.version += 1
+
+    def tool_definitions(self, snapshot):
+        selected = self.selected
+        return [d for d in snapshot.tool_definitions
+                if snapshot.get_skill_of_tool(d["function"]["name"]) in selected]
+
+    def skill_prompts(self, snapshot):
+        selected = self.selected
+        return [prompt for name, prompt in snapshot.skill_prompt_map.items() if name in selected]
+
+    def tokens_saved(self, snapshot):
+        """Estimated prompt tokens per request not spent on omitted tools and skill guidelines."""
+        selected = self.selected
+        saved = 0
+        for definition in snapshot.tool_definitions:
+            if snapshot.get_skill_of_tool(definition["function"]["name"]) not in selected:
+                saved += estimate_tokens(json.dumps(definition, ensure_ascii=False))
+        for name, prompt in snapshot.skill_prompt_map.items():
+            if name not in selected:
+                saved += estimate_tokens(prompt)
+        # The catalogue line that replaces each omitted skill
+        saved -= sum(estimate_tokens(line) for line in catalogue_lines(snapshot, self.omitted()))
+        return max(0, saved)
+
+def catalogue_lines(snapshot, skill_names):
+    """One short line per skill, for skills whose tools are not loaded."""
+    lines = []
+    for name in skill_names:
+        description = str(snapshot.skills_meta.get(name, {}).get("description", "")).strip()
+        lines.append(f"- {name}: {description[:120]}" if description else f"- {name}")
+    return lines
+
+def used_skills(snapshot, messages):
+    """Skills whose tools were already called in the conversation."""
+    used = set()
+    for msg in messages:
+        for tc in msg.get("tool_calls") or []:
+            skill_name = snapshot.get_skill_of_tool(tc.get("function", {}).get("name"))
+            if skill_name:
+                used.add(skill_name)
+    return used
+
+def last_user_text(messages):
+    for msg in reversed(messages):
+        if msg.get("role") != "user":
+            continue
+        content = msg.get("content")
+        if isinstance(content, list):
+            return " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+        return content or ""
+    return ""
+
+def select_skills(snapshot, messages, top_k=3, pinned=None):
+    """
+    Choose the skills to offer for a request: the pinned core set, the skills of
+    tools the system prompt tells the model to use, skills already used in the
+    conversation, and the top-k BM25 matches for the latest user message.
+    Returns None when subsetting would not leave anything out.
+    """
+    available = snapshot.skill_names()
+    pinned = DEFAULT_PINNED_SKILLS if pinned is None else pinned
+    selected = set(pinned) | used_skills(snapshot, messages)
+    # Also covers saved configs whose pinned_skills predate a policy line
+    selected |= {snapshot.get_skill_of_tool(tool) for tool in POLICY_TOOLS}
+    selected |= set(SkillIndex.for_snapshot(snapshot).top(last_user_text(messages), top_k))
+    selected &= set(available)
+    if set(available) <= selected:
+        return None
+    return SkillSelection(available, selected)
@@ -0,0 +1,113 @@
+from PySide6.QtCore import QObject, QTimer, QEvent
+from PySide6.QtWidgets import QWidget, QSizePolicy
+
+class _Placeholder(QWidget):
+    """
+    Fixed-height stand-in for an off-screen transcript widget. Owns the widget
+    while it is parked, or, once the widget was released, the function that
+    rebuilds it.
+    """
+
+    def __init__(self, widget, height, rebuild=None):
+        super().__init__()
+        self.widget = widget
+        self.rebuild = rebuild
+        self.setFixedHeight(height)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+class TranscriptVirtualizer(QObject):
+    """
+    Keeps only the transcript widgets near the viewport of a chat scroll area in
+    the layout. Widgets further than `margin` viewport heights away are swapped
+    for empty placeholders of the same height, so layout, style polish and paint
+    work scale with what is visible rather than with the session length.
+    `release(widget)` may return a function that rebuilds an equivalent widget:
+    the widget is then deleted while parked and only its height is kept.
+    Otherwise (e.g. a widget still streaming) it is kept alive and still
+    receives updates. Widgets are swapped back in when scrolled near. Layout
+    indices are unchanged by the swap.
+    """
+
+    def __init__(self, scroll_area, layout, margin=1.0, min_items=30, release=None, parent=None):
+        super().__init__(parent or scroll_area)
+        self.scroll_area = scroll_area
+        self.layout = layout
+        self.margin = margin
+        self.min_items = min_items # Short transcripts are left alone
+        self.release = release
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(50)
+        self._timer.timeout.connect(self.update)
+        scroll_area.verticalScrollBar().valueChanged.connect(self.schedule)
+        scroll_area.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Resize:
+            self.schedule()
+        return False
+
+    def schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _placeholders(self):
+        for i in range(self.layout.count()):
+            widget = self.layout.itemAt(i).widget()
+            if isinstance(widget, _Placeholder):
+                yield widget
+
+    def parked_count(self):
+        return sum(1 for _ in self._placeholders())
+
+    def released_count(self):
+        """Parked widgets that were deleted and will be rebuilt when restored."""
+        return sum(1 for placeholder in self._placeholders() if placeholder.widget is None)
+
+    def widget_at(self, index):
+        """The real widget at a layout index, whether it is shown or parked; None if it was released."""
+        widget = self.layout.itemAt(index).widget()
+        return widget.widget if isinstance(widget, _Placeholder) else widget
+
+    def update(self):
+        count = self.layout.count()
+        viewport_height = self.scroll_area.viewport().height()
+        top = self.scroll_area.verticalScrollBar().value()
+        band_top = top - viewport_height * self.margin
+        band_bottom = top + viewport_height * (1 + self.margin)
+        virtualize = count >= self.min_items
+
+        for i in range(count):
+            widget = self.layout.itemAt(i).widget()
+            if widget is None:
+                continue
+            geometry = widget.geometry()
+            visible = geometry.bottom() >= band_top and geometry.top() <= band_bottom
+            if isinstance(widget, _Placeholder):
+                if visible or not virtualize:
+                    self._restore(widget)
+            elif not visible and virtualize and widget.isVisible() and geometry.height() > 0:
+                self._park(widget)
+
+    def _park(self, widget):
+        rebuild = self.release(widget) if self.release else None
+        placeholder = _Placeholder(None if rebuild else widget, widget.height(), rebuild)
+        self.layout.replaceWidget(widget, placeholder)
+        widget.hide()
+        if rebuild:
+            widget.deleteLater()
+        else:
+            # Deleting the placeholder (e.g. when the chat is cleared) deletes the widget too
+            widget.setParent(placeholder)
+        placeholder.show()
+
+    def _restore(self, placeholder):
+        widget = placeholder.widget or placeholder.rebuild()
+        placeholder.widget = placeholder.rebuild = None
+        self.layout.replaceWidget(placeholder, widget)
+        widget.show()
+        placeholder.deleteLater()
+
+    def restore_all(self):
+        for placeholder in list(self._placeholders()):
+            self._restore(placeholder)
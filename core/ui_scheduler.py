@@ -0,0 +1,70 @@
+import time
+from PySide6.QtCore import QObject, QTimer
+
+def concat(old, new):
+    return old + new
+
+class UpdateScheduler(QObject):
+    """
+    Frame-paced delivery of worker events to the GUI.
+    Events are queued per session and applied on a ~60 Hz timer instead of one
+    widget update per token. Consecutive streaming events with the same key are
+    merged (e.g. text deltas concatenated) so a frame applies each stream once;
+    events posted without a merge function keep their order and are never merged
+    across. Sessions that are not in the foreground are flushed less often.
+    """
+
+    def __init__(self, is_foreground=None, interval=16, background_interval=250, parent=None):
+        super().__init__(parent)
+        self.is_foreground = is_foreground or (lambda session_id: True)
+        self.background_interval = background_interval / 1000
+        self._queues = {} # session_id -> [[key, value, apply, merge], ...]
+        self._open = {} # session_id -> key -> entry that later events may still merge into
+        self._last_flush = {} # session_id -> time of its last flush
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._tick)
+
+    def post(self, session_id, key, value, apply, merge=None):
+        """Queue apply(value) for the next frame of the session."""
+        open_entries = self._open.setdefault(session_id, {})
+        if merge is not None and key in open_entries:
+            entry = open_entries[key]
+            entry[1] = merge(entry[1], value)
+            return
+        entry = [key, value, apply, merge]
+        self._queues.setdefault(session_id, []).append(entry)
+        if merge is None:
+            open_entries.clear() # Ordered event: nothing before it may absorb later events
+        else:
+            open_entries[key] = entry
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def pending(self, session_id):
+        return len(self._queues.get(session_id, ()))
+
+    def flush(self, session_id=None):
+        """Apply the queued events of one session (or all) now."""
+        for sid in ([session_id] if session_id is not None else list(self._queues)):
+            entries = self._queues.pop(sid, None)
+            self._open.pop(sid, None)
+            self._last_flush[sid] = time.monotonic()
+            for _key, value, apply, _merge in entries or ():
+                try:
+                    apply(value)
+                except Exception as e:
+                    print(f"[UpdateScheduler] Update failed: {e}")
+
+    def discard(self, session_id):
+        self._queues.pop(session_id, None)
+        self._open.pop(session_id, None)
+        self._last_flush.pop(session_id, None)
+
+    def _tick(self):
+        now = time.monotonic()
+        for session_id in list(self._queues):
+            if self.is_foreground(session_id) or now - self._last_flush.get(session_id, 0) >= self.background_interval:
+                self.flush(session_id)
+        if not self._queues:
+            self._timer.stop()
@@ -0,0 +1,184 @@
+import os
+import re
+import math
+import shutil
+import zipfile
+import datetime
+import tempfile
+import posixpath
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CHUNK_SIZE = 1 << 20
+
+# Sheet XML is scanned as bytes; elements may carry a namespace prefix (e.g. <x:row>)
+ROW_TAG = re.compile(rb"<(?:\w+:)?row\b([^>]*)>")
+ROW_NUMBER = re.compile(rb"\sr=\"(\d+)\"")
+DIMENSION = re.compile(rb"<(?:\w+:)?dimension\s+ref=\"[A-Z]+\d+(?::([A-Z]+)\d+)?\"\s*/>")
+SHEET_DATA_END = re.compile(rb"<(\w+:)?sheetData\s*/>|</(\w+:)?sheetData>")
+ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def column_letter(index):
+    """Letter of a 1-based column index (1 -> A, 27 -> AA)."""
+    letters = ""
+    while index > 0:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index
+
+def sheet_part(zf, sheet_name):
+    """Name of the zip member holding the XML of `sheet_name`, None if there is no such sheet."""
+    package_rels = ET.fromstring(zf.read("_rels/.rels"))
+    workbook = next(rel.get("Target") for rel in package_rels.iter(f"{{{PKG_REL_NS}}}Relationship")
+                    if rel.get("Type", "").endswith("/officeDocument")).lstrip("/")
+    sheet_id = None
+    for sheet in ET.fromstring(zf.read(workbook)).iter(f"{{{MAIN_NS}}}sheet"):
+        if sheet.get("name") == sheet_name:
+            sheet_id = sheet.get(f"{{{DOC_REL_NS}}}id")
+    if sheet_id is None:
+        return None
+    rels_path = posixpath.join(posixpath.dirname(workbook), "_rels", posixpath.basename(workbook) + ".rels")
+    for rel in ET.fromstring(zf.read(rels_path)).iter(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("Id") == sheet_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join(posixpath.dirname(workbook), target))
+    return None
+
+def has_sheet(path, sheet_name):
+    with zipfile.ZipFile(path) as zf:
+        return sheet_part(zf, sheet_name) is not None
+
+def _segments(stream):
+    """
+    Split a byte stream into segments that each end just before a "<", so
+    every tag in the stream lies whole inside one segment.
+    """
+    carry = b""
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            if carry:
+                yield carry
+            return
+        carry += chunk
+        cut = carry.rfind(b"<")
+        if cut > 0:
+            yield carry[:cut]
+            carry = carry[cut:]
+
+def _scan(stream):
+    """
+    (last row number, last column of the stored dimension or 0, namespace
+    prefix of the sheetData element or None if there is none) of a sheet's XML.
+    """
+    last_row = 0
+    last_column = 0
+    for segment in _segments(stream):
+        for match in ROW_TAG.finditer(segment):
+            number = ROW_NUMBER.search(match.group(1))
+            last_row = int(number.group(1)) if number else last_row + 1
+        if not last_column:
+            dimension = DIMENSION.search(segment)
+            if dimension:
+                last_column = column_index((dimension.group(1) or b"A").decode("ascii"))
+        end = SHEET_DATA_END.search(segment)
+        if end:
+            return last_row, last_column, (end.group(1) or end.group(2) or b"").decode("ascii")
+    return last_row, last_column, None
+
+def _cell(prefix, ref, value):
+    if value is None or (isinstance(value, float) and not math.isfinite(value)):
+        return ""
+    if isinstance(value, bool):
+        return f'<{prefix}c r="{ref}" t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if isinstance(value, (int, float)):
+        return f'<{prefix}c r="{ref}"><{prefix}v>{value!r}</{prefix}v></{prefix}c>'
+    if isinstance(value, (datetime.date, datetime.time)):
+        value = value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    # Inline strings leave the shared string table (and every other part) untouched
+    text = escape(ILLEGAL_XML_CHARS.sub("", str(value)))
+    return (f'<{prefix}c r="{ref}" t="inlineStr"><{prefix}is><{prefix}t xml:space="preserve">{text}'
+            f'</{prefix}t></{prefix}is></{prefix}c>')
+
+def append_rows(path, sheet_name, rows):
+    """
+    Append `rows` (iterables of cell values) after the last row of a sheet in
+    an .xlsx file, without loading the workbook: the sheet's XML is streamed
+    and the new rows are spliced in before the end of its sheetData. Strings
+    are written inline and dates as ISO text. Returns the number of rows
+    appended; raises KeyError if the sheet does not exist.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(path) as zin:
+            part = sheet_part(zin, sheet_name)
+            if part is None:
+                raise KeyError(sheet_name)
+            with zin.open(part) as stream:
+                last_row, last_column, prefix = _scan(stream)
+            if prefix is None:
+                raise ValueError(f"Sheet '{sheet_name}' has no sheetData element.")
+
+            # The new rows go to a spool file first: their count and width are needed
+            # for the dimension element, which comes before the rows in the sheet
+            with tempfile.TemporaryFile() as spool:
+                count, width = 0, 0
+                for row in rows:
+                    row = list(row)
+                    count += 1
+                    width = max(width, len(row))
+                    number = last_row + count
+                    cells = "".join(_cell(prefix, f"{column_letter(i + 1)}{number}", value) for i, value in enumerate(row))
+                    spool.write(f'<{prefix}row r="{number}">{cells}</{prefix}row>'.encode("utf-8"))
+                dimension = f'<{prefix}dimension ref="A1:{column_letter(max(last_column, width, 1))}{max(last_row + count, 1)}"/>'
+
+                with zipfile.ZipFile(tmp_path, "w") as zout:
+                    for info in zin.infolist():
+                        target = zipfile.ZipInfo(info.filename, info.date_time)
+                        target.compress_type = info.compress_type
+                        target.external_attr = info.external_attr
+                        if info.filename != part:
+                            with zin.open(info) as src, zout.open(target, "w") as dst:
+                                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                            continue
+                        large = info.file_size + spool.tell() > zipfile.ZIP64_LIMIT // 2
+                        with zin.open(info) as src, zout.open(target, "w", force_zip64=large) as dst:
+                            _splice(src, dst, spool, dimension.encode("ascii"))
+        os.replace(tmp_path, path) # Only once the original is closed (Windows cannot replace open files)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return count
+
+def _splice(src, dst, spool, new_dimension):
+    dimension_done = False
+    inserted = False
+    for segment in _segments(src):
+        if not dimension_done:
+            segment, replaced = DIMENSION.subn(new_dimension, segment, count=1)
+            dimension_done = replaced > 0
+        match = None if inserted else SHEET_DATA_END.search(segment)
+        if match is None:
+            dst.write(segment)
+            continue
+        prefix = match.group(1) or match.group(2) or b""
+        dst.write(segment[:match.start()])
+        if match.group(0).endswith(b"/>"): # <sheetData/> of an empty sheet
+            dst.write(b"<" + prefix + b"sheetData>")
+        spool.seek(0)
+        shutil.copyfileobj(spool, dst, CHUNK_SIZE)
+        dst.write(b"</" + prefix + b"sheetData>")
+        dst.write(segment[match.end():])
+        inserted = True
@@ -13,13 +13,17 @@ python_env = Tree(
 )
 
 pyside6_hidden = collect_submodules('PySide6')
+# Skills ship as data files and import core modules (core.line_index, core.pdf_extract,
+# core.xlsx_append, ...) that main.py itself may never import, so bundle all of core
+core_hidden = collect_submodules('core')
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
     datas=[('skills', 'skills'), ('config.json', '.'), ('images', 'images')],
-    hiddenimports=pyside6_hidden + [
+    hiddenimports=pyside6_hidden + core_hidden + [
+        'core.pdf_extract', # Spawned PDF workers unpickle extract_pages from it by name
         'docx',
         'pptx',
         'pypdf',
@@ -8,12 +8,22 @@ import re
 import json
 import platform
 import uuid
-import glob
-import markdown
+import html
+import multiprocessing
 from datetime import datetime
 from core.config_manager import ConfigManager
-from core.skill_manager import SkillManager
+from core.skill_registry import SkillRegistry
+from core.python_pool import PythonPool
+from core.python_kernel import SessionKernels
+from core.markdown_stream import MarkdownStream, render_markdown
+from core.transcript_virtualizer import TranscriptVirtualizer
+from core.ui_scheduler import UpdateScheduler, concat
+from core.preview_service import PreviewService, IMAGE_EXTS, BINARY_FILE
+from core.extraction_cache import ExtractionCache
+from core.history_store import HistoryStore, session_title, parse_search_query, HIGHLIGHT_START, HIGHLIGHT_END
 from core.agent import LLMWorker, CodeWorker
+from core.llm.factory import LLMFactory
+from core.telemetry import MetricsSink
 from core.skill_generator import SkillGenerator
 from skills.skill_creator.impl import create_new_skill
 from core.interaction import bridge
@@ -234,6 +244,8 @@ class SettingsDialog(QDialog):
         self.config_manager.set_chat_history_dir(self.history_dir_input.text().strip())
         # Save God Mode
         self.config_manager.set_god_mode(self.god_mode_check.isChecked())
+        # Release the shared client of replaced API settings
+        LLMFactory.evict_stale_providers(self.config_manager)
         
         self.accept()
 
@@ -558,7 +570,7 @@ class ReadOnlyTextEdit(QTextEdit):
         super().__init__(parent)
         self.setReadOnly(True)
 
-    def contextMenuEvent(self, event):
+    def build_context_menu(self):
         menu = QMenu(self)
         menu.setStyleSheet(MENU_STYLESHEET)
         
@@ -574,8 +586,10 @@ class ReadOnlyTextEdit(QTextEdit):
         action_select_all.setIcon(qta.icon('fa5s.mouse-pointer', color='#4b5563'))
         action_select_all.triggered.connect(self.selectAll)
         menu.addAction(action_select_all)
-        
-        menu.exec(event.globalPos())
+        return menu
+
+    def contextMenuEvent(self, event):
+        self.build_context_menu().exec(event.globalPos())
 
 class AutoResizingTextEdit(ReadOnlyTextEdit):
     def __init__(self, parent=None):
@@ -601,6 +615,82 @@ class AutoResizingTextEdit(ReadOnlyTextEdit):
         super().resizeEvent(event)
         self.adjustHeight()
 
+# Characters of reasoning kept in a thinking view; older text is collapsed (None = no cap)
+THINKING_VIEW_MAX_CHARS = 20000
+
+class ThinkingTextView(AutoResizingTextEdit):
+    """
+    Append-only plain-text view for streamed reasoning. Deltas are inserted at
+    the end cursor at most once per frame, and only the last
+    THINKING_VIEW_MAX_CHARS are kept in the document.
+    """
+    def __init__(self, parent=None, max_chars=THINKING_VIEW_MAX_CHARS):
+        super().__init__(parent)
+        self.setStyleSheet("background: transparent; border: none; color: #6b7280; font-size: 13px; font-family: 'Segoe UI', sans-serif;")
+        self.document().setDocumentMargin(0)
+        self.max_chars = max_chars
+        self.chunks = [] # Full reasoning, including collapsed text
+        self.collapsed_chars = 0
+        self._pending = []
+        self._shown_chars = 0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(16)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append_text(self, text):
+        if not text: return
+        self._pending.append(text)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def full_text(self):
+        return "".join(self.chunks) + "".join(self._pending)
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending: return
+        text = "".join(self._pending)
+        self._pending = []
+        self.chunks.append(text)
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self._shown_chars += len(text)
+
+        # Trim in steps of 20% so the front of the document is not edited on every frame
+        if self.max_chars and self._shown_chars > self.max_chars * 1.2:
+            self._collapse(self._shown_chars - self.max_chars)
+
+    def _collapse(self, count):
+        cursor = QTextCursor(self.document())
+        if self.collapsed_chars:
+            # Drop the previous notice line along with the text
+            cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor)
+        cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, count)
+        cursor.removeSelectedText()
+        self._shown_chars -= count
+        self.collapsed_chars += count
+        cursor.insertText(f"…（已折叠前 {self.collapsed_chars} 字，右键可展开）\n")
+
+    def expand(self):
+        """Show the full reasoning, including collapsed text."""
+        self.flush()
+        self.max_chars = None
+        self.collapsed_chars = 0
+        self.setPlainText("".join(self.chunks))
+        self._shown_chars = self.document().characterCount()
+
+    def build_context_menu(self):
+        menu = super().build_context_menu()
+        if self.collapsed_chars:
+            action_expand = QAction("展开全部思考内容", self)
+            action_expand.setIcon(qta.icon('fa5s.expand', color='#4b5563'))
+            action_expand.triggered.connect(self.expand)
+            menu.addAction(action_expand)
+        return menu
+
 class AutoResizingInputEdit(QTextEdit):
     returnPressed = Signal()
 
@@ -885,6 +975,70 @@ class SystemToast(QFrame):
             }}
         """)
 
+MARKDOWN_STYLE = """
+<style>
+   body { 
+       font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif;
+       line-height: 1.6; 
+       color: #1f2937; 
+       margin: 0; 
+       font-size: 14px;
+   }
+   p { margin-top: 0; margin-bottom: 12px; }
+   pre { 
+       background-color: #f3f4f6; 
+       padding: 12px; 
+       border-radius: 6px; 
+       border: 1px solid #e5e7eb; 
+       white-space: pre-wrap; 
+       margin-bottom: 12px;
+       font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace;
+   }
+   code { 
+       font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; 
+       font-size: 90%; 
+       padding: 0.2em 0.4em; 
+       background-color: #f3f4f6; 
+       border-radius: 4px; 
+   }
+   h1, h2, h3 { color: #111827; font-weight: 600; margin-top: 24px; margin-bottom: 12px; }
+   h1 { font-size: 1.5em; border-bottom: 1px solid #e5e7eb; padding-bottom: 0.3em; }
+   h2 { font-size: 1.3em; }
+   a { color: #2563eb; text-decoration: none; }
+   blockquote { 
+       border-left: 3px solid #d1d5db; 
+       color: #4b5563; 
+       padding-left: 1em; 
+       margin: 0 0 16px 0; 
+   }
+   table { 
+       border-collapse: separate; 
+       border-spacing: 0; 
+       width: 100%; 
+       margin-bottom: 16px; 
+       font-size: 13px; 
+       border: 1px solid #e5e7eb;
+       border-radius: 6px;
+       overflow: hidden;
+   }
+   th, td { 
+       border-bottom: 1px solid #e5e7eb; 
+       border-right: 1px solid #e5e7eb; 
+       padding: 8px 12px; 
+       text-align: left; 
+   }
+   th { 
+       background-color: #f8fafc; 
+       font-weight: 600; 
+       color: #4b5563;
+       border-bottom: 1px solid #e5e7eb;
+   }
+   tr:last-child td { border-bottom: none; }
+   tr:hover td { background-color: #f8fafc; }
+   th:last-child, td:last-child { border-right: none; }
+</style>
+"""
+
 class ChatBubble(QFrame):
     """Refined Chat Bubble component with Avatar and Better Thinking UI"""
     def __init__(self, role, text, thinking=None, duration=None):
@@ -1040,6 +1194,13 @@ class ChatBubble(QFrame):
             self.content_edit = AutoResizingTextEdit()
             self.content_edit.setStyleSheet("background: transparent; border: none; padding: 0;")
             col_layout.addWidget(self.content_edit)
+            # Streamed content is re-rendered at most once per frame (~60 fps)
+            self.content_stream = MarkdownStream()
+            self.pending_content = ""
+            self.content_timer = QTimer(self)
+            self.content_timer.setSingleShot(True)
+            self.content_timer.setInterval(16)
+            self.content_timer.timeout.connect(self._render_streamed_content)
             
             # 3. Sub-Agent Indicators
             self.sub_agent_indicators = QWidget()
@@ -1316,25 +1477,27 @@ class ChatBubble(QFrame):
             if count > 0:
                 item = self.think_container_layout.itemAt(count - 1)
                 widget = item.widget()
-                if isinstance(widget, AutoResizingLabel):
+                if isinstance(widget, ThinkingTextView):
                     return widget
 
-        new_widget = AutoResizingLabel()
+        new_widget = ThinkingTextView()
         self.think_container_layout.addWidget(new_widget)
         new_widget.show()
         return new_widget
 
     def update_thinking(self, text=None, duration=None, is_final=False):
         if text is not None:
-            # Simple streaming append for now
-            widget = self.get_active_think_widget()
-            current = widget.text()
-            widget.setText(current + text)
+            # Appended at the end cursor, coalesced per frame
+            self.get_active_think_widget().append_text(text)
         
         if duration:
             self.think_duration = duration
         
         if is_final:
+            count = self.think_container_layout.count()
+            widget = self.think_container_layout.itemAt(count - 1).widget() if count else None
+            if isinstance(widget, ThinkingTextView):
+                widget.flush()
             if self.think_timer.isActive():
                 self.think_timer.stop()
                 self.think_start_time = None
@@ -1343,76 +1506,28 @@ class ChatBubble(QFrame):
             self.think_toggle_btn.setChecked(False) # Collapse by default when done
             
     def set_main_content(self, text):
+        """Full render of the content (initial text, or the final text once a stream ends)."""
+        self.content_timer.stop()
+        self.content_stream.reset()
         try:
-            # GitHub-like CSS for Markdown
-            style = """
-            <style>
-               body { 
-                   font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif;
-                   line-height: 1.6; 
-                   color: #1f2937; 
-                   margin: 0; 
-                   font-size: 14px;
-               }
-               p { margin-top: 0; margin-bottom: 12px; }
-               pre { 
-                   background-color: #f3f4f6; 
-                   padding: 12px; 
-                   border-radius: 6px; 
-                   border: 1px solid #e5e7eb; 
-                   white-space: pre-wrap; 
-                   margin-bottom: 12px;
-                   font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace;
-               }
-               code { 
-                   font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; 
-                   font-size: 90%; 
-                   padding: 0.2em 0.4em; 
-                   background-color: #f3f4f6; 
-                   border-radius: 4px; 
-               }
-               h1, h2, h3 { color: #111827; font-weight: 600; margin-top: 24px; margin-bottom: 12px; }
-               h1 { font-size: 1.5em; border-bottom: 1px solid #e5e7eb; padding-bottom: 0.3em; }
-               h2 { font-size: 1.3em; }
-               a { color: #2563eb; text-decoration: none; }
-               blockquote { 
-                   border-left: 3px solid #d1d5db; 
-                   color: #4b5563; 
-                   padding-left: 1em; 
-                   margin: 0 0 16px 0; 
-               }
-               table { 
-                   border-collapse: separate; 
-                   border-spacing: 0; 
-                   width: 100%; 
-                   margin-bottom: 16px; 
-                   font-size: 13px; 
-                   border: 1px solid #e5e7eb;
-                   border-radius: 6px;
-                   overflow: hidden;
-               }
-               th, td { 
-                   border-bottom: 1px solid #e5e7eb; 
-                   border-right: 1px solid #e5e7eb; 
-                   padding: 8px 12px; 
-                   text-align: left; 
-               }
-               th { 
-                   background-color: #f8fafc; 
-                   font-weight: 600; 
-                   color: #4b5563;
-                   border-bottom: 1px solid #e5e7eb;
-               }
-               tr:last-child td { border-bottom: none; }
-               tr:hover td { background-color: #f8fafc; }
-               th:last-child, td:last-child { border-right: none; }
-            </style>
-            """
-            html_content = markdown.markdown(text, extensions=['fenced_code', 'tables', 'nl2br', 'sane_lists'])
-            self.content_edit.setHtml(style + html_content)
+            self.content_edit.setHtml(MARKDOWN_STYLE + render_markdown(text))
         except Exception:
             self.content_edit.setPlainText(text)
         self.content_edit.adjustHeight()
+
+    def stream_main_content(self, text):
+        """Streaming update with the accumulated text; rendered at most once per frame."""
+        self.pending_content = text
+        if not self.content_timer.isActive():
+            self.content_timer.start()
+
+    def _render_streamed_content(self):
+        try:
+            # Completed blocks are cached; only the trailing open block is re-rendered
+            self.content_edit.setHtml(MARKDOWN_STYLE + self.content_stream.html(self.pending_content))
+        except Exception:
+            self.content_edit.setPlainText(self.pending_content)
+        self.content_edit.adjustHeight()
         
     def add_tool_card(self, card_widget, session_id=None):
         # Tools inside thinking container? Or after?
@@ -1868,6 +1983,9 @@ class SubAgentMonitorWindow(QDialog):
         self.monitor = SubAgentMonitor()
         layout.addWidget(self.monitor)
 
+# Sessions listed in the history sidebar per page
+HISTORY_LIST_PAGE_SIZE = 50
+
 class SessionState:
     def __init__(self, session_id, chat_layout, active_skills_label, session_widget, chat_scroll):
         self.session_id = session_id
@@ -1884,7 +2002,11 @@ class SessionState:
         self.chat_scroll = chat_scroll
         self.empty_state = None
         self.displayed_count = 0
+        self.history_offset = 0 # Number of older stored messages not loaded into `messages`
         self.load_more_btn = None
+        self.metrics_label = None
+        # Parks off-screen transcript widgets behind fixed-height placeholders
+        self.virtualizer = TranscriptVirtualizer(chat_scroll, chat_layout) if chat_scroll else None
 
 class SmartSplitterHandle(QSplitterHandle):
     def __init__(self, orientation, parent):
@@ -2126,12 +2248,21 @@ class MainWindow(QMainWindow):
         self.current_selected_tool_id = None
         
         self.config_manager = ConfigManager()
-        self.skill_manager = SkillManager(None, self.config_manager)
+        # Shared with every LLMWorker, so skills are only loaded once per process
+        self.skill_manager = SkillRegistry.instance(self.config_manager).manager
+        # Start warm Python interpreters for code execution in the background
+        PythonPool.instance(self.config_manager).warm()
+        # Document text extracted by the file-system skill is cached on disk, with the configured size cap
+        ExtractionCache.instance(self.config_manager)
         self.skill_generator = SkillGenerator(self.config_manager)
         
         # Animation Throttling
         self.last_message_time = 0
 
+        # Worker events reach the widgets once per frame; background tabs less often
+        self.update_scheduler = UpdateScheduler(
+            is_foreground=lambda session_id: session_id == self.current_session_id, parent=self)
+
         # Connect to Interaction Bridge
         bridge.request_confirmation_signal.connect(self.handle_confirmation_request)
 
@@ -2188,6 +2319,17 @@ class MainWindow(QMainWindow):
         history_label.setStyleSheet("color: #6b7280; font-size: 12px; font-weight: 600; margin-top: 12px;")
         sidebar_layout.addWidget(history_label)
 
+        self.history_search = QLineEdit()
+        self.history_search.setPlaceholderText("搜索历史 (skill: workspace: since: until:)")
+        self.history_search.setToolTip("按内容搜索所有会话和工具结果。\n过滤: skill:技能名  workspace:路径或 current  since:2024-01-01  until:2024-12-31")
+        self.history_search.setClearButtonEnabled(True)
+        self.history_search_timer = QTimer(self)
+        self.history_search_timer.setSingleShot(True)
+        self.history_search_timer.setInterval(250)
+        self.history_search_timer.timeout.connect(self.refresh_history_list)
+        self.history_search.textChanged.connect(self.history_search_timer.start)
+        sidebar_layout.addWidget(self.history_search)
+
         self.history_scroll = QScrollArea()
         self.history_scroll.setWidgetResizable(True)
         self.history_container = QWidget()
@@ -2309,6 +2451,22 @@ class MainWindow(QMainWindow):
         self.preview_pixmap = None
         
         preview_layout.addWidget(self.preview_stack)
+
+        self.preview_more_btn = QPushButton("加载更多")
+        self.preview_more_btn.setCursor(Qt.PointingHandCursor)
+        self.preview_more_btn.setStyleSheet(f"border: none; background: transparent; color: {DesignTokens.primary}; font-size: 12px; padding: 6px;")
+        self.preview_more_btn.clicked.connect(self.load_more_preview)
+        self.preview_more_btn.hide()
+        preview_layout.addWidget(self.preview_more_btn)
+
+        # Files are read and images decoded off the GUI thread; thumbnails are cached on disk
+        self.preview_service = PreviewService(os.path.join(self.config_manager.data_dir, "thumbnails"), parent=self)
+        self.preview_service.text_ready.connect(self.on_preview_text)
+        self.preview_service.image_ready.connect(self.on_preview_image)
+        self.preview_service.failed.connect(self.on_preview_failed)
+        self.preview_job = None
+        self.preview_path = None
+        self.preview_next_offset = None
         
         self.right_inner_splitter.addWidget(preview_container)
         self.right_inner_splitter.setStretchFactor(0, 2)
@@ -2497,6 +2655,10 @@ class MainWindow(QMainWindow):
         self.data_dir = get_app_data_dir()
         self.chat_history_dir = self.config_manager.get_chat_history_dir()
         os.makedirs(self.chat_history_dir, exist_ok=True)
+        # Chat history lives in one SQLite database; old per-session JSON files are imported once
+        self.history_store = HistoryStore(os.path.join(self.chat_history_dir, "history.db"))
+        self.history_store.import_json_dir(self.chat_history_dir)
+        self.history_list_limit = HISTORY_LIST_PAGE_SIZE
         
         self.create_new_session()
         self.refresh_history_list()
@@ -2595,6 +2757,8 @@ class MainWindow(QMainWindow):
         state = self.sessions.get(session_id)
         if not state: return
         self.current_session_id = session_id
+        # Bring the tab up to date before it is shown
+        self.update_scheduler.flush(session_id)
         self.messages = state.messages
         self.tool_cards = state.tool_cards
         self.current_content_buffer = state.current_content_buffer
@@ -2646,6 +2810,10 @@ class MainWindow(QMainWindow):
             if state.llm_worker: state.llm_worker.stop()
             if state.code_worker: state.code_worker.stop()
             del self.sessions[session_id]
+        self.update_scheduler.discard(session_id)
+        # Free the persistent Python kernel of the session, if it started one
+        SessionKernels.instance(self.config_manager).shutdown(session_id)
+        MetricsSink.instance().discard_session(session_id)
         self.session_tabs.removeTab(index)
         if self.session_tabs.count() == 0: self.create_new_session()
 
@@ -2668,11 +2836,13 @@ class MainWindow(QMainWindow):
         state = self.sessions.get(session_id)
         if not state: return
         title = "新对话"
-        for msg in state.messages:
-            if msg.get("role") == "user":
-                content = msg.get("content") or ""
-                if content: title = content[:15] + "..." if len(content) > 15 else content
-                break
+        if state.history_offset:
+            # The first user message is not loaded; use the stored title
+            session = self.history_store.get_session(session_id)
+            content = session['title'] if session else ""
+        else:
+            content = session_title(state.messages)
+        if content: title = content[:15] + "..." if len(content) > 15 else content
         index = self.session_tabs.indexOf(state.session_widget)
         if index >= 0: self.session_tabs.setTabText(index, title)
 
@@ -2687,6 +2857,12 @@ class MainWindow(QMainWindow):
         active_skills_label.setStyleSheet("color: #9ca3af; font-size: 11px; margin-left: 12px;")
         session_layout.addWidget(active_skills_label)
 
+        # Latency / token metrics of the last LLM turn, plus session totals
+        metrics_label = QLabel("")
+        metrics_label.setStyleSheet("color: #9ca3af; font-size: 11px; margin-left: 12px;")
+        metrics_label.hide()
+        session_layout.addWidget(metrics_label)
+
         chat_scroll = QScrollArea()
         chat_scroll.setWidgetResizable(True)
         chat_container = QWidget()
@@ -2706,7 +2882,10 @@ class MainWindow(QMainWindow):
         tab_index = self.session_tabs.addTab(session_widget, tab_title)
 
         state = SessionState(session_id, chat_layout, active_skills_label, session_widget, chat_scroll)
+        if state.virtualizer:
+            state.virtualizer.release = lambda widget, s=state: self.release_transcript_widget(s, widget)
         state.empty_state = empty_state
+        state.metrics_label = metrics_label
         self.sessions[session_id] = state
         self.session_tabs.setCurrentIndex(tab_index)
         self.set_current_session(session_id)
@@ -2772,42 +2951,82 @@ class MainWindow(QMainWindow):
         while self.history_layout.count():
             item = self.history_layout.takeAt(0)
             if item.widget(): item.widget().deleteLater()
-        
-        history_dir = self.chat_history_dir
-        if not os.path.exists(history_dir):
-            self.history_layout.addStretch()
-            return
 
-        files = glob.glob(os.path.join(history_dir, 'chat_history_*.json'))
-        files.sort(key=os.path.getmtime, reverse=True)
+        query = self.history_search.text().strip()
+        if query:
+            self.show_history_search_results(query)
+            return
+        
+        # Titles come from the session index; one extra row tells whether there are more
+        sessions = self.history_store.list_sessions(limit=self.history_list_limit + 1)
+        for session in sessions[:self.history_list_limit]:
+            content = session['title']
+            title = (content[:15] + "..." if len(content) > 15 else content) or "新对话"
+            session_id = session['id']
+            
+            btn = QPushButton(title)
+            btn.setCursor(Qt.PointingHandCursor)
+            if session_id == self.current_session_id:
+                 btn.setStyleSheet("text-align: left; padding: 10px; border: none; border-radius: 8px; background-color: #eff6ff; color: #1d4ed8; font-weight: 600;")
+            else:
+                 btn.setStyleSheet("text-align: left; padding: 10px; border: none; border-radius: 8px; background-color: transparent; color: #4b5563;")
+            
+            btn.clicked.connect(lambda checked=False, sid=session_id: self.load_session(sid))
+            self.history_layout.addWidget(btn)
+        
+        if len(sessions) > self.history_list_limit:
+            more_btn = QPushButton("显示更多会话")
+            more_btn.setCursor(Qt.PointingHandCursor)
+            more_btn.setStyleSheet(f"text-align: left; padding: 10px; border: none; background: transparent; color: {DesignTokens.text_secondary}; font-size: 12px;")
+            more_btn.clicked.connect(self.show_more_history_sessions)
+            self.history_layout.addWidget(more_btn)
+        self.history_layout.addStretch()
 
-        for file_path in files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if not data: continue
-                    title = "新对话"
-                    for msg in data:
-                        if msg['role'] == 'user':
-                            content = msg['content']
-                            title = content[:15] + "..." if len(content) > 15 else content
-                            break
-                    filename = os.path.basename(file_path)
-                    session_id = filename.replace('chat_history_', '').replace('.json', '')
-                    
-                    btn = QPushButton(title)
-                    btn.setCursor(Qt.PointingHandCursor)
-                    if session_id == self.current_session_id:
-                         btn.setStyleSheet("text-align: left; padding: 10px; border: none; border-radius: 8px; background-color: #eff6ff; color: #1d4ed8; font-weight: 600;")
-                    else:
-                         btn.setStyleSheet("text-align: left; padding: 10px; border: none; border-radius: 8px; background-color: transparent; color: #4b5563;")
-                    
-                    btn.clicked.connect(lambda checked=False, sid=session_id: self.load_session(sid))
-                    self.history_layout.addWidget(btn)
-            except Exception as e:
-                continue
+    def show_history_search_results(self, query):
+        terms, filters = parse_search_query(query)
+        workspace = filters.get("workspace")
+        if workspace == "current":
+            workspace = self.workspace_dir
+        tools = None
+        if "skill" in filters:
+            tools = [tool for tool, skill in self.skill_manager.tool_to_skill_map.items() if skill == filters["skill"]]
+        try:
+            results = self.history_store.search(terms, limit=HISTORY_LIST_PAGE_SIZE, since=filters.get("since"),
+                                                until=filters.get("until"), workspace=workspace, tools=tools)
+        except Exception as e:
+            print(f"Error searching history: {e}")
+            results = []
+
+        role_names = {"user": "用户", "assistant": "助手", "tool": "工具"}
+        for result in results:
+            title = html.escape(result["title"][:30] or "新对话")
+            snippet = html.escape(" ".join(result["snippet"].split()))
+            snippet = snippet.replace(HIGHLIGHT_START, f"<b style='color: {DesignTokens.primary};'>").replace(HIGHLIGHT_END, "</b>")
+            label = QLabel(f"<a href='{result['session_id']}:{result['seq']}' style='color: #111827; text-decoration: none;'>{title}</a>"
+                           f"<br><span style='color: #6b7280; font-size: 11px;'>{role_names.get(result['role'], '')} · "
+                           f"{time.strftime('%Y-%m-%d', time.localtime(result['created']))}</span>"
+                           f"<br><span style='color: #4b5563;'>{snippet}</span>")
+            label.setTextFormat(Qt.RichText)
+            label.setWordWrap(True)
+            label.setCursor(Qt.PointingHandCursor)
+            label.setStyleSheet("padding: 8px; border-radius: 8px; background-color: transparent;")
+            label.linkActivated.connect(self.open_history_search_result)
+            self.history_layout.addWidget(label)
+
+        if not results:
+            empty_label = QLabel("没有匹配的消息" if terms else "请输入搜索内容")
+            empty_label.setStyleSheet(f"padding: 10px; color: {DesignTokens.text_secondary}; font-size: 12px;")
+            self.history_layout.addWidget(empty_label)
         self.history_layout.addStretch()
 
+    def open_history_search_result(self, link):
+        session_id, seq = link.rsplit(":", 1)
+        self.load_session(session_id, focus_seq=int(seq))
+
+    def show_more_history_sessions(self):
+        self.history_list_limit += HISTORY_LIST_PAGE_SIZE
+        self.refresh_history_list()
+
     def create_load_more_btn(self):
         btn = QPushButton("显示更多历史消息")
         btn.setCursor(Qt.PointingHandCursor)
@@ -2832,7 +3051,7 @@ class MainWindow(QMainWindow):
         if not state: return
         
         PAGE_SIZE = 20
-        total = len(state.messages)
+        total = state.history_offset + len(state.messages)
         remaining = total - state.displayed_count
         if remaining <= 0: return
         
@@ -2840,7 +3059,11 @@ class MainWindow(QMainWindow):
         start_idx = total - state.displayed_count - count_to_load
         end_idx = total - state.displayed_count
         
-        msgs_to_load = state.messages[start_idx:end_idx]
+        # Fetch the page from the store if it was not loaded yet
+        if start_idx < state.history_offset:
+            state.messages[:0] = self.history_store.load_messages(state.session_id, start_idx, state.history_offset)
+            state.history_offset = start_idx
+        msgs_to_load = state.messages[start_idx - state.history_offset:end_idx - state.history_offset]
         
         # Save scroll position
         vbar = state.chat_scroll.verticalScrollBar()
@@ -2863,6 +3086,21 @@ class MainWindow(QMainWindow):
                 state.load_more_btn.deleteLater()
                 state.load_more_btn = None
 
+    def scroll_to_history_message(self, state, seq):
+        """Scroll so the transcript widget of stored message `seq` is at the top of the chat view."""
+        anchor = self.history_store.anchor_seq(state.session_id, seq)
+        # Count the widgets rendered for the messages before the anchor
+        widget_index = 1 if state.load_more_btn else 0
+        for msg in state.messages[:max(0, anchor - state.history_offset)]:
+            if msg.get('role') == 'user':
+                widget_index += 1
+            elif msg.get('role') == 'assistant' and (msg.get('content') or msg.get('reasoning') or msg.get('tool_calls')):
+                widget_index += 1 # Tool cards are placed inside the assistant bubble
+        state.chat_layout.activate()
+        item = state.chat_layout.itemAt(widget_index)
+        if item is not None:
+            state.chat_scroll.verticalScrollBar().setValue(item.geometry().top())
+
     def render_message_batch(self, messages, session_id, insert_index=None, animate=True):
         state = self.get_session(session_id)
         if not state: return
@@ -2877,7 +3115,8 @@ class MainWindow(QMainWindow):
             reasoning = msg.get('reasoning')
             
             if role == 'user':
-                self.add_chat_bubble('User', content, index=current_idx, animate=animate)
+                bubble = self.add_chat_bubble('User', content, index=current_idx, animate=animate)
+                if bubble: bubble.source_message = msg
                 if current_idx is not None: current_idx += 1
                 state.last_agent_bubble = None
                 
@@ -2885,6 +3124,7 @@ class MainWindow(QMainWindow):
                 bubble = None
                 if content or reasoning or msg.get('tool_calls'):
                     bubble = self.add_chat_bubble('Agent', content, thinking=reasoning, index=current_idx, animate=animate)
+                    if bubble: bubble.source_message = msg
                     if current_idx is not None: current_idx += 1
                 
                 state.last_agent_bubble = bubble
@@ -2917,15 +3157,54 @@ class MainWindow(QMainWindow):
         if insert_index is not None:
              state.last_agent_bubble = backup_last_agent
 
-    def load_session(self, session_id):
+    def build_message_bubble(self, state, msg):
+        """Chat bubble of a stored user/assistant message, with its tool cards and their results."""
+        if msg.get('role') == 'user':
+            bubble = ChatBubble('User', msg.get('content'))
+        else:
+            bubble = ChatBubble('Agent', msg.get('content'), msg.get('reasoning'))
+            tool_calls = msg.get('tool_calls') or []
+            results = {m.get('tool_call_id'): m.get('content') for m in state.messages if m.get('role') == 'tool'} if tool_calls else {}
+            for tc in tool_calls:
+                func = tc.get('function', {})
+                card = ToolCallCard(func.get('name'), func.get('arguments'), tc.get('id'))
+                card.clicked.connect(self.show_tool_details)
+                bubble.add_tool_card(card)
+                if tc.get('id') in results:
+                    card.set_result(results[tc.get('id')])
+                state.tool_cards[tc.get('id')] = card
+        bubble.source_message = msg
+        return bubble
+
+    def release_transcript_widget(self, state, widget):
+        """
+        How to rebuild a parked transcript widget, so the virtualizer can delete it while it
+        is off-screen. None keeps the widget alive: it is still streaming, waits for tool
+        results, or was not built from a stored message (toasts, live turn output).
+        """
+        msg = getattr(widget, 'source_message', None)
+        if msg is None or widget is state.last_agent_bubble or widget is state.temp_thinking_bubble:
+            return None
+        cards = widget.findChildren(ToolCallCard)
+        if any(not card.result for card in cards):
+            return None
+        for card in cards:
+            if state.tool_cards.get(card.tool_id) is card:
+                del state.tool_cards[card.tool_id]
+        return lambda: self.build_message_bubble(state, msg)
+
+    def load_session(self, session_id, focus_seq=None):
         if session_id in self.sessions:
             state = self.sessions[session_id]
             index = self.session_tabs.indexOf(state.session_widget)
             if index >= 0: self.session_tabs.setCurrentIndex(index)
             self.set_current_session(session_id)
-            self.refresh_history_list()
-            self.normalize_session_ui(self.get_current_session())
-            return
+            if focus_seq is None or (state.llm_worker and state.llm_worker.isRunning()):
+                self.refresh_history_list()
+                self.normalize_session_ui(self.get_current_session())
+                return
+            # Jumping to a search result: re-render the open session from the stored history
+            self.save_chat_history(session_id)
         else:
             self.create_new_session(session_id=session_id)
 
@@ -2935,37 +3214,43 @@ class MainWindow(QMainWindow):
         self.clear_chat_layout(state.chat_layout)
         state.empty_state = None # Reset empty state reference
         
-        state.messages = []
+        state.messages.clear()
+        state.history_offset = 0
         state.tool_cards = {}
         state.current_content_buffer = ""
         state.temp_thinking_bubble = None
         state.last_agent_bubble = None
         state.llm_worker = None
         state.active_skills_label.setText("本次会话使用的功能: ")
+        if state.metrics_label:
+            state.metrics_label.hide()
         state.displayed_count = 0
         state.load_more_btn = None
 
-        history_path = os.path.join(self.chat_history_dir, f'chat_history_{session_id}.json')
-        if os.path.exists(history_path):
+        total = self.history_store.message_count(session_id)
+        if total:
             try:
-                with open(history_path, 'r', encoding='utf-8') as f:
-                    state.messages = json.load(f)
-                
-                # Pagination: Load last 20 messages
+                # Pagination: only the last 20 messages are read; older ones are fetched on demand
                 PAGE_SIZE = 20
-                total = len(state.messages)
-                start_idx = max(0, total - PAGE_SIZE)
+                start = max(0, total - PAGE_SIZE)
+                if focus_seq is not None:
+                    # A search result further back: start the transcript at the matching message
+                    start = min(start, self.history_store.anchor_seq(session_id, focus_seq))
+                state.messages[:] = self.history_store.load_messages(session_id, start)
+                state.history_offset = start
                 
-                display_msgs = state.messages[start_idx:]
+                display_msgs = state.messages
                 state.displayed_count = len(display_msgs)
                 
                 # Add Load More button if needed
-                if start_idx > 0:
+                if state.history_offset > 0:
                     btn = self.create_load_more_btn()
                     state.load_more_btn = btn
                     state.chat_layout.addWidget(btn) # Add to top (since layout is empty)
                 
                 self.render_message_batch(display_msgs, session_id, animate=False)
+                if focus_seq is not None:
+                    QTimer.singleShot(0, lambda s=state, seq=focus_seq: self.scroll_to_history_message(s, seq))
                 
             except Exception as e:
                 print(f"Error loading session: {e}")
@@ -3018,14 +3303,21 @@ class MainWindow(QMainWindow):
         self.create_new_session()
         self.refresh_history_list()
 
-    def save_chat_history(self):
-        state = self.get_current_session()
+    def save_chat_history(self, session_id=None):
+        state = self.get_session(session_id)
         if not state or not state.messages: return
-        history_path = os.path.join(self.chat_history_dir, f'chat_history_{state.session_id}.json')
         try:
-            with open(history_path, 'w', encoding='utf-8') as f:
-                json.dump(state.messages, f, ensure_ascii=False, indent=2)
-        except Exception: pass
+            # Only the messages added since the last save are written
+            self.history_store.sync_session(state.session_id, state.messages, start=state.history_offset,
+                                            workspace=self.workspace_dir)
+        except Exception as e:
+            print(f"Error saving chat history: {e}")
+
+    def ensure_full_history(self, state):
+        """Load the older messages of a paged session; the model needs the whole conversation."""
+        if state.history_offset:
+            state.messages[:0] = self.history_store.load_messages(state.session_id, 0, state.history_offset)
+            state.history_offset = 0
 
     def load_default_workspace(self):
         default_dir = self.config_manager.get("default_workspace", "")
@@ -3135,32 +3427,56 @@ class MainWindow(QMainWindow):
         path = self.file_model.filePath(index)
         if not os.path.isfile(path): return
         ext = os.path.splitext(path)[1].lower()
-        image_exts = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp"}
-        try:
-            size = os.path.getsize(path)
-            if ext in image_exts:
-                if size > 10 * 1024 * 1024:
-                    self.preview_text.setPlainText("文件过大")
-                    self.preview_stack.setCurrentWidget(self.preview_text)
-                    return
-                pixmap = QPixmap(path)
-                self.preview_pixmap = pixmap
-                scaled = pixmap.scaled(self.preview_stack.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.preview_image.setPixmap(scaled)
-                self.preview_stack.setCurrentWidget(self.preview_image)
-                return
-            if size > 1024 * 1024:
-                self.preview_text.setPlainText("文件过大")
-                self.preview_stack.setCurrentWidget(self.preview_text)
+        self.preview_path = path
+        self.preview_next_offset = None
+        self.preview_more_btn.hide()
+        if ext in IMAGE_EXTS:
+            cached = self.preview_service.cached_image(path, self.preview_stack.size())
+            if cached is not None:
+                self.preview_service.cancel()
+                self.preview_job = None
+                self.show_preview_image(cached)
                 return
-            try:
-                with open(path, 'r', encoding='utf-8') as f: content = f.read()
-                self.preview_text.setPlainText(content)
-                self.preview_stack.setCurrentWidget(self.preview_text)
-            except UnicodeDecodeError:
-                self.preview_text.setPlainText("二进制文件")
-                self.preview_stack.setCurrentWidget(self.preview_text)
-        except Exception: pass
+            self.preview_job = self.preview_service.request_image(path, self.preview_stack.size())
+        else:
+            self.preview_job = self.preview_service.request_text(path)
+        self.preview_text.setPlainText("加载中...")
+        self.preview_stack.setCurrentWidget(self.preview_text)
+
+    def load_more_preview(self):
+        if self.preview_path and self.preview_next_offset is not None:
+            self.preview_more_btn.setEnabled(False)
+            self.preview_job = self.preview_service.request_text(self.preview_path, self.preview_next_offset)
+
+    def on_preview_text(self, job_id, text, next_offset):
+        if job_id != self.preview_job: return
+        if self.preview_next_offset is None:
+            self.preview_text.setPlainText(text)
+        else:
+            cursor = self.preview_text.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+        self.preview_next_offset = next_offset
+        self.preview_more_btn.setEnabled(True)
+        self.preview_more_btn.setVisible(next_offset is not None)
+        self.preview_stack.setCurrentWidget(self.preview_text)
+
+    def on_preview_image(self, job_id, image):
+        if job_id != self.preview_job: return
+        self.show_preview_image(image)
+
+    def show_preview_image(self, image):
+        # The thumbnail is already close to the view size, so this scale is cheap
+        self.preview_pixmap = QPixmap.fromImage(image)
+        scaled = self.preview_pixmap.scaled(self.preview_stack.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.preview_image.setPixmap(scaled)
+        self.preview_stack.setCurrentWidget(self.preview_image)
+
+    def on_preview_failed(self, job_id, message):
+        if job_id != self.preview_job: return
+        self.preview_more_btn.hide()
+        self.preview_text.setPlainText("二进制文件" if message == BINARY_FILE else f"无法预览: {message}")
+        self.preview_stack.setCurrentWidget(self.preview_text)
 
     def open_settings(self):
         SettingsDialog(self.config_manager, self).exec()
@@ -3168,6 +3484,33 @@ class MainWindow(QMainWindow):
     def open_skills_center(self):
         SkillsCenterDialog(self.skill_manager, self.config_manager, self).exec()
 
+    def handle_metrics(self, data, session_id=None):
+        state = self.get_session(session_id)
+        if not state or not state.metrics_label: return
+        record = data.get("record", {})
+        # Tool records only update the totals; the line itself tracks LLM turns
+        if record.get("type") != "turn" or record.get("agent_id") != "Main": return
+        totals = data.get("totals", {})
+
+        parts = []
+        if record.get("ttft") is not None:
+            parts.append(f"首字 {record['ttft']:.2f}s")
+        if record.get("tokens_per_sec"):
+            parts.append(f"{record['tokens_per_sec']:.0f} tok/s")
+        prompt_tokens = record.get("prompt_tokens")
+        if prompt_tokens:
+            parts.append(f"输入 {prompt_tokens} / 输出 {record.get('completion_tokens') or 0} tokens")
+        if record.get("cache_hit_ratio") is not None:
+            parts.append(f"缓存命中 {record['cache_hit_ratio']:.0%}")
+        parts.append(
+            f"会话累计: {totals.get('turns', 0)} 轮, {totals.get('prompt_tokens', 0) + totals.get('completion_tokens', 0)} tokens, "
+            f"LLM {totals.get('llm_time', 0):.1f}s, 工具 {totals.get('tool_time', 0):.1f}s"
+            + (f", 缓存命中 {totals['cache_hit_ratio']:.0%}" if totals.get("cache_hit_ratio") is not None else "")
+            + (f", 工具精简节省 ~{totals['tool_tokens_saved']} tokens" if totals.get("tool_tokens_saved") else "")
+        )
+        state.metrics_label.setText("性能: " + " · ".join(parts))
+        state.metrics_label.show()
+
     def handle_skill_used(self, skill_name, session_id=None):
         state = self.get_session(session_id)
         if not state: return
@@ -3219,13 +3562,16 @@ class MainWindow(QMainWindow):
         user_text = self.input_field.toPlainText().strip()
         if not user_text: return
 
-        self.add_chat_bubble("User", user_text)
+        bubble = self.add_chat_bubble("User", user_text)
         self.input_field.clear()
         
         state = self.get_current_session()
         if not state: return
-        state.messages.append({"role": "user", "content": user_text})
-        self.save_chat_history()
+        self.ensure_full_history(state)
+        message = {"role": "user", "content": user_text}
+        state.messages.append(message)
+        if bubble: bubble.source_message = message
+        self.save_chat_history(state.session_id)
         self.update_session_tab_title(state.session_id)
         self.process_agent_logic(user_text)
 
@@ -3294,18 +3640,18 @@ class MainWindow(QMainWindow):
             layout.addWidget(card)
             layout.addStretch()
             
-            # Animation: Fade + Slide
-            opacity_effect = QGraphicsOpacityEffect(wrapper)
-            wrapper.setGraphicsEffect(opacity_effect)
-            
             if index is not None:
                 state.chat_layout.insertWidget(index, wrapper)
             else:
                 state.chat_layout.insertWidget(state.chat_layout.count() - 1, wrapper)
             
-            QApplication.processEvents()
+            # Lay out the new card (for the slide animation) without running the event loop
+            state.chat_layout.activate()
             
             if animate:
+                # Animation: Fade + Slide
+                opacity_effect = QGraphicsOpacityEffect(wrapper)
+                wrapper.setGraphicsEffect(opacity_effect)
                 opacity_effect.setOpacity(0)
                 fade_anim = QPropertyAnimation(opacity_effect, b"opacity", wrapper)
                 fade_anim.setDuration(350)
@@ -3322,11 +3668,9 @@ class MainWindow(QMainWindow):
                 group = QParallelAnimationGroup(wrapper)
                 group.addAnimation(fade_anim)
                 group.addAnimation(slide_anim)
+                # An opacity effect renders the widget offscreen on every repaint; drop it once faded in
+                group.finished.connect(lambda w=wrapper: w.setGraphicsEffect(None))
                 group.start(QAbstractAnimation.DeleteWhenStopped)
-            else:
-                opacity_effect.setOpacity(1.0)
-            
-        QApplication.processEvents()
 
     def update_tool_card(self, data, session_id=None):
         tool_id = data['id']
@@ -3362,18 +3706,18 @@ class MainWindow(QMainWindow):
             
         bubble = ChatBubble(role, text, thinking, duration)
         
-        # Animation: Fade + Slide
-        opacity_effect = QGraphicsOpacityEffect(bubble)
-        bubble.setGraphicsEffect(opacity_effect)
-        
         if index is not None:
             state.chat_layout.insertWidget(index, bubble)
         else:
             state.chat_layout.insertWidget(state.chat_layout.count() - 1, bubble)
         
-        QApplication.processEvents() 
+        # Lay out the new bubble (for the slide animation) without running the event loop
+        state.chat_layout.activate()
         
         if animate:
+            # Animation: Fade + Slide
+            opacity_effect = QGraphicsOpacityEffect(bubble)
+            bubble.setGraphicsEffect(opacity_effect)
             opacity_effect.setOpacity(0)
             fade_anim = QPropertyAnimation(opacity_effect, b"opacity", bubble)
             fade_anim.setDuration(350)
@@ -3390,15 +3734,14 @@ class MainWindow(QMainWindow):
             group = QParallelAnimationGroup(bubble)
             group.addAnimation(fade_anim)
             group.addAnimation(slide_anim)
+            # An opacity effect renders the widget offscreen on every repaint; drop it once faded in
+            group.finished.connect(lambda w=bubble: w.setGraphicsEffect(None))
             group.start(QAbstractAnimation.DeleteWhenStopped)
-        else:
-            opacity_effect.setOpacity(1.0)
         
-        # Scroll to bottom only if appending
+        # Scroll to bottom only if appending (once the scroll area has resized to the new content)
         if index is None and hasattr(state, 'chat_scroll') and state.chat_scroll:
-            state.chat_scroll.verticalScrollBar().setValue(
-                state.chat_scroll.verticalScrollBar().maximum()
-            )
+            vbar = state.chat_scroll.verticalScrollBar()
+            QTimer.singleShot(0, vbar, lambda: vbar.setValue(vbar.maximum()))
             
         return bubble
 
@@ -3407,7 +3750,6 @@ class MainWindow(QMainWindow):
         if not state: return
         toast = SystemToast(text, type)
         state.chat_layout.insertWidget(state.chat_layout.count() - 1, toast)
-        QApplication.processEvents()
         if auto_close_ms: QTimer.singleShot(auto_close_ms, toast.deleteLater)
 
     def append_log(self, text):
@@ -3416,31 +3758,47 @@ class MainWindow(QMainWindow):
     def process_agent_logic(self, user_text):
         state = self.get_current_session()
         if not state: return
+        self.ensure_full_history(state)
         state.current_content_buffer = ""
         
         # Insert "Thinking" bubble
         state.temp_thinking_bubble = ChatBubble("agent", "", thinking="...")
         state.chat_layout.insertWidget(state.chat_layout.count()-1, state.temp_thinking_bubble)
-        QApplication.processEvents()
 
-        state.llm_worker = LLMWorker(state.messages, self.config_manager, self.workspace_dir)
+        state.llm_worker = LLMWorker(state.messages, self.config_manager, self.workspace_dir, session_id=state.session_id)
         if state.session_id == self.current_session_id:
             self.llm_worker = state.llm_worker
         session_id = state.session_id
         state.llm_worker.finished_signal.connect(lambda result, sid=session_id: self.handle_llm_response(result, sid))
-        state.llm_worker.content_signal.connect(lambda text, sid=session_id: self.handle_content_signal(text, sid))
-        state.llm_worker.step_signal.connect(self.append_log)
-        state.llm_worker.thinking_signal.connect(lambda text, sid=session_id: self.handle_thinking_signal(text, sid))
-        state.llm_worker.skill_used_signal.connect(lambda name, sid=session_id: self.handle_skill_used(name, sid))
-        state.llm_worker.tool_call_signal.connect(lambda data, sid=session_id: self.add_tool_card(data, sid))
-        state.llm_worker.tool_result_signal.connect(lambda data, sid=session_id: self.update_tool_card(data, sid))
-        state.llm_worker.output_signal.connect(lambda text, sid=session_id: self.handle_worker_output(text, sid))
-        state.llm_worker.agent_state_signal.connect(lambda data, sid=session_id: self.handle_agent_state(data, sid))
+        # Everything else goes through the frame scheduler, in emission order
+        state.llm_worker.content_signal.connect(self.scheduled(session_id, "content", self.handle_content_signal, concat))
+        state.llm_worker.step_signal.connect(self.scheduled(session_id, "step", lambda text, sid: self.append_log(text)))
+        state.llm_worker.thinking_signal.connect(self.scheduled(session_id, "thinking", self.handle_thinking_signal, concat))
+        state.llm_worker.skill_used_signal.connect(self.scheduled(session_id, "skill", self.handle_skill_used))
+        state.llm_worker.tool_call_signal.connect(self.scheduled(session_id, "tool_call", self.add_tool_card))
+        state.llm_worker.tool_result_signal.connect(self.scheduled(session_id, "tool_result", self.update_tool_card))
+        state.llm_worker.output_signal.connect(self.scheduled(session_id, "output", self.handle_worker_output))
+        state.llm_worker.agent_state_signal.connect(lambda data, sid=session_id: self.schedule_agent_state(data, sid))
+        state.llm_worker.metrics_signal.connect(self.scheduled(session_id, "metrics", self.handle_metrics))
         state.llm_worker.start()
         
         if state.session_id == self.current_session_id:
              self.normalize_session_ui(state)
 
+    def scheduled(self, session_id, key, handler, merge=None):
+        """Slot that queues handler(value, session_id) on the update scheduler."""
+        return lambda value: self.update_scheduler.post(
+            session_id, key, value, lambda v: handler(v, session_id), merge)
+
+    def schedule_agent_state(self, data, session_id):
+        # Sub-agent reasoning and log deltas stream like content; merge them per agent
+        field = {"thinking": "reasoning_delta", "log": "log_content"}.get(data.get("status"))
+        merge = None
+        if field and isinstance(data.get(field), str):
+            merge = lambda old, new: {**new, field: (old.get(field) or "") + new[field]}
+        self.update_scheduler.post(session_id, ("agent_state", data.get("agent_id"), data.get("status")), data,
+                                   lambda d: self.handle_agent_state(d, session_id), merge)
+
     def handle_worker_output(self, text, session_id=None):
         self.append_log(f"[Worker] {text}")
         # If it looks like an error, show a toast
@@ -3489,9 +3847,9 @@ class MainWindow(QMainWindow):
         if not state: return
         state.current_content_buffer += text
         if state.temp_thinking_bubble:
-            state.temp_thinking_bubble.set_main_content(state.current_content_buffer)
+            state.temp_thinking_bubble.stream_main_content(state.current_content_buffer)
         elif state.last_agent_bubble:
-            state.last_agent_bubble.set_main_content(state.current_content_buffer)
+            state.last_agent_bubble.stream_main_content(state.current_content_buffer)
         if state.session_id == self.current_session_id:
             self.current_content_buffer = state.current_content_buffer
 
@@ -3506,6 +3864,8 @@ class MainWindow(QMainWindow):
     def handle_llm_response(self, result, session_id=None):
         state = self.get_session(session_id)
         if not state: return
+        # Apply the streamed events still queued before finishing the turn
+        self.update_scheduler.flush(session_id)
         is_current = state.session_id == self.current_session_id
         if state.temp_thinking_bubble:
             bubble = state.temp_thinking_bubble
@@ -3543,7 +3903,7 @@ class MainWindow(QMainWindow):
                 "content": content,
                 "reasoning": reasoning
             })
-        self.save_chat_history()
+        self.save_chat_history(state.session_id)
         self.update_session_tab_title(state.session_id)
 
         code_match = re.search(r'```\s*python(.*?)```', content, re.DOTALL | re.IGNORECASE)
@@ -3555,8 +3915,11 @@ class MainWindow(QMainWindow):
             if god_mode:
                  self.add_system_toast("⚠️ God Mode 已启用：正在执行高权限代码，请注意风险", "warning", session_id=state.session_id)
 
-            state.code_worker = CodeWorker(code_block, self.workspace_dir, god_mode=god_mode)
-            state.code_worker.output_signal.connect(lambda text, sid=state.session_id: self.handle_code_output(text, sid))
+            state.code_worker = CodeWorker(code_block, self.workspace_dir, god_mode=god_mode,
+                                           timeout=self.config_manager.get("code_run_timeout", 600),
+                                           max_output_chars=self.config_manager.get("code_output_max_chars", 200000))
+            state.code_worker.output_signal.connect(
+                self.scheduled(state.session_id, "code_output", self.handle_code_output, lambda old, new: old + "\n" + new))
             state.code_worker.finished_signal.connect(lambda sid=state.session_id: self.handle_code_finished(sid))
             state.code_worker.input_request_signal.connect(self.handle_code_input_request)
             
@@ -3581,11 +3944,12 @@ class MainWindow(QMainWindow):
                 state.last_agent_bubble.code_output_edit.setReadOnly(True)
                 state.last_agent_bubble.layout().addWidget(state.last_agent_bubble.code_output_edit)
             
+            # Output arrives in batched chunks, so no need to force a repaint per line
             state.last_agent_bubble.code_output_edit.append(text)
             state.last_agent_bubble.code_output_edit.adjustHeight()
-            QApplication.processEvents()
 
     def handle_code_finished(self, session_id=None):
+        self.update_scheduler.flush(session_id)
         state = self.get_session(session_id)
         if state: state.code_worker = None
         if session_id == self.current_session_id:
@@ -3593,6 +3957,7 @@ class MainWindow(QMainWindow):
             self.normalize_session_ui(state)
 
     def handle_code_input_request(self, prompt):
+        self.update_scheduler.flush() # Show the output that led to the prompt
         if any(k in prompt.lower() for k in ["confirm", "yes/no", "是否"]):
              reply = QMessageBox.question(self, '需要确认', prompt, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
              response = "yes" if reply == QMessageBox.Yes else "no"
@@ -3602,6 +3967,8 @@ class MainWindow(QMainWindow):
         self.code_worker.provide_input(response)
 
 if __name__ == "__main__":
+    # PDF extraction uses worker processes, which re-launch the frozen executable
+    multiprocessing.freeze_support()
     if hasattr(Qt, 'HighDpiScaleFactorRoundingPolicy'):
         QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     
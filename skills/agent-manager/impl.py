@@ -53,7 +53,8 @@ def dispatch_agents(workspace_dir, tasks, _context=None):
              })
 
         # Create Worker
-        worker = LLMWorker(messages, config_manager, workspace_dir, parent_agent_id=agent_id)
+        worker = LLMWorker(messages, config_manager, workspace_dir, parent_agent_id=agent_id,
+                           session_id=_context.get("session_id"))
         
         # Connect signals to a local handler to capture output
         # We use a closure to capture agent_id
@@ -1,11 +1,30 @@
 import os
+import re
+import csv
 import json
+import codecs
+import decimal
+import datetime
 from docx import Document
 from pptx import Presentation
 from pptx.util import Inches
-from pypdf import PdfReader
 from core.env_utils import ensure_package_installed
 from core.interaction import ask_user
+from core.line_index import get_line_index, open_mmap
+from core.extraction_cache import ExtractionCache
+from core.pdf_extract import PdfExtractor, page_count, SCANNED, EMPTY
+from core.context_budget import estimate_tokens
+from core.xlsx_append import append_rows, has_sheet
+
+MAX_READ_BYTES = 100 * 1024 # Most text returned by one read_file call
+# Part of the extraction cache key: bump a version when its extractor's output changes
+EXTRACTOR_VERSIONS = {"docx": "docx-1", "pptx": "pptx-1", "xlsx": "xlsx-2", "pdf": "pdf-2"}
+PDF_MAX_TOKENS = 20000 # Default output budget of one read_pdf call
+EXCEL_PAGE_ROWS = 200 # Default rows per read_excel call
+EXCEL_BLOCK_ROWS = 1000 # Rows per extraction cache part
+EXCEL_SAMPLE_ROWS = 50 # Rows used to infer column types in schema mode
+CSV_INT = re.compile(r"-?(0|[1-9]\d{0,14})")
+CSV_FLOAT = re.compile(r"-?(0|[1-9]\d*)?\.\d+([eE][-+]?\d+)?")
 
 # Lazy import helpers
 def get_openpyxl():
@@ -13,6 +32,11 @@ def get_openpyxl():
     import openpyxl
     return openpyxl
 
+def get_parquet():
+    ensure_package_installed("pyarrow")
+    import pyarrow.parquet
+    return pyarrow.parquet
+
 def _is_god_mode(context):
     if context and 'config_manager' in context:
         return context['config_manager'].get_god_mode()
@@ -81,13 +105,18 @@ def rename_file(workspace_dir, old_path, new_path, _context=None):
     except Exception as e:
         return f"Error: {str(e)}"
 
-def read_file(workspace_dir, path, _context=None):
+def read_file(workspace_dir, path, start_line=0, end_line=0, offset=0, limit=0, tail=0, _context=None):
     """
-    Read the content of a file. Automatically detects file type based on extension.
+    Read a file (Office/PDF formats are detected by extension). Text is paged by start_line/end_line, offset/limit (bytes) or tail (last N lines); the first line of the result gives total lines and bytes and where to continue.
     
     Args:
         workspace_dir (str): The root workspace directory (injected by system).
         path (str): Relative path to the file.
+        start_line (int): First line to read, 1-based (0: from the start).
+        end_line (int): Last line to read, inclusive (0: to the end).
+        offset (int): Byte offset to read from, used when no lines are given.
+        limit (int): Number of bytes to read from `offset` (0: as much as fits).
+        tail (int): Read the last N lines instead.
     """
     try:
         # Check extension first to dispatch to specific readers
@@ -99,21 +128,64 @@ def read_file(workspace_dir, path, _context=None):
         elif ext == '.pptx':
             return read_pptx(workspace_dir, path, _context)
         elif ext == '.xlsx':
-            return read_excel(workspace_dir, path, None, _context)
+            return read_excel(workspace_dir, path, _context=_context)
         elif ext == '.pdf':
-            return read_pdf(workspace_dir, path, _context)
+            return read_pdf(workspace_dir, path, _context=_context)
 
         abs_path = _validate_path(workspace_dir, path, _context, must_exist=True)
         
         if not os.path.isfile(abs_path):
             return f"Error: '{path}' is not a file."
-            
-        with open(abs_path, 'r', encoding='utf-8', errors='replace') as f:
-            return f.read(100 * 1024)
+
+        with open(abs_path, 'rb') as f:
+            mm = open_mmap(f)
+            if mm is None:
+                return f"[{path}: empty file, 0 lines, 0 bytes]"
+            with mm:
+                return _read_text_range(path, f, mm, int(start_line or 0), int(end_line or 0),
+                                        int(offset or 0), int(limit or 0), int(tail or 0))
             
     except Exception as e:
         return f"Error: {str(e)}"
 
+def _read_text_range(path, f, mm, start_line, end_line, offset, limit, tail):
+    size = len(mm)
+    index = get_line_index(f, mm)
+    total = index.total_lines
+
+    if tail > 0:
+        start_line, end_line = max(1, total - tail + 1), total
+    elif not (start_line or end_line or offset or limit):
+        start_line = 1 # Default: whole lines from the start
+    if start_line > 0 or end_line > 0:
+        first = max(start_line, 1)
+        last = min(end_line, total) if end_line > 0 else total
+        if first > total:
+            return f"Error: start_line {first} is past the end of '{path}' ({total} lines)."
+        if last < first:
+            return f"Error: end_line {end_line} is before start_line {first}."
+        begin = index.line_offset(mm, first)
+        stop = index.line_offset(mm, last + 1)
+        if stop - begin > MAX_READ_BYTES:
+            # Return the whole lines that fit (or a part of one very long line)
+            cut = mm.rfind(b"\n", begin, begin + MAX_READ_BYTES)
+            stop = cut + 1 if cut >= 0 else begin + MAX_READ_BYTES
+    else:
+        begin = min(max(offset, 0), size)
+        stop = min(size, begin + min(limit if limit > 0 else MAX_READ_BYTES, MAX_READ_BYTES))
+
+    if begin >= size:
+        return f"Error: offset {begin} is past the end of '{path}' ({size} bytes)."
+    data = mm[begin:stop]
+    first_line = index.line_at(mm, begin)
+    last_line = index.line_at(mm, stop - 1)
+
+    header = f"[{path}: lines {first_line}-{last_line} of {total}, bytes {begin}-{stop} of {size}"
+    if stop < size:
+        header += f"; continue with start_line={last_line + 1}" if data.endswith(b"\n") else f"; continue with offset={stop}"
+    header += "]"
+    return header + "\n" + data.decode('utf-8', errors='replace')
+
 def delete_file(workspace_dir, path, _context=None):
     """
     Delete a file or empty directory.
@@ -144,6 +216,22 @@ def delete_file(workspace_dir, path, _context=None):
 
 # --- Office Suite Functions ---
 
+def _extract(abs_path, kind, func):
+    """(parts, meta) of a document from the shared extraction cache, extracting it on a miss."""
+    return ExtractionCache.instance().extract(abs_path, EXTRACTOR_VERSIONS[kind], func)
+
+def _extract_docx(abs_path):
+    doc = Document(abs_path)
+    return [("", '\n'.join(para.text for para in doc.paragraphs))], {}
+
+def _extract_pptx(abs_path):
+    prs = Presentation(abs_path)
+    parts = []
+    for i, slide in enumerate(prs.slides):
+        slide_text = [shape.text for shape in slide.shapes if hasattr(shape, "text")]
+        parts.append((f"Slide {i+1}", "\n".join(slide_text)))
+    return parts, {}
+
 def read_docx(workspace_dir, path, _context=None):
     """
     Read text content from a DOCX file.
@@ -154,12 +242,8 @@ def read_docx(workspace_dir, path, _context=None):
     """
     try:
         abs_path = _validate_path(workspace_dir, path, _context, must_exist=True)
-            
-        doc = Document(abs_path)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return '\n'.join(full_text)
+        parts, _ = _extract(abs_path, "docx", _extract_docx)
+        return parts[0][1]
     except Exception as e:
         return f"Error reading DOCX: {str(e)}"
 
@@ -200,18 +284,8 @@ def read_pptx(workspace_dir, path, _context=None):
     """
     try:
         abs_path = _validate_path(workspace_dir, path, _context, must_exist=True)
-            
-        prs = Presentation(abs_path)
-        text_content = []
-        
-        for i, slide in enumerate(prs.slides):
-            slide_text = []
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    slide_text.append(shape.text)
-            text_content.append(f"Slide {i+1}:\n" + "\n".join(slide_text))
-            
-        return "\n\n".join(text_content)
+        parts, _ = _extract(abs_path, "pptx", _extract_pptx)
+        return "\n\n".join(f"{label}:\n{text}" for label, text in parts)
     except Exception as e:
         return f"Error reading PPTX: {str(e)}"
 
@@ -255,100 +329,360 @@ def create_pptx(workspace_dir, path, slides_data, _context=None):
     except Exception as e:
         return f"Error creating PPTX: {str(e)}"
 
-def read_excel(workspace_dir, path, sheet_name=None, _context=None):
+def _cell_text(cell):
+    # Convert None to empty string for better display
+    return str(cell) if cell is not None else ""
+
+def _cell_type(values):
+    types = {type(v) for v in values if v is not None and v != ""}
+    if not types:
+        return "empty"
+    if types == {bool}:
+        return "bool"
+    if types == {int}:
+        return "int"
+    if types <= {int, float}:
+        return "float"
+    if all(issubclass(t, (datetime.date, datetime.time)) for t in types):
+        return "datetime"
+    if types == {str}:
+        return "string"
+    return "mixed"
+
+def _excel_schema(path, abs_path, wb, sheet):
+    rows = sheet.iter_rows(max_row=EXCEL_SAMPLE_ROWS + 1, values_only=True)
+    header = [_cell_text(cell) for cell in next(rows, ())]
+    sample = list(rows)
+    # A sheet that has been read to the end knows its row count even without a stored dimension
+    cached = ExtractionCache.instance().get_parts(abs_path, f"{EXTRACTOR_VERSIONS['xlsx']}:{sheet.title}", [])
+    data_rows = (cached and cached[1].get("rows")) or (sheet.max_row - 1 if sheet.max_row else "unknown")
+    lines = [f"[{path} / {sheet.title}: {data_rows} data rows x {len(header)} columns; sheets: {', '.join(wb.sheetnames)}]",
+             "column\ttype\tsample"]
+    for i, name in enumerate(header):
+        values = [row[i] if i < len(row) else None for row in sample]
+        examples = [_cell_text(v) for v in values if v is not None and v != ""][:3]
+        lines.append(f"{name}\t{_cell_type(values)}\t{', '.join(examples)}")
+    return "\n".join(lines)
+
+def _excel_rows(abs_path, sheet_title, start, end, sheet=None):
     """
-    Read data from an Excel file.
+    Data rows [start, end) of a sheet as lists of cell text (row 1 is the header, not counted),
+    plus (header, total data rows or None). Rows come from the extraction cache in blocks; blocks
+    that are missing are streamed from `sheet` once and cached. Without `sheet`, returns None
+    unless everything is cached.
+    """
+    cache = ExtractionCache.instance()
+    version = f"{EXTRACTOR_VERSIONS['xlsx']}:{sheet_title}"
+    blocks = list(range(start // EXCEL_BLOCK_ROWS, (end - 1) // EXCEL_BLOCK_ROWS + 1))
+    cached, meta = cache.get_parts(abs_path, version, blocks) or ({}, {})
+    parts = {b: json.loads(text) for b, (_, text) in cached.items()}
+    total = meta.get("rows")
+    missing = [b for b in blocks if b not in parts and (total is None or b * EXCEL_BLOCK_ROWS < total)]
+
+    if sheet is None:
+        if missing or "header" not in meta:
+            return None
+    elif missing or "header" not in meta:
+        if "header" not in meta:
+            meta["header"] = [_cell_text(cell) for cell in next(sheet.iter_rows(max_row=1, values_only=True), ())]
+        cache.put_parts(abs_path, version, {}, meta)
+        if missing:
+            # Read-only sheets parse every row before min_row anyway, so the stream starts at the top
+            # and caches each block it passes: one deep read warms the whole sheet up to that point.
+            # Blocks are written as they complete; only those of the requested page stay in memory
+            def store(block, rows, meta=None):
+                cache.put_parts(abs_path, version, {block: ("rows", json.dumps(rows, ensure_ascii=False))}, meta)
+                if block in blocks:
+                    parts[block] = rows
+
+            last_row = 1 + (missing[-1] + 1) * EXCEL_BLOCK_ROWS
+            block, rows = 0, []
+            for row in sheet.iter_rows(min_row=2, max_row=last_row, values_only=True):
+                rows.append([_cell_text(cell) for cell in row])
+                if len(rows) == EXCEL_BLOCK_ROWS:
+                    store(block, rows)
+                    block, rows = block + 1, []
+            if rows or block <= missing[-1]:
+                meta["rows"] = total = block * EXCEL_BLOCK_ROWS + len(rows)
+                store(block, rows, meta) # The sheet ended inside this block
+
+    result = []
+    for b in blocks:
+        base = b * EXCEL_BLOCK_ROWS
+        result.extend(parts.get(b, [])[max(start - base, 0):max(end - base, 0)])
+    return result, meta["header"], total
+
+def _excel_page(abs_path, sheet_name, start, end):
+    """(sheet title, rows, header, total) of a page of rows; opens the workbook only for rows that are not cached."""
+    cache = ExtractionCache.instance()
+    workbook = cache.get_parts(abs_path, EXTRACTOR_VERSIONS["xlsx"], [])
+    if workbook is not None:
+        sheets, active = workbook[1]["sheets"], workbook[1]["active"]
+        if sheet_name and sheet_name not in sheets:
+            raise KeyError(f"Sheet '{sheet_name}' not found. Available: {sheets}")
+        title = sheet_name or active
+        page = _excel_rows(abs_path, title, start, end)
+        if page is not None:
+            return (title,) + page
+
+    # Read-only mode streams rows from the file instead of building the whole workbook
+    openpyxl = get_openpyxl()
+    wb = openpyxl.load_workbook(abs_path, read_only=True, data_only=True)
+    try:
+        cache.put_parts(abs_path, EXTRACTOR_VERSIONS["xlsx"], {}, {"sheets": wb.sheetnames, "active": wb.active.title})
+        if sheet_name and sheet_name not in wb.sheetnames:
+            raise KeyError(f"Sheet '{sheet_name}' not found. Available: {wb.sheetnames}")
+        sheet = wb[sheet_name] if sheet_name else wb.active
+        rows, header, total = _excel_rows(abs_path, sheet.title, start, end, sheet)
+        if total is None and sheet.max_row:
+            total = sheet.max_row - 1 # From the sheet's stored dimension, until the end has been read
+        return sheet.title, rows, header, total
+    finally:
+        wb.close()
+
+def read_excel(workspace_dir, path, sheet_name=None, max_rows=0, offset=0, columns=None, schema=False, _context=None):
+    """
+    Read rows of an Excel sheet page by page (default 200 rows after `offset` data rows), optionally only some `columns` (header names, comma separated). schema=True instead reports the sheet size, column names and inferred types.
     
     Args:
         workspace_dir (str): Root workspace directory.
         path (str): Relative path to the XLSX file.
         sheet_name (str): Optional sheet name to read.
+        max_rows (int): Number of data rows to return (0: default page size).
+        offset (int): Number of data rows to skip (the header row is not counted).
+        columns (str): Comma-separated header names of the columns to return.
+        schema (bool): Report dimensions, headers and inferred column types instead of rows.
     """
     try:
         abs_path = _validate_path(workspace_dir, path, _context, must_exist=True)
-            
-        # Use openpyxl for lightweight reading
-        openpyxl = get_openpyxl()
-        wb = openpyxl.load_workbook(abs_path, data_only=True)
-        
-        if sheet_name:
-            if sheet_name not in wb.sheetnames:
-                 return f"Error: Sheet '{sheet_name}' not found. Available: {wb.sheetnames}"
-            sheet = wb[sheet_name]
+        max_rows = int(max_rows or 0) or EXCEL_PAGE_ROWS
+        offset = max(int(offset or 0), 0)
+
+        if schema in (True, "true", "True", "1", 1):
+            openpyxl = get_openpyxl()
+            wb = openpyxl.load_workbook(abs_path, read_only=True, data_only=True)
+            try:
+                if sheet_name and sheet_name not in wb.sheetnames:
+                     return f"Error: Sheet '{sheet_name}' not found. Available: {wb.sheetnames}"
+                return _excel_schema(path, abs_path, wb, wb[sheet_name] if sheet_name else wb.active)
+            finally:
+                wb.close()
+
+        try:
+            title, rows, header, total = _excel_page(abs_path, sheet_name, offset, offset + max_rows)
+        except KeyError as e:
+            return f"Error: {e.args[0]}"
+
+        indices = list(range(len(header)))
+        if columns:
+            wanted = [c.strip() for c in columns.split(",")] if isinstance(columns, str) else [str(c) for c in columns]
+            lookup = {name.lower(): i for i, name in enumerate(header)}
+            unknown = [c for c in wanted if c.lower() not in lookup]
+            if unknown:
+                return f"Error: Column(s) {unknown} not found. Available: {header}"
+            indices = [lookup[c.lower()] for c in wanted]
+
+        lines = ["\t".join(header[i] for i in indices)]
+        size = len(lines[0])
+        shown = 0
+        for row in rows:
+            line = "\t".join(row[i] if i < len(row) else "" for i in indices)
+            if shown and size + len(line) > MAX_READ_BYTES:
+                break
+            lines.append(line)
+            size += len(line) + 1
+            shown += 1
+
+        total_text = total if total is not None else "unknown"
+        if shown:
+            summary = f"[{path} / {title}: rows {offset + 1}-{offset + shown} of {total_text}"
         else:
-            sheet = wb.active
-            
-        rows = []
-        for row in sheet.iter_rows(values_only=True):
-            # Convert None to empty string for better display
-            cleaned_row = [str(cell) if cell is not None else "" for cell in row]
-            rows.append("\t".join(cleaned_row))
-            
-        return "\n".join(rows)
+            summary = f"[{path} / {title}: no rows after offset {offset} (total {total_text})"
+        if total is None or offset + shown < total:
+            summary += f"; continue with offset={offset + shown}"
+        return summary + "]\n" + "\n".join(lines)
     except Exception as e:
         return f"Error reading Excel: {str(e)}"
 
-def write_excel(workspace_dir, path, data, sheet_name='Sheet1', _context=None):
+def _csv_value(text):
+    # Numbers become numbers, except ones with leading zeros (codes, IDs), which stay text
+    if text == "":
+        return None
+    if CSV_INT.fullmatch(text):
+        return int(text)
+    if CSV_FLOAT.fullmatch(text):
+        return float(text)
+    return text
+
+def _excel_value(value):
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None) # Excel has no time zones
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+def _source_rows(abs_path):
+    """Rows of a CSV/TSV or Parquet file, header first, read in batches rather than all at once."""
+    ext = os.path.splitext(abs_path)[1].lower()
+    if ext == ".parquet":
+        parquet = get_parquet()
+        file = parquet.ParquetFile(abs_path)
+        yield list(file.schema_arrow.names)
+        for batch in file.iter_batches(batch_size=EXCEL_BLOCK_ROWS):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+    elif ext in (".csv", ".tsv"):
+        with open(abs_path, "rb") as f:
+            head = f.read(64 * 1024)
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(head)
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError:
+            encoding = "gb18030" # CSV exported by Excel on Chinese Windows
+        with open(abs_path, newline="", encoding=encoding) as f:
+            reader = csv.reader(f, delimiter="\t" if ext == ".tsv" else ",")
+            header = next(reader, None)
+            if header is None:
+                return
+            yield header
+            for row in reader:
+                yield [_csv_value(v) for v in row]
+    else:
+        raise ValueError(f"source must be a .csv, .tsv or .parquet file, not '{ext}'.")
+
+def write_excel(workspace_dir, path, data=None, sheet_name='Sheet1', mode='replace', source=None, _context=None):
     """
-    Write data to an Excel file.
+    Write rows to an Excel sheet, from `data` or from a CSV/Parquet file in the workspace (`source`). mode="append" adds the rows after the existing rows of the sheet instead of replacing it.
     
     Args:
         workspace_dir (str): Root workspace directory.
         path (str): Relative path to the XLSX file.
         data (list): List of lists representing rows.
         sheet_name (str): Name of the sheet.
+        mode (str): "replace" (default) rewrites the sheet; "append" adds rows at its end (the header row of `source` is skipped).
+        source (str): Relative path to a .csv, .tsv or .parquet file whose rows (header first) are written instead of `data`.
     """
     try:
         abs_path = _validate_path(workspace_dir, path, _context, must_exist=False)
-        
-        # Ensure data is a list
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except:
-                return "Error: data must be a JSON list of lists."
-        
+        if mode not in ("replace", "append"):
+            return "Error: mode must be 'replace' or 'append'."
+
+        if source:
+            rows = _source_rows(_validate_path(workspace_dir, source, _context, must_exist=True))
+        else:
+            if data is None:
+                return "Error: Provide either data or source."
+            # Ensure data is a list
+            if isinstance(data, str):
+                try:
+                    data = json.loads(data)
+                except:
+                    return "Error: data must be a JSON list of lists."
+            rows = iter(data)
+        rows = ([_excel_value(v) for v in row] if isinstance(row, (list, tuple)) else [_excel_value(row)] for row in rows)
+
+        exists = os.path.exists(abs_path)
+        if mode == "append" and exists and has_sheet(abs_path, sheet_name):
+            # The sheet's XML is streamed and extended; the workbook is never loaded
+            if source:
+                next(rows, None)
+            count = append_rows(abs_path, sheet_name, rows)
+            return f"Success: Appended {count} rows to '{path}' ({sheet_name})."
+
         openpyxl = get_openpyxl()
-        
-        # Check if file exists to append or create
-        if os.path.exists(abs_path):
-             wb = openpyxl.load_workbook(abs_path)
-             if sheet_name in wb.sheetnames:
-                 # If sheet exists, maybe we should clear it or append?
-                 # For simplicity, let's create a new sheet if it exists or overwrite?
-                 # Let's remove the old sheet and create new one to match 'overwrite' behavior
-                 del wb[sheet_name]
-             ws = wb.create_sheet(sheet_name)
+        if exists:
+            # Other sheets have to be kept, so the workbook is loaded in full
+            wb = openpyxl.load_workbook(abs_path)
+            index = None
+            if sheet_name in wb.sheetnames:
+                index = wb.sheetnames.index(sheet_name)
+                del wb[sheet_name]
+            ws = wb.create_sheet(sheet_name, index)
         else:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = sheet_name
-        
-        for row in data:
+            # Write-only mode streams rows to the file instead of keeping every cell in memory
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet(sheet_name)
+
+        count = 0
+        for row in rows:
             ws.append(row)
-            
+            count += 1
         wb.save(abs_path)
-        return f"Success: Written to '{path}'."
+        return f"Success: Written {count} rows to '{path}' ({sheet_name})."
     except Exception as e:
         return f"Error writing Excel: {str(e)}"
 
-def read_pdf(workspace_dir, path, _context=None):
+def read_pdf(workspace_dir, path, page_start=0, page_end=0, max_tokens=0, _context=None):
     """
-    Read text from a PDF file.
+    Read text from a PDF file, optionally only pages page_start..page_end (1-based, inclusive). Output stops at max_tokens (default 20000) with a note on where to continue; pages without a text layer (scanned) are flagged.
     
     Args:
         workspace_dir (str): Root workspace directory.
         path (str): Relative path to the PDF file.
+        page_start (int): First page to read (0: the first page).
+        page_end (int): Last page to read (0: the last page).
+        max_tokens (int): Output budget in tokens (0: default).
     """
     try:
         abs_path = _validate_path(workspace_dir, path, _context, must_exist=True)
-            
-        reader = PdfReader(abs_path)
-        text_content = []
-        
-        for i, page in enumerate(reader.pages):
-            text_content.append(f"--- Page {i+1} ---\n" + page.extract_text())
-            
-        return "\n".join(text_content)
+        page_start, page_end, max_tokens = int(page_start or 0), int(page_end or 0), int(max_tokens or 0)
+        budget = max_tokens if max_tokens > 0 else PDF_MAX_TOKENS
+
+        # Pages are cached one by one (label = page kind), so a range only extracts what it needs
+        cache = ExtractionCache.instance()
+        version = EXTRACTOR_VERSIONS["pdf"]
+        cached = cache.get_parts(abs_path, version, [])
+        total = (cached[1].get("pages") if cached else None) or page_count(abs_path)
+
+        first = max(page_start, 1)
+        last = min(page_end, total) if page_end > 0 else total
+        if first > total:
+            return f"Error: page_start {first} is past the end of '{path}' ({total} pages)."
+        if last < first:
+            return f"Error: page_end {page_end} is before page_start {first}."
+
+        wanted = list(range(first - 1, last))
+        cached_parts = (cache.get_parts(abs_path, version, wanted) or ({}, {}))[0]
+        missing = [i for i in wanted if i not in cached_parts]
+        extracted = PdfExtractor.instance().iter_pages(abs_path, missing)
+        new_parts = {}
+
+        sections, flagged = [], []
+        used = 0
+        shown_last = first - 1
+        try:
+            for i in wanted:
+                if i in cached_parts:
+                    kind, text = cached_parts[i]
+                else:
+                    _, text, kind = next(extracted)
+                    new_parts[i] = (kind, text)
+                if kind == SCANNED:
+                    text = "[No text layer: this page is probably a scanned image and needs OCR]"
+                elif kind == EMPTY:
+                    text = "[Empty page]"
+                section = f"--- Page {i+1} ---\n" + text
+                tokens = estimate_tokens(section)
+                if sections and used + tokens > budget:
+                    break
+                sections.append(section)
+                used += tokens
+                shown_last = i + 1
+                if kind == SCANNED:
+                    flagged.append(i + 1)
+        finally:
+            extracted.close() # Cancels chunks that were not needed
+            if new_parts:
+                cache.put_parts(abs_path, version, new_parts, {"pages": total})
+
+        result = [f"[{path}: pages {first}-{shown_last} of {total}]"] + sections
+        if flagged:
+            result.append(f"[Pages without a text layer (probably scanned, need OCR): {', '.join(map(str, flagged))}]")
+        if shown_last < last:
+            result.append(f"[Stopped at the token budget ({budget}); continue with page_start={shown_last + 1}]")
+        return "\n".join(result)
     except Exception as e:
         return f"Error reading PDF: {str(e)}"
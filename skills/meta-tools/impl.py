@@ -1,3 +1,5 @@
+import json
+
 def update_experience(skill_name, experience=None, description=None, instructions=None, _context=None):
     """
     Update the experience/lessons learned, description, or instructions for a specific skill.
@@ -29,3 +31,35 @@ def update_experience(skill_name, experience=None, description=None, instruction
         return f"Successfully updated '{skill_name}': {', '.join(updates)}"
     else:
         return f"Failed to update '{skill_name}': {message}"
+
+def enable_skills(skill_names, _context=None):
+    """
+    Load the tools of installed skills that were not offered for this request.
+    
+    Args:
+        skill_names (list): Names of the skills to enable, e.g. ["web-search"].
+    """
+    if not _context:
+        return "Error: Context not available."
+    
+    selection = _context.get('skill_selection')
+    if not selection:
+        return "All installed skills are already loaded."
+    
+    if isinstance(skill_names, str):
+        try:
+            skill_names = json.loads(skill_names)
+        except ValueError:
+            skill_names = [name.strip() for name in skill_names.split(',')]
+    if not isinstance(skill_names, list) or not skill_names:
+        return "Error: skill_names must be a list of skill names."
+    
+    added, unknown = selection.enable([str(name).strip() for name in skill_names])
+    parts = []
+    if added:
+        parts.append(f"Enabled: {', '.join(added)}. Their tools are available from your next step.")
+    if unknown:
+        parts.append(f"Unknown skills: {', '.join(unknown)}. Available: {', '.join(selection.available)}.")
+    if not parts:
+        parts.append("These skills are already loaded.")
+    return " ".join(parts)
@@ -1,10 +1,10 @@
 import sys
-import subprocess
-import tempfile
 import os
 import ast
 import shutil
-from core.env_utils import get_python_executable, ensure_package_installed
+from core.env_utils import ensure_package_installed
+from core.python_pool import PythonPool
+from core.python_kernel import SessionKernels
 
 def install_package(package_name, import_name=None):
     """
@@ -60,13 +60,14 @@ def validate_code_safety(code, allowed_dir, god_mode=False):
                      raise SecurityError(f"Security Alert: Unauthorized absolute path access: '{val}'")
     return True
 
-def run_python_code(workspace_dir, code, _context=None):
+def run_python_code(workspace_dir, code, persistent=False, _context=None):
     """
     Execute Python code in the workspace.
     
     Args:
         workspace_dir (str): Root workspace directory.
         code (str): Python code to execute.
+        persistent (bool, optional): Run in this chat session's kernel, keeping variables for later calls.
     """
     if not workspace_dir:
         return "Error: Workspace not selected."
@@ -80,45 +81,49 @@ def run_python_code(workspace_dir, code, _context=None):
     except SecurityError as e:
         return f"Error: {str(e)}"
 
-    # Create temp file
-    temp_path = ""
-    try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-            f.write(code)
-            temp_path = f.name
-    except Exception as e:
-        return f"Error creating temp file: {e}"
+    config_manager = _context.get('config_manager') if _context else None
+    session_id = _context.get('session_id') if _context else None
+    if persistent and not session_id:
+        return "Error: Persistent mode is only available inside a chat session."
 
-    # Determine python executable
-    python_exe = get_python_executable()
-    
     try:
-        # Run subprocess
-        result = subprocess.run(
-            [python_exe, temp_path],
-            capture_output=True,
-            text=True,
-            cwd=workspace_dir,
-            encoding='utf-8',
-            errors='replace',
-            timeout=30 # 30s timeout
-        )
-        
-        output = result.stdout
-        if result.stderr:
-            output += f"\nStderr: {result.stderr}"
-            
-        return output if output.strip() else "(No output)"
-        
-    except subprocess.TimeoutExpired:
-        return "Error: Execution timed out (30s)."
+        if persistent:
+            kernels = SessionKernels.instance(config_manager)
+            status, stdout, stderr = kernels.run(session_id, code, workspace_dir)
+        else:
+            # Warm interpreter with common modules already imported; fresh namespace per call
+            status, stdout, stderr = PythonPool.instance(config_manager).run(code, workspace_dir, timeout=30)
     except FileNotFoundError:
         return "Error: Executable not found. If you are trying to run a command (like 'ls', 'git'), ensure it is installed and in the system PATH."
     except Exception as e:
         return f"Error executing code: {str(e)}"
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+
+    if persistent and status == "timeout":
+        return (f"Error: Execution timed out ({kernels.timeout}s). "
+                "The session kernel was restarted and all its variables were lost.")
+    if status == "timeout":
+        return "Error: Execution timed out (30s)."
+    if persistent and status == "memory":
+        stderr += (f"\nError: The session kernel exceeded its memory limit ({kernels.max_memory_mb} MB) "
+                   "and was restarted; all its variables were lost.")
+    elif status == "crashed":
+        stderr += "\nPython process exited unexpectedly."
+        if persistent:
+            stderr += " The session kernel was restarted and all its variables were lost."
+
+    output = stdout
+    if stderr.strip():
+        output += f"\nStderr: {stderr}"
+
+    return output if output.strip() else "(No output)"
+
+def reset_python_session(_context=None):
+    """
+    Restart this chat session's persistent Python kernel, discarding all its variables.
+    """
+    session_id = _context.get('session_id') if _context else None
+    if not session_id:
+        return "Error: No chat session."
+    if SessionKernels.instance().reset(session_id):
+        return "Session kernel restarted. All variables were cleared."
+    return "No session kernel was running."
@@ -196,6 +196,9 @@ def create_new_skill(workspace_dir, skill_name, description, tools_list, tool_co
         # Extract tool names for frontmatter
         tool_names = [t.get('name') for t in tools_list]
         allowed_tools_str = ", ".join(tool_names)
+        # Read-only tools may opt in to concurrent execution
+        parallel_safe = [t.get('name') for t in tools_list if t.get('parallel_safe')]
+        parallel_safe_line = f"parallel-safe: [{', '.join(parallel_safe)}]\n" if parallel_safe else ""
         
         # Create SKILL.md content
         desc_cn_line = f"description_cn: {description_cn}\n" if description_cn else ""
@@ -207,7 +210,7 @@ description: {description}
 type: ai_generated
 created_by: ai
 allowed-tools: [{allowed_tools_str}]
----
+{parallel_safe_line}---
 
 # {skill_name.capitalize()} Skill
 
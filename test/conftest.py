@@ -0,0 +1,10 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+# One QApplication for the whole run, created before any test module: a test
+# that only needs a QCoreApplication would otherwise create one first, and
+# widget tests in the same process could not start
+_app = QApplication.instance() or QApplication([])
@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.context_budget import ContextBudget, estimate_tokens, COMPACTED_MARKER
+
+def make_turn(call_id, result):
+    return [
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "read_file", "arguments": "{\"path\": \"a.log\"}"}}
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "content": result},
+    ]
+
+class TestContextBudget(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+        # CJK characters count roughly one token each
+        self.assertEqual(estimate_tokens("你好世界"), 4)
+
+    def test_under_budget_is_untouched(self):
+        messages = [{"role": "user", "content": "hi"}] + make_turn("c1", "x" * 4000)
+        budget = ContextBudget(max_tokens=100000)
+        self.assertEqual(budget.compact(messages), 0)
+        self.assertEqual(messages[2]["content"], "x" * 4000)
+
+    def test_compacts_old_tool_results_only(self):
+        messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "go"}]
+        for i in range(4):
+            messages += make_turn(f"c{i}", f"{i}" * 20000)
+        messages.append({"role": "assistant", "content": "done"})
+        originals = list(messages)
+
+        budget = ContextBudget(max_tokens=8000, keep_recent_turns=2)
+        saved = budget.compact(messages)
+
+        self.assertGreater(saved, 0)
+        self.assertEqual(budget.total_tokens(messages), budget.total_tokens(originals) - saved)
+        # Oldest results are stubs, the most recent turns stay verbatim
+        self.assertTrue(messages[3]["content"].startswith(COMPACTED_MARKER))
+        self.assertIn("read_file", messages[3]["content"])
+        self.assertEqual(messages[9]["content"], "3" * 20000)
+        # The original dicts are not mutated (chat history keeps full results)
+        self.assertEqual(originals[3]["content"], "0" * 20000)
+
+        # A second pass is stable: nothing new to compact
+        self.assertEqual(budget.compact(messages), 0)
+
+if __name__ == "__main__":
+    unittest.main()
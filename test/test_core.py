@@ -66,6 +66,24 @@ class TestSkillManager(unittest.TestCase):
             self.assertIn("test_func", sm.tools)
             self.assertEqual(sm.tools["test_func"](), "hello")
 
+    def test_parallel_safe_frontmatter(self):
+        skill_path = os.path.join(self.skills_dir, "reader-skill")
+        os.makedirs(skill_path)
+        with open(os.path.join(skill_path, "SKILL.md"), "w") as f:
+            f.write("---\nname: reader-skill\nparallel-safe: [read_thing]\n---\nReader.")
+        with open(os.path.join(skill_path, "impl.py"), "w") as f:
+            f.write("def read_thing():\n    return 1\n\ndef write_thing():\n    return 2")
+
+        with patch.object(SkillManager, '__init__', return_value=None):
+            sm = SkillManager()
+            sm.skills_dirs = [self.skills_dir]
+            sm.config_manager = None
+            SkillManager.load_skills(sm)
+
+            self.assertTrue(sm.is_parallel_safe("read_thing"))
+            self.assertFalse(sm.is_parallel_safe("write_thing"))
+            self.assertFalse(sm.is_parallel_safe("unknown_tool"))
+
 class TestInteractionBridge(unittest.TestCase):
     def test_bridge_singleton(self):
         from core.interaction import bridge
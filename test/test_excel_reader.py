@@ -0,0 +1,82 @@
+import unittest
+import os
+import sys
+import shutil
+import datetime
+import tempfile
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from core.extraction_cache import ExtractionCache
+
+spec = importlib.util.spec_from_file_location("fs_impl", os.path.join(os.path.dirname(__file__), '../skills/file-system/impl.py'))
+impl = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(impl)
+
+class TestExcelReader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.temp_dir, "cache.db"))
+        self.previous, ExtractionCache._instance = ExtractionCache._instance, self.cache
+        self.block_rows, impl.EXCEL_BLOCK_ROWS = impl.EXCEL_BLOCK_ROWS, 10
+
+        # Written in write-only mode, like large exports: the sheet stores no dimension
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Data")
+        ws.append(["id", "Name", "score", "when", "ok"])
+        for i in range(25):
+            ws.append([i, f"name{i}", i / 2, datetime.datetime(2024, 1, 1 + i), i % 2 == 0])
+        wb.create_sheet("Other").append(["x"])
+        wb.save(os.path.join(self.temp_dir, "book.xlsx"))
+
+    def tearDown(self):
+        impl.EXCEL_BLOCK_ROWS = self.block_rows
+        ExtractionCache._instance = self.previous
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_pages_through_rows(self):
+        first = impl.read_excel(self.temp_dir, "book.xlsx", max_rows=3).splitlines()
+        self.assertEqual(first[0], "[book.xlsx / Data: rows 1-3 of unknown; continue with offset=3]")
+        self.assertEqual(first[1], "id\tName\tscore\twhen\tok")
+        self.assertEqual(first[2], "0\tname0\t0\t2024-01-01 00:00:00\tTrue")
+
+        # Reading the last block finds the end of the sheet
+        last = impl.read_excel(self.temp_dir, "book.xlsx", max_rows=10, offset=20).splitlines()
+        self.assertEqual(last[0], "[book.xlsx / Data: rows 21-25 of 25]")
+        self.assertEqual(len(last), 2 + 5)
+        self.assertIn("rows 1-3 of 25; continue with offset=3", impl.read_excel(self.temp_dir, "book.xlsx", max_rows=3))
+        self.assertIn("no rows after offset 30", impl.read_excel(self.temp_dir, "book.xlsx", offset=30))
+
+    def test_reads_blocks_from_the_cache(self):
+        impl.read_excel(self.temp_dir, "book.xlsx", offset=12, max_rows=2)
+        blocks, meta = self.cache.get_parts(os.path.join(self.temp_dir, "book.xlsx"), f"{impl.EXTRACTOR_VERSIONS['xlsx']}:Data", [0, 1, 2])
+        self.assertEqual(sorted(blocks), [0, 1]) # Blocks passed on the way are cached too
+        self.assertEqual(meta["header"][1], "Name")
+
+        get_openpyxl, impl.get_openpyxl = impl.get_openpyxl, None # Cached pages do not open the workbook
+        try:
+            page = impl.read_excel(self.temp_dir, "book.xlsx", offset=3, max_rows=2)
+        finally:
+            impl.get_openpyxl = get_openpyxl
+        self.assertIn("3\tname3\t", page)
+
+    def test_column_projection_and_sheets(self):
+        page = impl.read_excel(self.temp_dir, "book.xlsx", max_rows=2, columns="name, OK").splitlines()
+        self.assertEqual(page[1:], ["Name\tok", "name0\tTrue", "name1\tFalse"])
+        self.assertTrue(impl.read_excel(self.temp_dir, "book.xlsx", columns="missing").startswith("Error"))
+        self.assertIn("x", impl.read_excel(self.temp_dir, "book.xlsx", sheet_name="Other"))
+        self.assertTrue(impl.read_excel(self.temp_dir, "book.xlsx", sheet_name="Missing").startswith("Error"))
+
+    def test_schema(self):
+        schema = impl.read_excel(self.temp_dir, "book.xlsx", schema=True).splitlines()
+        self.assertEqual(schema[0], "[book.xlsx / Data: unknown data rows x 5 columns; sheets: Data, Other]")
+        self.assertEqual(schema[2:], ["id\tint\t0, 1, 2", "Name\tstring\tname0, name1, name2", "score\tfloat\t0, 0.5, 1",
+                                      "when\tdatetime\t2024-01-01 00:00:00, 2024-01-02 00:00:00, 2024-01-03 00:00:00",
+                                      "ok\tbool\tTrue, False, True"])
+
+if __name__ == "__main__":
+    unittest.main()
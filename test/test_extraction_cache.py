@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.extraction_cache import ExtractionCache
+
+spec = importlib.util.spec_from_file_location("fs_impl", os.path.join(os.path.dirname(__file__), '../skills/file-system/impl.py'))
+impl = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(impl)
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.temp_dir, "cache.db"))
+        self.doc = os.path.join(self.temp_dir, "doc.bin")
+        with open(self.doc, "w") as f:
+            f.write("original")
+        self.calls = 0
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def extractor(self, path):
+        self.calls += 1
+        with open(path) as f:
+            text = f.read()
+        return [(f"Page {i + 1}", f"{text} {i + 1}") for i in range(3)], {"pages": 3}
+
+    def test_extracts_once_per_file_version(self):
+        parts, meta = self.cache.extract(self.doc, "pdf-1", self.extractor)
+        self.assertEqual(parts[0], ("Page 1", "original 1"))
+        self.assertEqual(self.cache.extract(self.doc, "pdf-1", self.extractor), (parts, meta))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.get(self.doc, "pdf-1", start=1, end=2), ([("Page 2", "original 2")], meta))
+
+        self.cache.extract(self.doc, "pdf-2", self.extractor) # New extractor version
+        self.assertEqual(self.calls, 2)
+        with open(self.doc, "w") as f:
+            f.write("changed!")
+        parts, _ = self.cache.extract(self.doc, "pdf-2", self.extractor)
+        self.assertEqual(parts[0][1], "changed! 1")
+        self.assertEqual(self.calls, 3)
+
+    def test_evicts_least_recently_used(self):
+        cache = ExtractionCache(os.path.join(self.temp_dir, "small.db"), max_mb=0)
+        cache.max_bytes = 20 # Room for two documents of 9 bytes
+        docs = []
+        for name in "abc":
+            path = os.path.join(self.temp_dir, name)
+            with open(path, "w") as f:
+                f.write(name)
+            docs.append(path)
+        cache.extract(docs[0], "v", self.extractor)
+        cache.extract(docs[1], "v", self.extractor)
+        cache.get(docs[0], "v") # a is now more recent than b
+        cache.extract(docs[2], "v", self.extractor)
+        self.assertIsNotNone(cache.get(docs[0], "v"))
+        self.assertIsNone(cache.get(docs[1], "v"))
+        self.assertLessEqual(cache.total_bytes(), 20)
+        cache.close()
+
+    def test_office_readers_use_the_cache(self):
+        previous, ExtractionCache._instance = ExtractionCache._instance, self.cache
+        try:
+            impl.create_pptx(self.temp_dir, "deck.pptx", [{"title": "Intro", "content": "Hello"}])
+            first = impl.read_pptx(self.temp_dir, "deck.pptx")
+            self.assertIn("Slide 1:\nIntro", first)
+            parts, _ = self.cache.get(os.path.join(self.temp_dir, "deck.pptx"), impl.EXTRACTOR_VERSIONS["pptx"])
+            self.assertEqual(parts[0][0], "Slide 1")
+            self.assertEqual(impl.read_pptx(self.temp_dir, "deck.pptx"), first)
+
+            impl.write_excel(self.temp_dir, "book.xlsx", [["a", 1], ["b", None]], sheet_name="Data")
+            self.assertEqual(impl.read_excel(self.temp_dir, "book.xlsx"), "[book.xlsx / Data: rows 1-1 of 1]\na\t1\nb\t")
+            self.assertTrue(impl.read_excel(self.temp_dir, "book.xlsx", "Missing").startswith("Error"))
+        finally:
+            ExtractionCache._instance = previous
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.history_store import HistoryStore, SCHEMA, HIGHLIGHT_START, HIGHLIGHT_END, parse_search_query
+
+def conversation(n):
+    messages = [{"role": "user", "content": "Summarize the quarterly report please"}]
+    for i in range(1, n):
+        messages.append({"role": "assistant" if i % 2 else "user", "content": f"message {i}"})
+    return messages
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = HistoryStore(os.path.join(self.temp_dir, "history.db"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_incremental_append_and_tail(self):
+        messages = conversation(5)
+        self.assertEqual(self.store.sync_session("s1", messages), 5)
+        messages.append({"role": "assistant", "content": "done"})
+        self.assertEqual(self.store.sync_session("s1", messages), 1) # Only the new message
+
+        self.assertEqual(self.store.message_count("s1"), 6)
+        self.assertEqual(self.store.tail("s1", 2), messages[4:])
+        self.assertEqual(self.store.tail("s1", 2, before=4), messages[2:4])
+        self.assertEqual(self.store.load_messages("s1"), messages)
+        self.assertEqual(self.store.get_session("s1")["title"], "Summarize the quarterly report please")
+
+    def test_sync_of_partially_loaded_session(self):
+        messages = conversation(30)
+        self.store.sync_session("s1", messages)
+        tail = self.store.tail("s1", 10)
+        tail.append({"role": "user", "content": "next"})
+        self.assertEqual(self.store.sync_session("s1", tail, start=20), 1)
+        self.assertEqual(self.store.load_messages("s1"), messages + [tail[-1]])
+
+    def test_rewrites_edited_or_truncated_history(self):
+        messages = conversation(4)
+        self.store.sync_session("s1", messages)
+        messages[-1] = {"role": "assistant", "content": "edited"}
+        self.store.sync_session("s1", messages)
+        self.assertEqual(self.store.load_messages("s1"), messages)
+
+        self.store.sync_session("s1", messages[:2])
+        self.assertEqual(self.store.load_messages("s1"), messages[:2])
+
+    def test_sessions_ordered_by_mtime(self):
+        self.store.sync_session("old", conversation(2), mtime=100)
+        self.store.sync_session("new", conversation(2), mtime=200)
+        self.assertEqual([s["id"] for s in self.store.list_sessions()], ["new", "old"])
+        self.assertEqual([s["id"] for s in self.store.list_sessions(limit=1, offset=1)], ["old"])
+
+    def test_one_time_json_import(self):
+        path = os.path.join(self.temp_dir, "chat_history_abc.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(conversation(3), f, indent=2)
+        os.utime(path, (1000, 1000))
+
+        self.assertEqual(self.store.import_json_dir(self.temp_dir), 1)
+        self.assertEqual(self.store.load_messages("abc"), conversation(3))
+        self.assertEqual(self.store.get_session("abc")["mtime"], 1000)
+        self.assertEqual(self.store.import_json_dir(self.temp_dir), 0) # Already imported
+
+    def tool_session(self):
+        return [
+            {"role": "user", "content": "请帮我总结季度报告"},
+            {"role": "assistant", "content": "", "tool_calls": [
+                {"id": "c1", "type": "function", "function": {"name": "read_file", "arguments": "{}"}}]},
+            {"role": "tool", "tool_call_id": "c1", "content": "Revenue grew 12% in Q3"},
+            {"role": "assistant", "content": "报告已完成: revenue is up"},
+        ]
+
+    def test_search_ranks_and_highlights(self):
+        self.store.sync_session("s1", self.tool_session(), workspace="/work")
+        self.store.sync_session("s2", conversation(3))
+
+        results = self.store.search(["revenue"])
+        self.assertEqual({(r["session_id"], r["seq"]) for r in results}, {("s1", 2), ("s1", 3)})
+        self.assertIn(HIGHLIGHT_START + "Revenue" + HIGHLIGHT_END, [r["snippet"] for r in results if r["seq"] == 2][0])
+        # Two-character CJK terms are below the trigram length and go through LIKE
+        results = self.store.search(["报告"])
+        self.assertEqual({r["seq"] for r in results}, {0, 3})
+        self.assertEqual(self.store.search(["quarterly", "message"]), [])
+
+    def test_search_filters(self):
+        self.store.sync_session("s1", self.tool_session(), workspace="/work", mtime=1000)
+        self.store.sync_session("s2", [{"role": "user", "content": "revenue forecast"}], workspace="/other", mtime=5000)
+
+        self.assertEqual([r["session_id"] for r in self.store.search(["revenue"], workspace="/other")], ["s2"])
+        self.assertEqual({r["session_id"] for r in self.store.search(["revenue"], tools=["read_file"])}, {"s1"})
+        self.assertEqual(self.store.search(["revenue"], tools=["web_search"]), [])
+        self.assertEqual([r["session_id"] for r in self.store.search(["revenue"], since=2000)], ["s2"])
+        self.assertEqual({r["session_id"] for r in self.store.search(["revenue"], until=2000)}, {"s1"})
+
+    def test_search_follows_rewrites(self):
+        messages = self.tool_session()
+        self.store.sync_session("s1", messages)
+        messages[-1] = {"role": "assistant", "content": "forecast attached"}
+        self.store.sync_session("s1", messages)
+        self.assertEqual([r["seq"] for r in self.store.search(["forecast"])], [3])
+        self.assertEqual([r["seq"] for r in self.store.search(["revenue"])], [2])
+        self.store.delete_session("s1")
+        self.assertEqual(self.store.search(["revenue"]), [])
+
+    def test_search_index_added_to_existing_database(self):
+        # A database written while the full-text index was unavailable (SQLite without FTS5)
+        self.store.close()
+        path = os.path.join(self.temp_dir, "plain.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO sessions VALUES ('s1', 'title', NULL, 0, 0, 4)")
+        for seq, msg in enumerate(self.tool_session()):
+            conn.execute("INSERT INTO messages (session_id, seq, role, content, data, created, tool_name) VALUES (?, ?, ?, ?, ?, 0, ?)",
+                         ("s1", seq, msg["role"], msg["content"], json.dumps(msg), "read_file" if msg["role"] == "tool" else None))
+        conn.commit()
+        conn.close()
+
+        self.store = HistoryStore(path)
+        self.assertTrue(self.store.fts)
+        self.assertEqual({r["seq"] for r in self.store.search(["Revenue"], tools=["read_file"])}, {2, 3})
+
+    def test_parse_search_query(self):
+        terms, filters = parse_search_query("revenue skill:web-search since:2024-01-02 until:bad workspace:/w")
+        self.assertEqual(terms, ["revenue", "until:bad"])
+        self.assertEqual(filters["skill"], "web-search")
+        self.assertEqual(filters["workspace"], "/w")
+        self.assertIn("since", filters)
+
+if __name__ == "__main__":
+    unittest.main()
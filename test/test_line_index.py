@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.line_index import LineIndex, get_line_index, open_mmap
+
+spec = importlib.util.spec_from_file_location("fs_impl", os.path.join(os.path.dirname(__file__), '../skills/file-system/impl.py'))
+impl = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(impl)
+
+class TestLineIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def test_offsets_across_blocks(self):
+        lines = [f"line {i}\n" for i in range(1, 501)]
+        path = self.write("log.txt", "".join(lines) + "no newline")
+        with open(path, "rb") as f, open_mmap(f) as mm:
+            index = LineIndex(mm, block_size=64) # Many small blocks
+            self.assertEqual(index.total_lines, 501)
+            for line in (1, 2, 63, 250, 500, 501):
+                offset = index.line_offset(mm, line)
+                self.assertEqual(offset, sum(len(l) for l in lines[:line - 1]))
+                self.assertEqual(index.line_at(mm, offset), line)
+            self.assertEqual(index.line_offset(mm, 502), len(mm))
+
+    def test_index_cached_until_file_changes(self):
+        path = self.write("a.txt", "a\nb\n")
+        with open(path, "rb") as f, open_mmap(f) as mm:
+            index = get_line_index(f, mm)
+            self.assertIs(get_line_index(f, mm), index)
+        self.write("a.txt", "a\nb\nc\n")
+        with open(path, "rb") as f, open_mmap(f) as mm:
+            self.assertEqual(get_line_index(f, mm).total_lines, 3)
+
+    def test_file_growing_after_it_was_mapped(self):
+        path = self.write("live.log", "a\nb\nc\n")
+        with open(path, "rb") as f, open_mmap(f) as mm:
+            with open(path, "a", encoding="utf-8", newline="") as log:
+                log.write("d\n")
+            self.assertEqual(get_line_index(f, mm).total_lines, 3) # What was mapped
+        with open(path, "rb") as f, open_mmap(f) as mm:
+            self.assertEqual(get_line_index(f, mm).total_lines, 4)
+
+    def test_read_file_ranges(self):
+        self.write("log.txt", "".join(f"line {i}\n" for i in range(1, 101)))
+        result = impl.read_file(self.temp_dir, "log.txt", start_line=10, end_line=12)
+        header, body = result.split("\n", 1)
+        self.assertEqual(body, "line 10\nline 11\nline 12\n")
+        self.assertIn("lines 10-12 of 100", header)
+        self.assertIn("continue with start_line=13", header)
+
+        header, body = impl.read_file(self.temp_dir, "log.txt", tail=2).split("\n", 1)
+        self.assertEqual(body, "line 99\nline 100\n")
+        self.assertNotIn("continue", header)
+
+        header, body = impl.read_file(self.temp_dir, "log.txt", offset=7, limit=5).split("\n", 1)
+        self.assertEqual(body, "line ")
+        self.assertIn("lines 2-2 of 100, bytes 7-12 of", header)
+        self.assertIn("continue with offset=12", header)
+
+        self.assertTrue(impl.read_file(self.temp_dir, "log.txt", start_line=200).startswith("Error:"))
+        self.write("empty.txt", "")
+        self.assertIn("empty file", impl.read_file(self.temp_dir, "empty.txt"))
+
+    def test_large_range_is_cut_at_a_line_break(self):
+        self.write("big.txt", ("x" * 99 + "\n") * 5000) # 500 KB
+        header, body = impl.read_file(self.temp_dir, "big.txt").split("\n", 1)
+        self.assertLessEqual(len(body), impl.MAX_READ_BYTES)
+        self.assertIn("lines 1-1024 of 5000", header)
+        header, body = impl.read_file(self.temp_dir, "big.txt", start_line=4990).split("\n", 1)
+        self.assertEqual(body.count("\n"), 11)
+
+if __name__ == "__main__":
+    unittest.main()
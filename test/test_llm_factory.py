@@ -37,5 +37,22 @@ class TestLLMFactory(unittest.TestCase):
         self.assertIsInstance(provider, AnthropicProvider)
         self.assertEqual(provider.model_name, "test-model")
 
+    def test_get_provider_reuses_client(self):
+        LLMFactory.clear_providers()
+        first = LLMFactory.get_provider(self.mock_config)
+        second = LLMFactory.get_provider(self.mock_config)
+        self.assertIs(first, second)
+        self.assertIs(first.client, second.client)
+
+        # A different key must not share the client
+        self.config_data["api_key"] = "other_key"
+        third = LLMFactory.get_provider(self.mock_config)
+        self.assertIsNot(first, third)
+
+        # Saving settings drops the provider of the replaced key
+        LLMFactory.evict_stale_providers(self.mock_config)
+        self.assertEqual(list(LLMFactory._providers.values()), [third])
+        LLMFactory.clear_providers()
+
 if __name__ == '__main__':
     unittest.main()
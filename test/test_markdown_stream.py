@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.markdown_stream import MarkdownStream, find_frozen_boundary, render_markdown
+
+DOC = """# Report
+
+Intro paragraph
+over two lines.
+
+```python
+x = 1
+
+y = 2
+```
+
+- item one
+
+- item two
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+Done.
+"""
+
+class TestMarkdownStream(unittest.TestCase):
+    def test_boundary_skips_fences_and_list_continuations(self):
+        code = "para\n\n```\na\n\nb\n"
+        self.assertEqual(find_frozen_boundary(code), len("para\n\n"))
+        self.assertEqual(find_frozen_boundary("- one\n\n- two\n\ntext\n"), len("- one\n\n- two\n\n"))
+        # The last line may still be growing
+        self.assertEqual(find_frozen_boundary("para\n\nnext"), 0)
+
+    def test_streamed_html_matches_full_render(self):
+        rendered = []
+        def render(text):
+            rendered.append(len(text))
+            return render_markdown(text)
+
+        stream = MarkdownStream(render)
+        for i in range(1, len(DOC) + 1):
+            html = stream.html(DOC[:i])
+        self.assertEqual(html.replace("\n", ""), render_markdown(DOC).replace("\n", ""))
+        # Only the open block is re-rendered, never the whole document
+        self.assertLess(max(rendered), len(DOC) // 2)
+
+    def test_restarts_on_new_text(self):
+        stream = MarkdownStream()
+        stream.html("first\n\nsecond\n")
+        self.assertEqual(stream.html("other"), "<p>other</p>")
+
+if __name__ == "__main__":
+    unittest.main()
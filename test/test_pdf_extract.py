@@ -0,0 +1,99 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.extraction_cache import ExtractionCache
+from core.pdf_extract import PdfExtractor, extract_pages, TEXT, SCANNED, EMPTY
+
+spec = importlib.util.spec_from_file_location("fs_impl", os.path.join(os.path.dirname(__file__), '../skills/file-system/impl.py'))
+impl = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(impl)
+
+def write_pdf(path, pages):
+    """Minimal PDF: each page is a string of text, "IMAGE" (an image, no text) or "" (blank)."""
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+               4: b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8 /Length 1 >>\nstream\n\x00\nendstream"}
+    kids = []
+    for i, page in enumerate(pages):
+        page_id, content_id = 5 + 2 * i, 6 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        if page == "IMAGE":
+            stream, resources = b"q 100 0 0 100 0 0 cm /Im1 Do Q", b"<< /XObject << /Im1 4 0 R >> >>"
+        else:
+            stream = f"BT /F1 12 Tf 72 720 Td ({page}) Tj ET".encode() if page else b""
+            resources = b"<< /Font << /F1 3 0 R >> >>"
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources " + resources
+                            + f" /Contents {content_id} 0 R >>".encode())
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for number in sorted(objects):
+        out += f"{offsets[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+class TestPdfExtract(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.temp_dir, "cache.db"))
+        self.previous, ExtractionCache._instance = ExtractionCache._instance, self.cache
+
+    def tearDown(self):
+        ExtractionCache._instance = self.previous
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_flags_pages_without_text(self):
+        path = os.path.join(self.temp_dir, "mixed.pdf")
+        write_pdf(path, ["Hello page one", "IMAGE", ""])
+        results = extract_pages(path, [0, 1, 2])
+        self.assertIn("Hello page one", results[0][0])
+        self.assertEqual([kind for _, kind in results], [TEXT, SCANNED, EMPTY])
+
+        text = impl.read_pdf(self.temp_dir, "mixed.pdf")
+        self.assertIn("--- Page 2 ---\n[No text layer", text)
+        self.assertIn("probably scanned, need OCR): 2]", text)
+
+    def test_parallel_extraction_keeps_order(self):
+        path = os.path.join(self.temp_dir, "long.pdf")
+        write_pdf(path, [f"Text of page {i + 1}" for i in range(40)])
+        extractor = PdfExtractor(max_workers=2)
+        try:
+            pages = list(extractor.iter_pages(path, range(40), parallel=True))
+        finally:
+            extractor.shutdown()
+        self.assertEqual([index for index, _, _ in pages], list(range(40)))
+        self.assertIn("Text of page 40", pages[-1][1])
+
+    def test_page_range_budget_and_cache(self):
+        write_pdf(os.path.join(self.temp_dir, "doc.pdf"), [f"Text of page {i + 1}" for i in range(10)])
+        text = impl.read_pdf(self.temp_dir, "doc.pdf", page_start=4, page_end=5)
+        self.assertTrue(text.startswith("[doc.pdf: pages 4-5 of 10]"))
+        self.assertIn("Text of page 4", text)
+        self.assertNotIn("Text of page 6", text)
+
+        parts, meta = self.cache.get_parts(os.path.join(self.temp_dir, "doc.pdf"), impl.EXTRACTOR_VERSIONS["pdf"], range(10))
+        self.assertEqual(sorted(parts), [3, 4]) # Only the requested pages were extracted
+        self.assertEqual(meta["pages"], 10)
+
+        text = impl.read_pdf(self.temp_dir, "doc.pdf", max_tokens=20)
+        self.assertIn("continue with page_start=", text)
+        self.assertNotIn("Text of page 10", text)
+        self.assertTrue(impl.read_pdf(self.temp_dir, "doc.pdf", page_start=11).startswith("Error"))
+
+if __name__ == "__main__":
+    unittest.main()
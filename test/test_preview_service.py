@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage, QColor
+from PySide6.QtWidgets import QApplication
+from core.preview_service import PreviewService, ThumbnailCache, read_text_head, thumbnail_box, BINARY_FILE
+
+class TestPreviewService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "thumbnails")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def image(self, name, width=1200, height=800):
+        path = os.path.join(self.temp_dir, name)
+        image = QImage(width, height, QImage.Format_RGB32)
+        image.fill(QColor("red"))
+        image.save(path)
+        return path
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_text_head_in_chunks(self):
+        path = self.write("notes.txt", ("a" * 5 + "中文").encode("utf-8"))
+        text, next_offset = read_text_head(path, limit=6) # Cuts the first CJK character
+        self.assertEqual((text, next_offset), ("aaaaa", 5))
+        text, next_offset = read_text_head(path, next_offset, limit=6)
+        self.assertEqual((text, next_offset), ("中文", None))
+
+        with self.assertRaises(UnicodeDecodeError):
+            read_text_head(self.write("data.bin", b"\x89PNG\x00\x01"))
+
+    def test_thumbnail_cache(self):
+        path = self.image("photo.png")
+        box = thumbnail_box(QSize(300, 200))
+        self.assertEqual(box, QSize(512, 512))
+        key = ThumbnailCache.key(path, box)
+
+        cache = ThumbnailCache(self.cache_dir, max_items=1)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, QImage(10, 10, QImage.Format_RGB32))
+        self.assertIsNotNone(cache.get(key, memory_only=True))
+        # A new process only has the disk copy
+        self.assertIsNone(ThumbnailCache(self.cache_dir).get(key, memory_only=True))
+        self.assertEqual(ThumbnailCache(self.cache_dir).get(key).size(), QSize(10, 10))
+
+        self.image("photo.png", 100, 100) # Changing the file changes the key
+        self.assertNotEqual(ThumbnailCache.key(path, box), key)
+
+    def test_async_previews_and_cancellation(self):
+        service = PreviewService(self.cache_dir)
+        images, texts, errors = [], [], []
+        service.image_ready.connect(lambda job_id, image: images.append((job_id, image)))
+        service.text_ready.connect(lambda job_id, text, next_offset: texts.append((job_id, text, next_offset)))
+        service.failed.connect(lambda job_id, message: errors.append((job_id, message)))
+
+        job = service.request_image(self.image("big.png", 2000, 1000), QSize(200, 200))
+        self.wait_for(lambda: images)
+        self.assertEqual(images[0][0], job)
+        self.assertEqual(images[0][1].size(), QSize(256, 128)) # Decoded at thumbnail size
+        self.assertIsNotNone(service.cached_image(os.path.join(self.temp_dir, "big.png"), QSize(200, 200)))
+
+        stale = service.request_text(self.write("a.txt", b"first"))
+        current = service.request_text(self.write("b.txt", b"second"))
+        self.wait_for(lambda: texts and texts[-1][0] == current)
+        self.assertTrue(service.is_stale(stale)) # Its result, if it got one out, is ignored by the caller
+        self.assertEqual(texts[-1], (current, "second", None))
+
+        job = service.request_text(self.write("c.bin", b"\x00\x01"))
+        self.wait_for(lambda: errors)
+        self.assertEqual(errors, [(job, BINARY_FILE)])
+        service.shutdown()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+from datetime import date
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_builder import build_system_messages
+from core.llm.providers import OpenAIProvider, AnthropicProvider
+
+class TestPromptBuilder(unittest.TestCase):
+    def test_static_prefix_is_stable(self):
+        prompts = ["# Skill A", "# Skill B"]
+        first = build_system_messages(prompts, "/ws/one", today=date(2025, 1, 1))
+        second = build_system_messages(prompts, "/ws/two", parent_agent_id="Agent-1", today=date(2025, 1, 2))
+
+        # Only the trailing context message changes
+        self.assertEqual(first[0], second[0])
+        self.assertNotEqual(first[1], second[1])
+        self.assertIn("# Skill A\n# Skill B", first[0]["content"])
+        self.assertNotIn("/ws/one", first[0]["content"])
+        self.assertIn("2025-01-01", first[1]["content"])
+        self.assertNotIn(":", first[1]["content"].split("当前日期: ")[1])
+
+    def test_openai_merges_leading_system_messages(self):
+        provider = OpenAIProvider(api_key="test", base_url="https://test.url", model_name="m")
+        messages = build_system_messages(["# Skill"], "/ws") + [{"role": "user", "content": "hi"}]
+        merged = provider._merge_system_messages(messages)
+        self.assertEqual([m["role"] for m in merged], ["system", "user"])
+        self.assertTrue(merged[0]["content"].startswith(messages[0]["content"]))
+
+    def test_anthropic_cache_breakpoints(self):
+        provider = AnthropicProvider(api_key="test", base_url="https://test.url", model_name="m")
+        messages = build_system_messages(["# Skill"], "/ws") + [{"role": "user", "content": "hi"}]
+        system, api_messages = provider._prepare_messages(messages)
+        tools = provider._convert_tools([
+            {"type": "function", "function": {"name": "a", "parameters": {}}},
+            {"type": "function", "function": {"name": "b", "parameters": {}}},
+        ])
+        provider._add_cache_breakpoints(system, tools, api_messages)
+
+        self.assertEqual(len(system), 2)
+        self.assertIn("cache_control", system[0])
+        self.assertNotIn("cache_control", system[1])
+        self.assertNotIn("cache_control", tools[0])
+        self.assertIn("cache_control", tools[1])
+        self.assertEqual(api_messages[-1]["content"][-1]["cache_control"], {"type": "ephemeral"})
+
+if __name__ == "__main__":
+    unittest.main()
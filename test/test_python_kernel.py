@@ -0,0 +1,50 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.python_pool import PythonPool
+from core.python_kernel import SessionKernels
+
+class TestSessionKernels(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.pool = PythonPool(size=1, preload=[])
+        self.kernels = SessionKernels(self.pool, timeout=5, max_memory_mb=4096)
+
+    def tearDown(self):
+        self.kernels.shutdown_all()
+        self.pool.shutdown()
+        shutil.rmtree(self.workspace)
+
+    def test_variables_survive_per_session(self):
+        self.assertEqual(self.kernels.run("s1", "data = [1, 2, 3]", self.workspace)[0], "ok")
+        self.assertEqual(self.kernels.run("s1", "print(sum(data))", self.workspace)[:2], ("ok", "6"))
+
+        status, _, err = self.kernels.run("s2", "print(data)", self.workspace)
+        self.assertEqual(status, "error")
+        self.assertIn("NameError", err)
+
+    def test_reset_and_shutdown(self):
+        self.kernels.run("s1", "x = 1", self.workspace)
+        self.assertTrue(self.kernels.reset("s1"))
+        self.assertFalse(self.kernels.has_kernel("s1"))
+        self.assertEqual(self.kernels.run("s1", "print(x)", self.workspace)[0], "error")
+
+        self.kernels.shutdown("s1")
+        self.assertFalse(self.kernels.reset("s1"))
+
+    def test_memory_limit_restarts_kernel(self):
+        self.kernels.max_memory_mb = 1
+        self.kernels.run("s1", "x = 1", self.workspace)
+        # Any interpreter is above 1 MB; whichever check fires first reports it
+        status, _, _ = self.kernels.run("s1", "y = 2", self.workspace)
+        self.assertEqual(status, "memory")
+        self.assertFalse(self.kernels.has_kernel("s1"))
+
+if __name__ == "__main__":
+    unittest.main()
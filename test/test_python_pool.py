@@ -0,0 +1,113 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.python_pool import PythonPool, OutputBatcher
+
+class TestPythonPool(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.pool = PythonPool(size=1, preload=["json"], max_runs=3)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutil.rmtree(self.workspace)
+
+    def test_runs_in_workspace_with_fresh_namespace(self):
+        status, out, err = self.pool.run("x = 1\nimport os\nprint(os.getcwd())", self.workspace)
+        self.assertEqual(status, "ok")
+        self.assertEqual(os.path.realpath(out), os.path.realpath(self.workspace))
+
+        status, out, err = self.pool.run("print(x)", self.workspace)
+        self.assertEqual(status, "error")
+        self.assertIn("NameError", err)
+
+    def test_runs_as_a_script_file(self):
+        status, out, err = self.pool.run("import os, sys\nprint(os.path.basename(__file__) == os.path.basename(sys.argv[0]), len(sys.argv))\n"
+                                         "value = 1\nraise ValueError('bad value')", self.workspace)
+        self.assertEqual((status, out), ("error", "True 1"))
+        self.assertIn("line 4", err)
+        self.assertIn("raise ValueError('bad value')", err) # The source line, not just "<string>"
+
+    def test_reuses_and_recycles_interpreters(self):
+        pids = []
+        for _ in range(4):
+            status, out, _ = self.pool.run("import os; print(os.getpid(), end='')", self.workspace)
+            self.assertEqual(status, "ok")
+            pids.append(int(out))
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[1], pids[2])
+        self.assertNotEqual(pids[2], pids[3]) # recycled after max_runs
+
+    def test_resets_process_state_between_snippets(self):
+        self.pool.run("import sys, warnings\nsys.modules['json'] = None\nwarnings.simplefilter('error')", self.workspace)
+        status, out, err = self.pool.run("import json, warnings\nwarnings.warn('w')\nprint(json.dumps(1))", self.workspace)
+        self.assertEqual((status, out), ("ok", "1"))
+
+    def test_replaces_interpreter_that_died_while_idle(self):
+        worker = self.pool.acquire()
+        self.pool.release(worker)
+        worker.process.kill()
+        worker.process.wait()
+        status, out, _ = self.pool.run("print('alive')", self.workspace)
+        self.assertEqual((status, out), ("ok", "alive"))
+
+    def test_timeout_kills_interpreter(self):
+        status, _, _ = self.pool.run("import time; time.sleep(10)", self.workspace, timeout=0.5)
+        self.assertEqual(status, "timeout")
+        status, out, _ = self.pool.run("print('alive')", self.workspace)
+        self.assertEqual((status, out), ("ok", "alive"))
+
+    def test_input_protocol(self):
+        worker = self.pool.acquire()
+        prompts, output = [], []
+        def on_input(prompt):
+            prompts.append(prompt)
+            worker.send_input("42")
+        status = worker.run("print(int(input('n?')) + 1)", self.workspace,
+                            on_output=lambda stream, line: output.append(line), on_input=on_input)
+        self.pool.release(worker)
+        self.assertEqual(status, "ok")
+        self.assertEqual(prompts, ["n?"])
+        self.assertEqual(output, ["43"])
+
+class TestOutputBatcher(unittest.TestCase):
+    def test_batches_and_spills(self):
+        chunks = []
+        with tempfile.TemporaryDirectory() as tmp:
+            spill_path = os.path.join(tmp, "out.log")
+            batcher = OutputBatcher(chunks.append, max_chars=30, spill_path=spill_path, interval=60, chunk_chars=12)
+            for i in range(3):
+                batcher.add("out", f"line {i}")
+            batcher.add("err", "oops")
+            for i in range(3, 6):
+                batcher.add("out", f"line {i}")
+            batcher.close()
+
+            self.assertEqual(chunks[0], "line 0\nline 1")
+            self.assertEqual(chunks[1], "line 2")
+            self.assertIn("written to", chunks[2])
+            self.assertEqual(batcher.stderr_text(), "oops")
+            with open(spill_path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "line 3\nline 4\nline 5\n")
+
+    def test_heavy_stderr_does_not_block(self):
+        pool = PythonPool(size=0)
+        chunks = []
+        batcher = OutputBatcher(chunks.append, max_chars=1000)
+        worker = pool.acquire()
+        code = "import sys\nfor i in range(20000): print('x' * 100, file=sys.stderr)\nprint('done')"
+        status = worker.run(code, tempfile.gettempdir(), timeout=20, on_output=batcher.add, on_idle=batcher.tick)
+        pool.release(worker)
+        batcher.close()
+        self.assertEqual(status, "ok")
+        self.assertGreater(batcher.spilled, 19000)
+        self.assertIn("discarded", chunks[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.skill_manager import SkillManager
+from core.skill_registry import SkillRegistry
+from core.skill_manifest import SkillManifest
+
+IMPL_TEMPLATE = """
+with open({log!r}, 'a') as _f:
+    _f.write({name!r} + '\\n')
+
+def {func}(workspace_dir=None):
+    return {value!r}
+"""
+
+class TestSkillRegistry(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.skills_dir = os.path.join(self.temp_dir, "skills")
+        self.load_log = os.path.join(self.temp_dir, "loads.log")
+        os.makedirs(self.skills_dir)
+        # Keep the manifest cache out of the real app data dir
+        SkillManifest._instance = SkillManifest(os.path.join(self.temp_dir, "manifest.json"))
+        self.write_skill("alpha", "alpha_tool", "a1")
+        self.write_skill("beta", "beta_tool", "b1")
+
+        manager = SkillManager(self.temp_dir)
+        manager.skills_dirs = [self.skills_dir]
+        manager.load_skills()
+        self.registry = SkillRegistry(manager=manager, poll_interval=0, watch_events=False)
+        open(self.load_log, 'w').close()
+
+    def tearDown(self):
+        SkillManifest._instance = None
+        shutil.rmtree(self.temp_dir)
+
+    def write_skill(self, name, func, value):
+        path = os.path.join(self.skills_dir, name)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "SKILL.md"), "w") as f:
+            f.write(f"---\nname: {name}\n---\n# {name}")
+        with open(os.path.join(path, "impl.py"), "w") as f:
+            f.write(IMPL_TEMPLATE.format(log=self.load_log, name=name, func=func, value=value))
+
+    def loads(self):
+        with open(self.load_log) as f:
+            return f.read().split()
+
+    def test_snapshot_is_shared_and_read_only(self):
+        first = self.registry.snapshot("/ws/one")
+        second = self.registry.snapshot("/ws/two")
+
+        self.assertEqual(self.loads(), [])
+        self.assertIs(first.tools, second.tools)
+        self.assertEqual(first.skill_prompts, ("# alpha", "# beta"))
+        with self.assertRaises(TypeError):
+            first.tools["evil"] = print
+        self.assertEqual(second.call_tool("alpha_tool", {}), "a1")
+        self.assertIn("not found", first.call_tool("missing", {}))
+
+    def test_only_changed_skills_are_reloaded(self):
+        before = self.registry.snapshot()
+        self.write_skill("beta", "beta_tool", "b2-changed")
+        self.write_skill("gamma", "gamma_tool", "g1")
+
+        after = self.registry.snapshot()
+        self.assertEqual(sorted(self.loads()), ["beta", "gamma"])
+        self.assertNotEqual(before.version, after.version)
+        self.assertEqual(after.call_tool("beta_tool", {}), "b2-changed")
+        self.assertEqual(after.get_skill_of_tool("gamma_tool"), "gamma")
+        # Old snapshots keep working with the tools they were taken with
+        self.assertEqual(before.call_tool("beta_tool", {}), "b1")
+
+        shutil.rmtree(os.path.join(self.skills_dir, "alpha"))
+        self.assertNotIn("alpha_tool", self.registry.snapshot().tools)
+
+    def test_manifest_defers_import_until_first_call(self):
+        # A fresh process: manifest on disk, nothing imported yet
+        SkillManifest._instance = SkillManifest(os.path.join(self.temp_dir, "manifest.json"))
+        manager = SkillManager(self.temp_dir)
+        manager.skills_dirs = [self.skills_dir]
+        manager.load_skills()
+
+        self.assertEqual(self.loads(), [])
+        names = [d["function"]["name"] for d in manager.get_tool_definitions()]
+        self.assertIn("alpha_tool", names)
+        self.assertIn("beta_tool", names)
+
+        self.assertEqual(manager.call_tool("alpha_tool", {}), "a1")
+        self.assertEqual(manager.call_tool("alpha_tool", {}), "a1")
+        self.assertEqual(self.loads(), ["alpha"])
+
+if __name__ == "__main__":
+    unittest.main()
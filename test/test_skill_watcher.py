@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest.mock
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+from core.skill_manager import SkillManager
+from core.skill_watcher import SkillWatcher
+
+class TestSkillWatcher(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+        self.temp_dir = tempfile.mkdtemp()
+        self.skills_dir = os.path.join(self.temp_dir, "skills")
+        for name in ("alpha", "beta"):
+            os.makedirs(os.path.join(self.skills_dir, name))
+            with open(os.path.join(self.skills_dir, name, "SKILL.md"), "w") as f:
+                f.write(f"---\nname: {name}\n---\n# {name}")
+
+        with unittest.mock.patch.object(SkillManager, '__init__', return_value=None):
+            self.manager = SkillManager()
+        self.manager.skills_dirs = [self.skills_dir]
+        self.manager.config_manager = None
+        self.manager.load_skills()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def wait_for_dirty(self, watcher, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        dirty = set()
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            dirty |= watcher.take_dirty()
+            if dirty:
+                # Let related events (e.g. dir + file) arrive too
+                time.sleep(0.05)
+                self.app.processEvents()
+                return dirty | watcher.take_dirty()
+            time.sleep(0.02)
+        return dirty
+
+    def test_marks_only_the_changed_skill(self):
+        watcher = SkillWatcher(self.manager)
+        self.assertTrue(watcher.is_event_driven)
+        self.assertEqual(watcher.take_dirty(), set())
+
+        with open(os.path.join(self.skills_dir, "beta", "SKILL.md"), "a") as f:
+            f.write("\nMore guidance.")
+        beta = os.path.join(self.skills_dir, "beta")
+        self.assertEqual(self.wait_for_dirty(watcher), {beta})
+
+        self.assertEqual(self.manager.reload_changed_skills({beta}), ["beta"])
+        self.assertIn("More guidance.", "\n".join(self.manager.skill_prompts))
+
+    def test_new_skill_marks_skills_dir(self):
+        watcher = SkillWatcher(self.manager)
+        os.makedirs(os.path.join(self.skills_dir, "gamma"))
+        dirty = self.wait_for_dirty(watcher)
+        self.assertIn(self.skills_dir, dirty)
+        self.assertEqual(self.manager.reload_changed_skills(dirty), ["gamma"])
+
+    def test_polling_fallback_is_throttled(self):
+        watcher = SkillWatcher(self.manager, poll_interval=60, use_events=False)
+        self.assertFalse(watcher.is_event_driven)
+        self.assertIsNone(watcher.take_dirty())
+        self.assertEqual(watcher.take_dirty(), set())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.telemetry import TurnMetrics, MetricsSink
+from core.llm.providers import OpenAIProvider
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_turn_record_uses_provider_usage(self):
+        turn = TurnMetrics(1, "deepseek-chat")
+        turn.mark("reasoning")
+        turn.mark("content")
+        turn.usage = {"prompt_tokens": 1000, "completion_tokens": 50,
+                      "cache_hit_tokens": 800, "cache_miss_tokens": 200}
+        record = turn.finish(output_chars=200, tool_calls=2)
+
+        self.assertEqual(record["type"], "turn")
+        self.assertIsNotNone(record["ttft"])
+        self.assertLessEqual(record["ttft_reasoning"], record["ttft_content"])
+        self.assertEqual(record["completion_tokens"], 50)
+        self.assertFalse(record["completion_tokens_estimated"])
+        self.assertEqual(record["cache_hit_ratio"], 0.8)
+        self.assertEqual(record["tool_calls"], 2)
+
+    def test_turn_record_estimates_without_usage(self):
+        record = TurnMetrics(1).finish(output_chars=400)
+        self.assertIsNone(record["ttft"])
+        self.assertEqual(record["completion_tokens"], 100)
+        self.assertTrue(record["completion_tokens_estimated"])
+
+    def test_sink_accumulates_and_persists(self):
+        sink = MetricsSink(self.metrics_dir)
+        sink.record({"type": "turn", "duration": 1.5, "prompt_tokens": 100, "completion_tokens": 10}, "s1")
+        totals = sink.record({"type": "tool", "tool": "read_file", "duration": 0.5}, "s1")
+        sink.record({"type": "turn", "duration": 2.0, "prompt_tokens": 7}, "s2")
+
+        self.assertEqual(totals["turns"], 1)
+        self.assertEqual(totals["tool_calls"], 1)
+        self.assertEqual(totals["prompt_tokens"], 100)
+        self.assertEqual(sink.session_totals("s2")["prompt_tokens"], 7)
+        sink.discard_session("s2")
+        self.assertEqual(list(sink._session_totals), ["s1"])
+
+        files = os.listdir(self.metrics_dir)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(self.metrics_dir, files[0]), encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([r["session_id"] for r in lines], ["s1", "s1", "s2"])
+
+    def test_normalize_deepseek_usage(self):
+        provider = OpenAIProvider(api_key="test", base_url="https://test.url", model_name="m")
+        usage = provider._normalize_usage({
+            "prompt_tokens": 120, "completion_tokens": 30,
+            "prompt_cache_hit_tokens": 100, "prompt_cache_miss_tokens": 20,
+            "completion_tokens_details": {"reasoning_tokens": 12}
+        })
+        self.assertEqual(usage["cache_hit_tokens"], 100)
+        self.assertEqual(usage["cache_miss_tokens"], 20)
+        self.assertEqual(usage["reasoning_tokens"], 12)
+
+        # OpenAI-style cached_tokens detail
+        usage = provider._normalize_usage({
+            "prompt_tokens": 50, "completion_tokens": 5,
+            "prompt_tokens_details": {"cached_tokens": 40}
+        })
+        self.assertEqual(usage["cache_hit_tokens"], 40)
+        self.assertEqual(usage["cache_miss_tokens"], 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_adapter import ToolAdapter, inspect_injection
+
+def list_things(workspace_dir, path, limit=10, recursive=True, tags=[], _context=None):
+    """List things."""
+    return {"workspace_dir": workspace_dir, "path": path, "limit": limit,
+            "recursive": recursive, "tags": tags, "has_context": _context is not None}
+
+DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "list_things",
+        "description": "List things.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string"},
+                "limit": {"type": "integer"},
+                "recursive": {"type": "boolean"},
+                "tags": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["path"]
+        }
+    }
+}
+
+class TestToolAdapter(unittest.TestCase):
+    def setUp(self):
+        self.adapter = ToolAdapter("list_things", list_things, DEFINITION, *inspect_injection(list_things))
+
+    def test_injection_is_cached(self):
+        self.assertEqual(self.adapter.injects, frozenset({"workspace_dir", "_context"}))
+        result = self.adapter.call({"path": "."}, workspace_dir="/ws", context={"k": 1})
+        self.assertEqual(result["workspace_dir"], "/ws")
+        self.assertTrue(result["has_context"])
+
+    def test_coerces_model_arguments(self):
+        result = self.adapter.call({
+            "path": "src", "limit": "25", "recursive": "false", "tags": "[\"a\", \"b\"]",
+            "workspace_dir": "/elsewhere" # Model values for injected params are ignored
+        }, workspace_dir="/ws")
+        self.assertEqual(result["limit"], 25)
+        self.assertIs(result["recursive"], False)
+        self.assertEqual(result["tags"], ["a", "b"])
+        self.assertEqual(result["workspace_dir"], "/ws")
+
+        # null for an optional parameter falls back to the default
+        self.assertEqual(self.adapter.call({"path": ".", "limit": None})["limit"], 10)
+
+    def test_bad_arguments_fail_before_the_call(self):
+        calls = []
+        adapter = ToolAdapter("list_things", lambda **kw: calls.append(kw), DEFINITION)
+        result = adapter.call({"limit": "ten", "colour": "red"})
+
+        self.assertEqual(calls, [])
+        self.assertTrue(result.startswith("Error: Invalid arguments for tool 'list_things'"))
+        self.assertIn("parameter 'limit' expects an integer, got 'ten'", result)
+        self.assertIn("unexpected parameter 'colour'", result)
+        self.assertIn("missing required parameter(s): 'path'", result)
+        self.assertIn("path (string, required)", result)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_executor import ToolExecutor
+
+def make_call(call_id, name):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments="{}"))
+
+class FakeSkillManager:
+    def __init__(self, safe_tools):
+        self.safe_tools = set(safe_tools)
+
+    def is_parallel_safe(self, tool_name):
+        return tool_name in self.safe_tools
+
+class TestToolExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = ToolExecutor(FakeSkillManager({"read_file", "search_web"}), max_workers=4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_plan_batches_keeps_unsafe_calls_alone(self):
+        calls = [
+            make_call("1", "read_file"),
+            make_call("2", "search_web"),
+            make_call("3", "delete_file"),
+            make_call("4", "read_file"),
+        ]
+        batches = self.executor.plan_batches(calls)
+        self.assertEqual([[c.id for c in b] for b in batches], [["1", "2"], ["3"], ["4"]])
+
+    def test_single_worker_disables_batching(self):
+        executor = ToolExecutor(FakeSkillManager({"read_file"}), max_workers=1)
+        calls = [make_call("1", "read_file"), make_call("2", "read_file")]
+        self.assertEqual(len(executor.plan_batches(calls)), 2)
+
+    def test_run_batch_is_concurrent(self):
+        calls = [make_call(str(i), "read_file") for i in range(4)]
+        barrier = threading.Barrier(4, timeout=5)
+
+        def invoke(tool):
+            # Deadlocks (and times out) unless all four run at once
+            barrier.wait()
+            return f"result-{tool.id}"
+
+        start = time.time()
+        results = dict((tool.id, res) for tool, res in self.executor.run_batch(calls, invoke))
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(results, {str(i): f"result-{i}" for i in range(4)})
+
+    def test_run_batch_reports_exceptions(self):
+        calls = [make_call("1", "read_file"), make_call("2", "read_file")]
+
+        def invoke(tool):
+            if tool.id == "2":
+                raise RuntimeError("boom")
+            return "ok"
+
+        results = dict((tool.id, res) for tool, res in self.executor.run_batch(calls, invoke))
+        self.assertEqual(results["1"], "ok")
+        self.assertIn("boom", results["2"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.skill_manager import SkillManager
+from core.skill_registry import SkillRegistry
+from core.skill_manifest import SkillManifest
+from core.tool_selector import tokenize, select_skills, SkillIndex, DEFAULT_PINNED_SKILLS
+
+SKILLS = {
+    "file-system": ("Read and write files in the workspace.", "def read_file(workspace_dir, path):\n    return ''\n"),
+    "interaction": ("Ask the user questions.", "def ask_user_confirmation(message):\n    return ''\n"),
+    "meta-tools": ("Manage skills.", "def enable_skills(skill_names, _context=None):\n    return ''\n"),
+    "web-search": ("Search the web and read online articles.", "def search_web(query):\n    return ''\n"),
+    "chart-maker": ("Draw bar and line charts from tables. 绘制图表", "def draw_chart(data):\n    return ''\n"),
+    "mail-client": ("Send and receive email messages.", "def send_email(to, body):\n    return ''\n"),
+    "skill-builder": ("Write new tools.", "def create_new_skill(name, code):\n    return ''\n"),
+}
+
+class TestToolSelector(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        skills_dir = os.path.join(self.temp_dir, "skills")
+        SkillManifest._instance = SkillManifest(os.path.join(self.temp_dir, "manifest.json"))
+        for name, (description, code) in SKILLS.items():
+            path = os.path.join(skills_dir, name)
+            os.makedirs(path)
+            with open(os.path.join(path, "SKILL.md"), "w", encoding="utf-8") as f:
+                f.write(f"---\nname: {name}\ndescription: {description}\n---\n# {name}\n{description}")
+            with open(os.path.join(path, "impl.py"), "w") as f:
+                f.write(code)
+
+        manager = SkillManager(self.temp_dir)
+        manager.skills_dirs = [skills_dir]
+        manager.load_skills()
+        self.snapshot = SkillRegistry(manager=manager, poll_interval=0, watch_events=False).snapshot()
+
+    def tearDown(self):
+        SkillManifest._instance = None
+        shutil.rmtree(self.temp_dir)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("search_web the Files"), ["search", "web", "file"])
+        self.assertEqual(tokenize("绘制图表"), ["绘制", "制图", "图表"])
+
+    def test_ranks_relevant_skill(self):
+        index = SkillIndex.for_snapshot(self.snapshot)
+        self.assertEqual(index.top("please search the web for articles", 1), ["web-search"])
+        self.assertEqual(index.top("帮我绘制一个图表", 1), ["chart-maker"])
+
+    def test_selection_keeps_pinned_and_used_skills(self):
+        messages = [
+            {"role": "user", "content": "email the report"},
+            {"role": "assistant", "content": "", "tool_calls": [
+                {"id": "c1", "type": "function", "function": {"name": "draw_chart", "arguments": "{}"}}
+            ]},
+            {"role": "tool", "tool_call_id": "c1", "content": "ok"},
+            {"role": "user", "content": "now send it by email"},
+        ]
+        selection = select_skills(self.snapshot, messages, top_k=1)
+        self.assertEqual(selection.selected,
+                         {"file-system", "interaction", "meta-tools", "chart-maker", "mail-client",
+                          "skill-builder"}) # Owns create_new_skill, which the system prompt refers to
+        self.assertEqual(selection.omitted(), ["web-search"])
+
+        names = {d["function"]["name"] for d in selection.tool_definitions(self.snapshot)}
+        self.assertNotIn("search_web", names)
+        self.assertGreater(selection.tokens_saved(self.snapshot), 0)
+
+        added, unknown = selection.enable(["web-search", "nope"])
+        self.assertEqual((added, unknown), (["web-search"], ["nope"]))
+        self.assertEqual(selection.version, 1)
+
+    def test_no_subset_when_everything_is_selected(self):
+        messages = [{"role": "user", "content": "hi"}]
+        self.assertIsNone(select_skills(self.snapshot, messages, top_k=10, pinned=list(SKILLS)))
+
+    def test_default_pins_name_bundled_skills(self):
+        manager = SkillManager(self.temp_dir)
+        manager.skills_dirs = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "skills")]
+        manager.load_skills()
+        snapshot = SkillRegistry(manager=manager, poll_interval=0, watch_events=False).snapshot()
+        self.assertLessEqual(set(DEFAULT_PINNED_SKILLS), set(snapshot.skill_names()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import shiboken6
+from PySide6.QtCore import QEvent
+from PySide6.QtWidgets import QApplication, QScrollArea, QWidget, QVBoxLayout, QLabel
+from core.transcript_virtualizer import TranscriptVirtualizer
+
+class TestTranscriptVirtualizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.scroll.resize(400, 300)
+        container = QWidget()
+        self.layout = QVBoxLayout(container)
+        self.labels = []
+        for i in range(60):
+            label = QLabel(f"message {i}")
+            label.setFixedHeight(100)
+            self.layout.addWidget(label)
+            self.labels.append(label)
+        self.layout.addStretch()
+        self.scroll.setWidget(container)
+        self.scroll.show()
+        self.app.processEvents()
+        self.virtualizer = TranscriptVirtualizer(self.scroll, self.layout)
+
+    def tearDown(self):
+        self.scroll.deleteLater()
+        self.app.processEvents()
+
+    def test_parks_offscreen_widgets_and_restores_them(self):
+        height = self.scroll.widget().height()
+        self.virtualizer.update()
+        self.app.processEvents()
+        parked = self.virtualizer.parked_count()
+        self.assertGreater(parked, 50)
+        self.assertEqual(self.scroll.widget().height(), height) # Placeholders keep the scroll extent
+        self.assertIs(self.virtualizer.widget_at(59), self.labels[59])
+
+        bar = self.scroll.verticalScrollBar()
+        bar.setValue(bar.maximum())
+        self.virtualizer.update()
+        self.app.processEvents()
+        self.assertTrue(self.labels[59].isVisible())
+        self.assertFalse(self.labels[0].isVisible())
+        self.assertIs(self.layout.itemAt(59).widget(), self.labels[59])
+
+        self.virtualizer.restore_all()
+        self.assertEqual(self.virtualizer.parked_count(), 0)
+        self.assertEqual(self.layout.indexOf(self.labels[10]), 10)
+
+    def test_releases_widgets_that_can_be_rebuilt(self):
+        def release(widget):
+            if widget is self.labels[30]:
+                return None # e.g. still streaming
+            text = widget.text()
+            def rebuild():
+                label = QLabel(text)
+                label.setFixedHeight(100)
+                return label
+            return rebuild
+        self.virtualizer.release = release
+        self.virtualizer.update()
+        self.app.sendPostedEvents(None, QEvent.DeferredDelete)
+        self.assertEqual(self.virtualizer.released_count(), self.virtualizer.parked_count() - 1)
+        self.assertFalse(shiboken6.isValid(self.labels[59])) # Deleted while off-screen
+        self.assertIs(self.virtualizer.widget_at(30), self.labels[30])
+
+        height = self.scroll.widget().height()
+        bar = self.scroll.verticalScrollBar()
+        bar.setValue(bar.maximum())
+        self.virtualizer.update()
+        self.app.processEvents()
+        rebuilt = self.layout.itemAt(59).widget()
+        self.assertEqual(rebuilt.text(), "message 59")
+        self.assertTrue(rebuilt.isVisible())
+        self.assertEqual(self.scroll.widget().height(), height)
+
+    def test_short_transcripts_are_left_alone(self):
+        self.virtualizer.min_items = 100
+        self.virtualizer.update()
+        self.assertEqual(self.virtualizer.parked_count(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
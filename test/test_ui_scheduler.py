@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from core.ui_scheduler import UpdateScheduler, concat
+
+class TestUpdateScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.foreground = "a"
+        self.scheduler = UpdateScheduler(is_foreground=lambda sid: sid == self.foreground, background_interval=200)
+        self.applied = []
+
+    def post(self, session_id, key, value, merge=None):
+        self.scheduler.post(session_id, key, value, lambda v: self.applied.append((session_id, key, v)), merge)
+
+    def run_loop(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+
+    def test_merges_streams_between_ordered_events(self):
+        for delta in ["He", "llo", " "]:
+            self.post("a", "content", delta, concat)
+        self.post("a", "tool_call", {"id": 1})
+        self.post("a", "content", "world", concat)
+        self.post("a", "content", "!", concat)
+        self.assertEqual(self.scheduler.pending("a"), 3)
+
+        self.scheduler.flush("a")
+        self.assertEqual(self.applied, [("a", "content", "Hello "), ("a", "tool_call", {"id": 1}), ("a", "content", "world!")])
+        self.assertEqual(self.scheduler.pending("a"), 0)
+
+    def test_interleaved_streams_merge_per_key(self):
+        for i in range(3):
+            self.post("a", ("agent", "x"), "x", concat)
+            self.post("a", ("agent", "y"), "y", concat)
+        self.scheduler.flush()
+        self.assertEqual(self.applied, [("a", ("agent", "x"), "xxx"), ("a", ("agent", "y"), "yyy")])
+
+    def test_background_sessions_flush_less_often(self):
+        self.post("a", "content", "fg", concat)
+        self.post("b", "content", "bg", concat)
+        self.run_loop(0.08)
+        self.assertEqual([sid for sid, _, _ in self.applied], ["a", "b"]) # First flush of b is not delayed
+
+        self.applied.clear()
+        self.post("a", "content", "fg", concat)
+        self.post("b", "content", "bg", concat)
+        self.run_loop(0.08)
+        self.assertEqual([sid for sid, _, _ in self.applied], ["a"])
+        self.run_loop(0.25)
+        self.assertEqual([sid for sid, _, _ in self.applied], ["a", "b"])
+
+    def test_discard(self):
+        self.post("b", "content", "bg", concat)
+        self.scheduler.discard("b")
+        self.scheduler.flush()
+        self.assertEqual(self.applied, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from core.extraction_cache import ExtractionCache
+from core.xlsx_append import append_rows, has_sheet, column_letter, column_index
+
+spec = importlib.util.spec_from_file_location("fs_impl", os.path.join(os.path.dirname(__file__), '../skills/file-system/impl.py'))
+impl = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(impl)
+
+class TestXlsxAppend(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.temp_dir, "cache.db"))
+        self.previous, ExtractionCache._instance = ExtractionCache._instance, self.cache
+        self.book = os.path.join(self.temp_dir, "book.xlsx")
+
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Data"
+        ws.append(["name", "qty"])
+        ws.append(["apple", 3])
+        wb.create_sheet("Empty")
+        wb.create_sheet("Notes").append(["keep me"])
+        wb.save(self.book)
+
+    def tearDown(self):
+        ExtractionCache._instance = self.previous
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, data):
+        with open(os.path.join(self.temp_dir, name), "wb") as f:
+            f.write(data)
+
+    def test_columns(self):
+        self.assertEqual([column_letter(i) for i in (1, 26, 27, 703)], ["A", "Z", "AA", "AAA"])
+        self.assertEqual(column_index("AAA"), 703)
+
+    def test_appends_without_loading_the_workbook(self):
+        self.assertTrue(has_sheet(self.book, "Data"))
+        self.assertFalse(has_sheet(self.book, "Missing"))
+        count = append_rows(self.book, "Data", [["pear & plum", 1.5, True], ["<kiwi>", None, 7]])
+        self.assertEqual(count, 2)
+        with self.assertRaises(KeyError):
+            append_rows(self.book, "Missing", [["x"]])
+
+        wb = openpyxl.load_workbook(self.book)
+        self.assertEqual(wb.sheetnames, ["Data", "Empty", "Notes"])
+        self.assertEqual(list(wb["Data"].values), [("name", "qty", None), ("apple", 3, None),
+                                                   ("pear & plum", 1.5, True), ("<kiwi>", None, 7)])
+        self.assertEqual(wb["Data"].dimensions, "A1:C4")
+        self.assertEqual(wb["Notes"]["A1"].value, "keep me")
+
+        append_rows(self.book, "Empty", [["first"]]) # <sheetData/>
+        self.assertEqual(openpyxl.load_workbook(self.book)["Empty"]["A1"].value, "first")
+        with zipfile.ZipFile(self.book) as zf:
+            self.assertIsNone(zf.testzip())
+
+    def test_write_modes(self):
+        self.assertIn("Written 2 rows", impl.write_excel(self.temp_dir, "new.xlsx", [["a", 1], ["b", 2]], sheet_name="S"))
+        self.assertIn("Appended 1 rows", impl.write_excel(self.temp_dir, "new.xlsx", '[["c", 3]]', sheet_name="S", mode="append"))
+        self.assertIn("rows 1-2 of 2", impl.read_excel(self.temp_dir, "new.xlsx"))
+
+        # Replacing a sheet keeps its place among the others
+        impl.write_excel(self.temp_dir, "book.xlsx", [["fresh"]], sheet_name="Empty")
+        wb = openpyxl.load_workbook(self.book)
+        self.assertEqual(wb.sheetnames, ["Data", "Empty", "Notes"])
+        self.assertEqual(wb["Data"]["A2"].value, "apple")
+
+        # Appending to a sheet that does not exist yet creates it
+        impl.write_excel(self.temp_dir, "book.xlsx", [["x"]], sheet_name="Added", mode="append")
+        self.assertEqual(openpyxl.load_workbook(self.book)["Added"]["A1"].value, "x")
+        self.assertTrue(impl.write_excel(self.temp_dir, "book.xlsx", [], mode="merge").startswith("Error"))
+        self.assertTrue(impl.write_excel(self.temp_dir, "book.xlsx").startswith("Error"))
+
+    def test_csv_source(self):
+        self.write("in.csv", "code,qty,price,note\n007,2,1.25,\"a, b\"\n12,,3,\n".encode("utf-8"))
+        impl.write_excel(self.temp_dir, "out.xlsx", source="in.csv", sheet_name="Data")
+        self.assertEqual(list(openpyxl.load_workbook(os.path.join(self.temp_dir, "out.xlsx"))["Data"].values),
+                         [("code", "qty", "price", "note"), ("007", 2, 1.25, "a, b"), (12, None, 3, None)])
+
+        # The header row of the source is not repeated when appending; GBK files are decoded too
+        self.write("more.csv", "code,qty,price,note\n8,1,2,苹果\n".encode("gbk"))
+        self.assertIn("Appended 1 rows", impl.write_excel(self.temp_dir, "out.xlsx", source="more.csv", sheet_name="Data", mode="append"))
+        rows = list(openpyxl.load_workbook(os.path.join(self.temp_dir, "out.xlsx"))["Data"].values)
+        self.assertEqual(rows[-1], (8, 1, 2, "苹果"))
+        self.assertEqual(len(rows), 4)
+
+        self.write("in.json", b"[]")
+        self.assertTrue(impl.write_excel(self.temp_dir, "out.xlsx", source="in.json").startswith("Error"))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet_source(self):
+        import pyarrow
+        import pyarrow.parquet
+        table = pyarrow.table({"id": [1, 2], "name": ["a", None]})
+        pyarrow.parquet.write_table(table, os.path.join(self.temp_dir, "in.parquet"))
+        impl.write_excel(self.temp_dir, "out.xlsx", source="in.parquet")
+        self.assertEqual(list(openpyxl.load_workbook(os.path.join(self.temp_dir, "out.xlsx")).active.values),
+                         [("id", "name"), (1, "a"), (2, None)])
+
+if __name__ == "__main__":
+    unittest.main()